@@ -0,0 +1,104 @@
+"""
+Catálogos de cuentas predefinidos por tipo de empresa
+Cada cuenta es (código, nombre, tipo, naturaleza, categoría de flujo)
+"""
+
+PLANTILLAS = {
+    'servicios': {
+        'nombre': 'Empresa de Servicios',
+        'cuentas': [
+            ('1010', 'Caja', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
+            ('1020', 'Bancos', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
+            ('1030', 'Inversiones temporales', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('1040', 'Cuentas por cobrar clientes', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1050', 'Anticipos a proveedores', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1060', 'Gastos pagados por anticipado', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1070', 'Propiedad, planta y equipo', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('1080', 'Activos intangibles', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('2010', 'Proveedores', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2020', 'Acreedores diversos', 'PASIVO', 'ACREEDORA', 'Operación/Financiación'),
+            ('2030', 'Impuestos por pagar', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2040', 'Préstamos bancarios corto plazo', 'PASIVO', 'ACREEDORA', 'Financiación'),
+            ('2050', 'Cuentas por pagar empleados', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2060', 'Provisiones', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('3010', 'Capital social', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3020', 'Reservas legales', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3030', 'Resultados acumulados', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3040', 'Resultado del ejercicio', 'CAPITAL', 'ACREEDORA', 'Operación'),
+            ('4010', 'Ingresos por servicios', 'INGRESO', 'ACREEDORA', 'Operación'),
+            ('4020', 'Ingresos por mantenimiento', 'INGRESO', 'ACREEDORA', 'Operación'),
+            ('5010', 'Costo de servicios prestados', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5020', 'Gastos de personal', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5030', 'Gastos de oficina', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5040', 'Gastos de tecnología', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5050', 'Gastos de ventas', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5060', 'Gastos administrativos', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5070', 'Gastos financieros', 'GASTO', 'DEUDORA', 'Operación/Financiación'),
+            ('5080', 'Depreciación y amortización', 'GASTO', 'DEUDORA', 'Operación (Ajuste no efectivo)'),
+        ]
+    },
+    'comercial': {
+        'nombre': 'Empresa Comercializadora',
+        'cuentas': [
+            ('1010', 'Caja y bancos', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
+            ('1020', 'Inventarios de mercancías', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1030', 'Cuentas por cobrar clientes', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1040', 'Deudores diversos', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1050', 'Almacenes y equipos', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('1060', 'Vehículos de reparto', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('1070', 'Mobiliario y equipo oficina', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('2010', 'Proveedores', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2020', 'Documentos por pagar', 'PASIVO', 'ACREEDORA', 'Financiación'),
+            ('2030', 'Acreedores diversos', 'PASIVO', 'ACREEDORA', 'Operación/Financiación'),
+            ('2040', 'Impuestos por pagar', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2050', 'Préstamos bancarios', 'PASIVO', 'ACREEDORA', 'Financiación'),
+            ('3010', 'Capital social', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3020', 'Utilidades retenidas', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3030', 'Resultado del ejercicio', 'CAPITAL', 'ACREEDORA', 'Operación'),
+            ('4010', 'Ventas de mercancías', 'INGRESO', 'ACREEDORA', 'Operación'),
+            ('4020', 'Devoluciones en ventas', 'INGRESO', 'DEUDORA', 'Operación'),
+            ('4030', 'Descuentos comerciales', 'INGRESO', 'DEUDORA', 'Operación'),
+            ('4040', 'Ingresos financieros', 'INGRESO', 'ACREEDORA', 'Operación'),
+            ('5010', 'Costo de ventas', 'COSTO', 'DEUDORA', 'Operación'),
+            ('5020', 'Gastos de venta', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5030', 'Gastos de administración', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5040', 'Gastos de distribución', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5050', 'Gastos financieros', 'GASTO', 'DEUDORA', 'Operación/Financiación'),
+            ('5060', 'Depreciación', 'GASTO', 'DEUDORA', 'Operación (Ajuste no efectivo)'),
+        ]
+    },
+    'industrial': {
+        'nombre': 'Empresa de Manufactura',
+        'cuentas': [
+            ('1010', 'Efectivo y equivalentes', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
+            ('1021', 'Inventario - Materias primas', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1022', 'Inventario - Productos en proceso', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1023', 'Inventario - Productos terminados', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1030', 'Cuentas por cobrar', 'ACTIVO', 'DEUDORA', 'Operación'),
+            ('1041', 'Maquinaria', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('1042', 'Edificios', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('1043', 'Equipos de producción', 'ACTIVO', 'DEUDORA', 'Inversión'),
+            ('2010', 'Proveedores materias primas', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2020', 'Acreedores varios', 'PASIVO', 'ACREEDORA', 'Operación/Financiación'),
+            ('2030', 'Impuestos por pagar', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('2040', 'Préstamos a corto plazo', 'PASIVO', 'ACREEDORA', 'Financiación'),
+            ('2050', 'Obligaciones laborales', 'PASIVO', 'ACREEDORA', 'Operación'),
+            ('3010', 'Capital social', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3020', 'Superávit de capital', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3030', 'Utilidades acumuladas', 'CAPITAL', 'ACREEDORA', 'Financiación'),
+            ('3040', 'Resultado del período', 'CAPITAL', 'ACREEDORA', 'Operación'),
+            ('4010', 'Ventas de productos', 'INGRESO', 'ACREEDORA', 'Operación'),
+            ('4020', 'Devoluciones en ventas', 'INGRESO', 'DEUDORA', 'Operación'),
+            ('4030', 'Descuentos concedidos', 'INGRESO', 'DEUDORA', 'Operación'),
+            ('4040', 'Otros ingresos operativos', 'INGRESO', 'ACREEDORA', 'Operación'),
+            ('5011', 'Costo - Materia prima directa', 'COSTO', 'DEUDORA', 'Operación'),
+            ('5012', 'Costo - Mano de obra directa', 'COSTO', 'DEUDORA', 'Operación'),
+            ('5013', 'Costos indirectos de fabricación', 'COSTO', 'DEUDORA', 'Operación'),
+            ('5020', 'Gastos de operación', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5030', 'Gastos de venta', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5040', 'Gastos administrativos', 'GASTO', 'DEUDORA', 'Operación'),
+            ('5050', 'Gastos financieros', 'GASTO', 'DEUDORA', 'Operación/Financiación'),
+            ('5060', 'Depreciación y amortización', 'GASTO', 'DEUDORA', 'Operación (Ajuste no efectivo)'),
+        ]
+    }
+}
@@ -50,5 +50,10 @@ class CuentaContableTreeSerializer(serializers.ModelSerializer):
         
     def get_subcuentas(self, obj):
         """Obtiene subcuentas recursivamente"""
-        subcuentas = obj.subcuentas.filter(activo=True).order_by('codigo')
-        return CuentaContableTreeSerializer(subcuentas, many=True).data
\ No newline at end of file
+        # Con el mapa de subcuentas en el contexto el árbol se arma sin una consulta por nodo
+        mapa = self.context.get('subcuentas')
+        if mapa is not None:
+            subcuentas = mapa.get(obj.id, [])
+        else:
+            subcuentas = obj.subcuentas.filter(activo=True).order_by('codigo')
+        return CuentaContableTreeSerializer(subcuentas, many=True, context=self.context).data
\ No newline at end of file
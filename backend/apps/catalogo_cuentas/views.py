@@ -8,9 +8,21 @@ from django.http import HttpResponse
 from django.db import transaction
 from .models import CuentaContable
 from .serializers import CuentaContableSerializer, CuentaContableTreeSerializer
-from io import BytesIO
+from .plantillas import PLANTILLAS
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
+from apps.reportes.exportadores import Columna, exportar_excel
+
+COLUMNAS_CATALOGO = [
+    Columna('Código', 15, 'texto'),
+    Columna('Nombre', 40, 'texto'),
+    Columna('Tipo', 15, 'texto'),
+    Columna('Naturaleza', 15, 'texto'),
+    Columna('Nivel', 8, 'numero'),
+    Columna('Cuenta Padre', 15, 'texto'),
+    Columna('Afectable', 12, 'texto'),
+    Columna('Descripción', 50, 'texto'),
+]
 
 
 class CuentaContableViewSet(viewsets.ModelViewSet):
@@ -106,14 +118,22 @@ class CuentaContableViewSet(viewsets.ModelViewSet):
                     empresa = acceso.empresa
         
         if empresa:
-            # Solo cuentas de primer nivel
-            cuentas_mayor = CuentaContable.objects.filter(
+            # Todo el catálogo en una consulta; las subcuentas se agrupan por cuenta padre
+            cuentas_mayor = []
+            subcuentas = {}
+            cuentas = CuentaContable.objects.filter(
                 empresa=empresa,
-                cuenta_padre__isnull=True,
                 activo=True
             ).order_by('codigo')
+            for cuenta in cuentas:
+                if cuenta.cuenta_padre_id is None:
+                    cuentas_mayor.append(cuenta)
+                else:
+                    subcuentas.setdefault(cuenta.cuenta_padre_id, []).append(cuenta)
             
-            serializer = CuentaContableTreeSerializer(cuentas_mayor, many=True)
+            serializer = CuentaContableTreeSerializer(
+                cuentas_mayor, many=True, context={'subcuentas': subcuentas}
+            )
             return Response(serializer.data)
         return Response([])
     
@@ -162,56 +182,29 @@ class CuentaContableViewSet(viewsets.ModelViewSet):
         if not empresa:
             return Response({'error': 'Sin empresa seleccionada'}, status=400)
         
-        # Crear workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Catálogo de Cuentas"
-        
-        # Headers con estilo
-        headers = ['Código', 'Nombre', 'Tipo', 'Naturaleza', 'Nivel', 'Cuenta Padre', 'Afectable', 'Descripción']
-        
-        # Aplicar estilos a headers
-        header_font = Font(bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_alignment = Alignment(horizontal='center', vertical='center')
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Obtener cuentas ordenadas
+        # Obtener cuentas ordenadas (se leen por bloques y se escriben en modo constant_memory)
         cuentas = CuentaContable.objects.filter(
             empresa=empresa,
             activo=True
-        ).order_by('codigo').select_related('cuenta_padre')
-        
-        # Llenar datos
-        for row, cuenta in enumerate(cuentas, 2):
-            ws.cell(row=row, column=1, value=cuenta.codigo)
-            ws.cell(row=row, column=2, value=cuenta.nombre)
-            ws.cell(row=row, column=3, value=cuenta.tipo)
-            ws.cell(row=row, column=4, value=cuenta.naturaleza)
-            ws.cell(row=row, column=5, value=cuenta.nivel)
-            ws.cell(row=row, column=6, value=cuenta.cuenta_padre.codigo if cuenta.cuenta_padre else '')
-            ws.cell(row=row, column=7, value='Sí' if cuenta.afectable else 'No')
-            ws.cell(row=row, column=8, value=cuenta.descripcion or '')
-        
-        # Ajustar ancho de columnas
-        column_widths = [15, 40, 15, 15, 8, 15, 12, 50]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
+        ).order_by('codigo').values_list(
+            'codigo', 'nombre', 'tipo', 'naturaleza', 'nivel', 'cuenta_padre__codigo', 'afectable',
+            'descripcion'
+        )
         
-        # Crear respuesta HTTP
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filas = (
+            (codigo, nombre, tipo, naturaleza, nivel, codigo_padre or '', 'Sí' if afectable else 'No',
+             descripcion or '')
+            for codigo, nombre, tipo, naturaleza, nivel, codigo_padre, afectable, descripcion
+            in cuentas.iterator(chunk_size=500)
         )
-        response['Content-Disposition'] = f'attachment; filename="catalogo_cuentas_{empresa.codigo}.xlsx"'
         
-        # Guardar workbook
-        wb.save(response)
-        return response
+        return exportar_excel(
+            f'catalogo_cuentas_{empresa.rfc}.xlsx',
+            'Catálogo de Cuentas',
+            [],
+            COLUMNAS_CATALOGO,
+            filas
+        )
     
     @action(detail=False, methods=['get'])
     def template_excel(self, request):
@@ -445,107 +438,6 @@ def aplicar_plantilla_predefinida(request):
     """Aplicar catálogo predefinido según tipo de empresa"""
     tipo_plantilla = request.data.get('tipo')
     
-    # Mapeo de plantillas
-    PLANTILLAS = {
-        'servicios': {
-            'nombre': 'Empresa de Servicios',
-            'cuentas': [
-                ('1010', 'Caja', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
-                ('1020', 'Bancos', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
-                ('1030', 'Inversiones temporales', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('1040', 'Cuentas por cobrar clientes', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1050', 'Anticipos a proveedores', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1060', 'Gastos pagados por anticipado', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1070', 'Propiedad, planta y equipo', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('1080', 'Activos intangibles', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('2010', 'Proveedores', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2020', 'Acreedores diversos', 'PASIVO', 'ACREEDORA', 'Operación/Financiación'),
-                ('2030', 'Impuestos por pagar', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2040', 'Préstamos bancarios corto plazo', 'PASIVO', 'ACREEDORA', 'Financiación'),
-                ('2050', 'Cuentas por pagar empleados', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2060', 'Provisiones', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('3010', 'Capital social', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3020', 'Reservas legales', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3030', 'Resultados acumulados', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3040', 'Resultado del ejercicio', 'CAPITAL', 'ACREEDORA', 'Operación'),
-                ('4010', 'Ingresos por servicios', 'INGRESO', 'ACREEDORA', 'Operación'),
-                ('4020', 'Ingresos por mantenimiento', 'INGRESO', 'ACREEDORA', 'Operación'),
-                ('5010', 'Costo de servicios prestados', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5020', 'Gastos de personal', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5030', 'Gastos de oficina', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5040', 'Gastos de tecnología', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5050', 'Gastos de ventas', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5060', 'Gastos administrativos', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5070', 'Gastos financieros', 'GASTO', 'DEUDORA', 'Operación/Financiación'),
-                ('5080', 'Depreciación y amortización', 'GASTO', 'DEUDORA', 'Operación (Ajuste no efectivo)'),
-            ]
-        },
-        'comercial': {
-            'nombre': 'Empresa Comercializadora',
-            'cuentas': [
-                ('1010', 'Caja y bancos', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
-                ('1020', 'Inventarios de mercancías', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1030', 'Cuentas por cobrar clientes', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1040', 'Deudores diversos', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1050', 'Almacenes y equipos', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('1060', 'Vehículos de reparto', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('1070', 'Mobiliario y equipo oficina', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('2010', 'Proveedores', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2020', 'Documentos por pagar', 'PASIVO', 'ACREEDORA', 'Financiación'),
-                ('2030', 'Acreedores diversos', 'PASIVO', 'ACREEDORA', 'Operación/Financiación'),
-                ('2040', 'Impuestos por pagar', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2050', 'Préstamos bancarios', 'PASIVO', 'ACREEDORA', 'Financiación'),
-                ('3010', 'Capital social', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3020', 'Utilidades retenidas', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3030', 'Resultado del ejercicio', 'CAPITAL', 'ACREEDORA', 'Operación'),
-                ('4010', 'Ventas de mercancías', 'INGRESO', 'ACREEDORA', 'Operación'),
-                ('4020', 'Devoluciones en ventas', 'INGRESO', 'DEUDORA', 'Operación'),
-                ('4030', 'Descuentos comerciales', 'INGRESO', 'DEUDORA', 'Operación'),
-                ('4040', 'Ingresos financieros', 'INGRESO', 'ACREEDORA', 'Operación'),
-                ('5010', 'Costo de ventas', 'COSTO', 'DEUDORA', 'Operación'),
-                ('5020', 'Gastos de venta', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5030', 'Gastos de administración', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5040', 'Gastos de distribución', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5050', 'Gastos financieros', 'GASTO', 'DEUDORA', 'Operación/Financiación'),
-                ('5060', 'Depreciación', 'GASTO', 'DEUDORA', 'Operación (Ajuste no efectivo)'),
-            ]
-        },
-        'industrial': {
-            'nombre': 'Empresa de Manufactura',
-            'cuentas': [
-                ('1010', 'Efectivo y equivalentes', 'ACTIVO', 'DEUDORA', 'Efectivo y equivalentes'),
-                ('1021', 'Inventario - Materias primas', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1022', 'Inventario - Productos en proceso', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1023', 'Inventario - Productos terminados', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1030', 'Cuentas por cobrar', 'ACTIVO', 'DEUDORA', 'Operación'),
-                ('1041', 'Maquinaria', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('1042', 'Edificios', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('1043', 'Equipos de producción', 'ACTIVO', 'DEUDORA', 'Inversión'),
-                ('2010', 'Proveedores materias primas', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2020', 'Acreedores varios', 'PASIVO', 'ACREEDORA', 'Operación/Financiación'),
-                ('2030', 'Impuestos por pagar', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('2040', 'Préstamos a corto plazo', 'PASIVO', 'ACREEDORA', 'Financiación'),
-                ('2050', 'Obligaciones laborales', 'PASIVO', 'ACREEDORA', 'Operación'),
-                ('3010', 'Capital social', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3020', 'Superávit de capital', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3030', 'Utilidades acumuladas', 'CAPITAL', 'ACREEDORA', 'Financiación'),
-                ('3040', 'Resultado del período', 'CAPITAL', 'ACREEDORA', 'Operación'),
-                ('4010', 'Ventas de productos', 'INGRESO', 'ACREEDORA', 'Operación'),
-                ('4020', 'Devoluciones en ventas', 'INGRESO', 'DEUDORA', 'Operación'),
-                ('4030', 'Descuentos concedidos', 'INGRESO', 'DEUDORA', 'Operación'),
-                ('4040', 'Otros ingresos operativos', 'INGRESO', 'ACREEDORA', 'Operación'),
-                ('5011', 'Costo - Materia prima directa', 'COSTO', 'DEUDORA', 'Operación'),
-                ('5012', 'Costo - Mano de obra directa', 'COSTO', 'DEUDORA', 'Operación'),
-                ('5013', 'Costos indirectos de fabricación', 'COSTO', 'DEUDORA', 'Operación'),
-                ('5020', 'Gastos de operación', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5030', 'Gastos de venta', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5040', 'Gastos administrativos', 'GASTO', 'DEUDORA', 'Operación'),
-                ('5050', 'Gastos financieros', 'GASTO', 'DEUDORA', 'Operación/Financiación'),
-                ('5060', 'Depreciación y amortización', 'GASTO', 'DEUDORA', 'Operación (Ajuste no efectivo)'),
-            ]
-        }
-    }
-    
     if tipo_plantilla not in PLANTILLAS:
         return Response({'error': 'Tipo de plantilla no válido'}, status=400)
     
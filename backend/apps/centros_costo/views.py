@@ -51,17 +51,35 @@ class CentroCostoViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def jerarquicos(self, request):
         """Devuelve centros de costo en estructura jerárquica"""
-        centros_raiz = self.get_queryset().filter(centro_padre__isnull=True)
+        empresa = self.get_empresa_from_request(request)
+        if not empresa:
+            return Response([])
+
+        # Todos los centros en una consulta (también los inactivos, para la ruta completa);
+        # el padre de cada centro se asigna desde memoria
+        centros = list(
+            CentroCosto.objects.filter(empresa=empresa).select_related('tipo').order_by('codigo')
+        )
+        por_id = {centro.id: centro for centro in centros}
+        children = {}
+        for centro in centros:
+            if centro.centro_padre_id in por_id:
+                centro.centro_padre = por_id[centro.centro_padre_id]
+            if centro.activo and centro.centro_padre_id:
+                children.setdefault(centro.centro_padre_id, []).append(centro)
+
+        centros_raiz = [centro for centro in centros if centro.activo and not centro.centro_padre_id]
         data = []
         for centro in centros_raiz:
-            data.append(self._serialize_with_children(centro))
+            data.append(self._serialize_with_children(centro, children))
         return Response(data)
     
-    def _serialize_with_children(self, centro):
+    def _serialize_with_children(self, centro, children):
         serializer = self.get_serializer(centro)
         data = serializer.data
-        children = centro.subcentros.filter(activo=True).order_by('codigo')
-        data['children'] = [self._serialize_with_children(child) for child in children]
+        data['children'] = [
+            self._serialize_with_children(child, children) for child in children.get(centro.id, [])
+        ]
         return data
 
 class ProyectoViewSet(viewsets.ModelViewSet):
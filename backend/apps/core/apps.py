@@ -9,4 +9,6 @@ class CoreConfig(AppConfig):
     def ready(self):
         """Inicialización cuando la app está lista"""
         # Importar signals si los hay
-        # import apps.core.signals
\ No newline at end of file
+        # import apps.core.signals
+        from .metricas import conectar_senales_celery
+        conectar_senales_celery()
\ No newline at end of file
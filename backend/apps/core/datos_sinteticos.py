@@ -0,0 +1,290 @@
+"""
+Generación de empresas sintéticas para pruebas de volumen
+Crea catálogo (desde las plantillas predefinidas), centros de costo, proyectos,
+pólizas contabilizadas balanceadas y CFDIs usando bulk_create por lotes.
+Los datos se generan con una semilla para que sean reproducibles
+"""
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone as django_timezone
+from apps.catalogo_cuentas.models import CuentaContable
+from apps.catalogo_cuentas.plantillas import PLANTILLAS
+from apps.centros_costo.models import CentroCosto, Proyecto, TipoCentroCosto
+from apps.empresas.models import Empresa, UsuarioEmpresa
+from apps.sat_integration.models import CFDI
+from apps.transacciones.models import TransaccionContable, MovimientoContable
+from apps.transacciones.saldos import invalidar_indice_saldos, reconstruir_saldos_periodo
+
+User = get_user_model()
+
+# Registros por bulk_create
+TAMANO_LOTE = 5000
+
+# Conceptos de ejemplo por tipo de póliza
+CONCEPTOS = {
+    'INGRESO': ['Cobro a cliente', 'Venta de contado', 'Depósito de cliente', 'Anticipo de cliente'],
+    'EGRESO': ['Pago a proveedor', 'Pago de nómina', 'Pago de servicios', 'Pago de impuestos'],
+    'DIARIO': ['Provisión de gastos', 'Depreciación del mes', 'Reclasificación', 'Ajuste contable'],
+}
+
+
+def _rfc_disponible(rng, prefijo='SIN'):
+    """RFC de persona moral que aún no existe en la base"""
+    while True:
+        fecha = date(2000, 1, 1) + timedelta(days=rng.randrange(8000))
+        rfc = f"{prefijo}{fecha.strftime('%y%m%d')}{rng.randrange(36 ** 3):03X}"[:12]
+        if not Empresa.objects.filter(rfc=rfc).exists():
+            return rfc
+
+
+def _importe(rng, minimo=100, maximo=50000):
+    return Decimal(rng.randrange(minimo * 100, maximo * 100)) / 100
+
+
+def _crear_catalogo(empresa, usuario, plantilla):
+    cuentas = [
+        CuentaContable(
+            empresa=empresa,
+            codigo=codigo,
+            nombre=nombre,
+            tipo=tipo,
+            naturaleza=naturaleza,
+            nivel=len(codigo.replace('.', '')),
+            afectable=True,
+            creado_por=usuario
+        )
+        for codigo, nombre, tipo, naturaleza, _categoria in PLANTILLAS[plantilla]['cuentas']
+    ]
+    CuentaContable.objects.bulk_create(cuentas)
+
+    categorias = {codigo: categoria for codigo, _n, _t, _na, categoria in PLANTILLAS[plantilla]['cuentas']}
+    efectivo = []
+    por_tipo = {}
+    for cuenta in CuentaContable.objects.filter(empresa=empresa).only('id', 'codigo', 'tipo'):
+        if categorias[cuenta.codigo] == 'Efectivo y equivalentes':
+            efectivo.append(cuenta.id)
+        por_tipo.setdefault(cuenta.tipo, []).append(cuenta.id)
+    return efectivo, por_tipo
+
+
+def _crear_centros(empresa, usuario, rng, centros, proyectos):
+    """Centros de costo en dos niveles y proyectos ligados a ellos"""
+    tipo = TipoCentroCosto.objects.create(
+        empresa=empresa, codigo='AREA', nombre='Área', creado_por=usuario
+    )
+
+    raices = max(1, centros // 4)
+    padres = CentroCosto.objects.bulk_create([
+        CentroCosto(
+            empresa=empresa, codigo=f'CC{i + 1:03d}', nombre=f'Área {i + 1}',
+            tipo=tipo, creado_por=usuario
+        )
+        for i in range(min(raices, centros))
+    ])
+    hijos = CentroCosto.objects.bulk_create([
+        CentroCosto(
+            empresa=empresa, codigo=f'CC{len(padres) + i + 1:03d}', nombre=f'Departamento {i + 1}',
+            tipo=tipo, centro_padre=rng.choice(padres), creado_por=usuario
+        )
+        for i in range(centros - len(padres))
+    ])
+    centros_creados = [centro.id for centro in padres + hijos]
+
+    proyectos_creados = [proyecto.id for proyecto in Proyecto.objects.bulk_create([
+        Proyecto(
+            empresa=empresa, codigo=f'PRY{i + 1:03d}', nombre=f'Proyecto {i + 1}',
+            fecha_inicio=date.today() - timedelta(days=365), estado='ACTIVO',
+            centro_costo_id=rng.choice(centros_creados) if centros_creados else None,
+            creado_por=usuario
+        )
+        for i in range(proyectos)
+    ])]
+    return centros_creados, proyectos_creados
+
+
+def _partidas(rng, tipo, efectivo, por_tipo, pares):
+    """Pares (cuenta cargo, cuenta abono, importe) coherentes con el tipo de póliza"""
+    ingresos = por_tipo.get('INGRESO', [])
+    gastos = por_tipo.get('GASTO', []) + por_tipo.get('COSTO', [])
+    todas = [cuenta for cuentas in por_tipo.values() for cuenta in cuentas]
+
+    for _ in range(pares):
+        if tipo == 'INGRESO' and efectivo and ingresos:
+            yield rng.choice(efectivo), rng.choice(ingresos), _importe(rng)
+        elif tipo == 'EGRESO' and efectivo and gastos:
+            yield rng.choice(gastos), rng.choice(efectivo), _importe(rng)
+        else:
+            cargo, abono = rng.sample(todas, 2)
+            yield cargo, abono, _importe(rng)
+
+
+def _crear_polizas(empresa, usuario, rng, polizas, movimientos_por_poliza, fecha_inicio, dias,
+                   efectivo, por_tipo, centros, proyectos, progreso=None):
+    pares = max(1, movimientos_por_poliza // 2)
+    ahora = django_timezone.now()
+    creadas = 0
+    movimientos_creados = 0
+
+    while creadas < polizas:
+        lote = min(TAMANO_LOTE, polizas - creadas)
+        transacciones = []
+        partidas = []
+        for i in range(lote):
+            tipo = rng.choice(['INGRESO', 'EGRESO', 'DIARIO'])
+            renglones = list(_partidas(rng, tipo, efectivo, por_tipo, pares))
+            total = sum((importe for _c, _a, importe in renglones), Decimal('0.00'))
+            transacciones.append(TransaccionContable(
+                empresa=empresa,
+                folio=f'S{creadas + i + 1:07d}',
+                fecha=fecha_inicio + timedelta(days=rng.randrange(dias)),
+                tipo=tipo,
+                concepto=rng.choice(CONCEPTOS[tipo]),
+                estado='CONTABILIZADA',
+                fecha_contabilizacion=ahora,
+                total_debe=total,
+                total_haber=total,
+                creado_por=usuario
+            ))
+            partidas.append(renglones)
+
+        with transaction.atomic():
+            TransaccionContable.objects.bulk_create(transacciones, batch_size=TAMANO_LOTE)
+
+            movimientos = []
+            for transaccion, renglones in zip(transacciones, partidas):
+                for cargo, abono, importe in renglones:
+                    centro = rng.choice(centros) if centros and rng.random() < 0.5 else None
+                    proyecto = rng.choice(proyectos) if proyectos and rng.random() < 0.2 else None
+                    movimientos.append(MovimientoContable(
+                        transaccion=transaccion, cuenta_id=cargo, debe=importe,
+                        centro_costo_id=centro, proyecto_id=proyecto, creado_por=usuario
+                    ))
+                    movimientos.append(MovimientoContable(
+                        transaccion=transaccion, cuenta_id=abono, haber=importe,
+                        centro_costo_id=centro, proyecto_id=proyecto, creado_por=usuario
+                    ))
+            # bulk_create no pasa por save(): copiar empresa, fecha y estado de la póliza
+            for movimiento in movimientos:
+                movimiento.copiar_transaccion()
+            MovimientoContable.objects.bulk_create(movimientos, batch_size=TAMANO_LOTE)
+
+        creadas += lote
+        movimientos_creados += len(movimientos)
+        if progreso:
+            progreso(creadas, polizas)
+
+    return movimientos_creados
+
+
+def _crear_cfdis(empresa, usuario, rng, cfdis, fecha_inicio, dias):
+    creados = 0
+    while creados < cfdis:
+        lote = min(TAMANO_LOTE, cfdis - creados)
+        registros = []
+        for i in range(lote):
+            subtotal = _importe(rng)
+            iva = (subtotal * Decimal('0.16')).quantize(Decimal('0.01'))
+            emitido = rng.random() < 0.5
+            contraparte = f"XAX{rng.randrange(10 ** 6):06d}{rng.randrange(36 ** 3):03X}"[:12]
+            fecha = fecha_inicio + timedelta(days=rng.randrange(dias))
+            registros.append(CFDI(
+                empresa=empresa,
+                uuid=str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper(),
+                serie='A',
+                folio=str(creados + i + 1),
+                fecha_emision=django_timezone.make_aware(datetime.combine(fecha, time(12, 0))),
+                rfc_emisor=empresa.rfc if emitido else contraparte,
+                nombre_emisor=empresa.nombre if emitido else f'Proveedor {contraparte}',
+                rfc_receptor=contraparte if emitido else empresa.rfc,
+                nombre_receptor=f'Cliente {contraparte}' if emitido else empresa.nombre,
+                tipo_comprobante='INGRESO' if emitido else rng.choice(['INGRESO', 'EGRESO', 'PAGO']),
+                estado_sat='CANCELADO' if rng.random() < 0.03 else 'VIGENTE',
+                subtotal=subtotal,
+                iva=iva,
+                total=subtotal + iva,
+                creado_por=usuario
+            ))
+        CFDI.objects.bulk_create(registros, batch_size=TAMANO_LOTE)
+        creados += lote
+    return creados
+
+
+def generar_empresa_sintetica(polizas=1000, movimientos_por_poliza=4, plantilla='comercial',
+                              centros=10, proyectos=5, cfdis=0, meses=12, semilla=0,
+                              usuario=None, progreso=None):
+    """
+    Crea una empresa sintética con su usuario y regresa (empresa, resumen)
+    Las pólizas se reparten en los `meses` anteriores a hoy; al final se
+    reconstruyen los saldos por periodo de la empresa
+    """
+    if plantilla not in PLANTILLAS:
+        raise ValueError(f"Plantilla no válida: {plantilla}")
+
+    rng = random.Random(semilla)
+
+    with transaction.atomic():
+        if usuario is None:
+            usuario = User.objects.create_user(username=f'sintetico_{uuid.uuid4().hex[:10]}')
+        rfc = _rfc_disponible(rng)
+        empresa = Empresa.objects.create(
+            nombre=f'Empresa Sintética {rfc}',
+            rfc=rfc,
+            creado_por=usuario
+        )
+        UsuarioEmpresa.objects.create(
+            usuario=usuario, empresa=empresa, rol='ADMINISTRADOR', creado_por=usuario
+        )
+        efectivo, por_tipo = _crear_catalogo(empresa, usuario, plantilla)
+        ids_centros, ids_proyectos = _crear_centros(empresa, usuario, rng, centros, proyectos)
+
+    hoy = date.today()
+    fecha_inicio = date(hoy.year, hoy.month, 1) - timedelta(days=30 * max(meses - 1, 0))
+    fecha_inicio = date(fecha_inicio.year, fecha_inicio.month, 1)
+    dias = max((hoy - fecha_inicio).days, 1)
+
+    movimientos = _crear_polizas(
+        empresa, usuario, rng, polizas, movimientos_por_poliza, fecha_inicio, dias,
+        efectivo, por_tipo, ids_centros, ids_proyectos, progreso
+    )
+    total_cfdis = _crear_cfdis(empresa, usuario, rng, cfdis, fecha_inicio, dias)
+
+    # Los bulk_create no pasan por contabilizar(): reconstruir saldos e invalidar cachés
+    reconstruir_saldos_periodo(empresa)
+    Empresa.incrementar_version_contable(empresa.id)
+    invalidar_indice_saldos(empresa.id, fecha_inicio)
+    empresa.refresh_from_db()
+
+    return empresa, {
+        'empresa_id': empresa.id,
+        'usuario': usuario.username,
+        'cuentas': sum(len(cuentas) for cuentas in por_tipo.values()),
+        'centros_costo': len(ids_centros),
+        'proyectos': len(ids_proyectos),
+        'polizas': polizas,
+        'movimientos': movimientos,
+        'cfdis': total_cfdis,
+        'fecha_inicio': fecha_inicio.isoformat(),
+        'fecha_fin': hoy.isoformat(),
+    }
+
+
+def eliminar_empresa_sintetica(empresa):
+    """
+    Elimina físicamente una empresa sintética y su usuario
+    Las tablas grandes se borran primero con DELETE directos para que el
+    borrado en cascada no cargue millones de objetos en memoria
+    """
+    usuario = empresa.creado_por
+    with transaction.atomic():
+        MovimientoContable.objects.filter(empresa=empresa).delete()
+        CFDI.objects.filter(empresa=empresa).delete()
+        TransaccionContable.objects.filter(empresa=empresa).delete()
+        # CentroCosto.tipo es PROTECT: los centros se borran antes que sus tipos
+        Proyecto.objects.filter(empresa=empresa).delete()
+        CentroCosto.objects.filter(empresa=empresa).delete()
+        empresa.hard_delete()
+        usuario.delete()
@@ -0,0 +1,160 @@
+import json
+import statistics
+import time
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from apps.catalogo_cuentas.models import CuentaContable
+from apps.core.datos_sinteticos import eliminar_empresa_sintetica, generar_empresa_sintetica
+from apps.reportes.cache import purgar_reportes
+
+URL_REPORTES = '/api/reportes/reportes'
+
+
+def casos_benchmark(resumen, cuenta_id):
+    """Endpoints medidos: (nombre, url, parámetros)"""
+    fecha_inicio = resumen['fecha_inicio']
+    fecha_fin = resumen['fecha_fin']
+    inicio_mes = date.fromisoformat(fecha_fin).replace(day=1).isoformat()
+    periodo = {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin}
+
+    return [
+        ('balanza_comprobacion', f'{URL_REPORTES}/balanza_comprobacion/', {'fecha': fecha_fin}),
+        ('balanza_por_nivel', f'{URL_REPORTES}/balanza_comprobacion/', {'fecha': fecha_fin, 'nivel': 'todos'}),
+        ('estado_resultados', f'{URL_REPORTES}/estado_resultados/', periodo),
+        ('estado_resultados_mensual', f'{URL_REPORTES}/estado_resultados/',
+         {'periodos': 'mensual', 'desde': fecha_inicio, 'hasta': fecha_fin}),
+        ('balance_general', f'{URL_REPORTES}/balance_general/', {'fecha': fecha_fin}),
+        ('libro_diario', f'{URL_REPORTES}/libro_diario/', dict(periodo, limite=100)),
+        ('libro_mayor', f'{URL_REPORTES}/libro_mayor/', dict(periodo, cuenta_id=cuenta_id, limite=100)),
+        ('flujo_efectivo', f'{URL_REPORTES}/flujo_efectivo/', {'fecha_inicio': inicio_mes, 'fecha_fin': fecha_fin}),
+        ('chart_ingresos_gastos', f'{URL_REPORTES}/charts/ingresos-gastos/', {'meses': 12}),
+        ('chart_balance_cuentas', f'{URL_REPORTES}/charts/balance-cuentas/', {}),
+        ('dashboard', '/api/transacciones/transacciones/dashboard/', {}),
+        ('lista_transacciones', '/api/transacciones/transacciones/', {}),
+    ]
+
+
+def medir(client, empresa, url, params, repeticiones):
+    """Latencias en ms (sin caché de reportes) y consultas de la última repetición"""
+    latencias = []
+    consultas = 0
+    for _ in range(repeticiones):
+        purgar_reportes(empresa)
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            response = client.get(url, params)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        if response.status_code != 200:
+            raise CommandError(f'{url} respondió {response.status_code}')
+        consultas = len(capturadas.captured_queries)
+
+    return {
+        'consultas': consultas,
+        'latencia_ms': {
+            'mediana': round(statistics.median(latencias), 2),
+            'minimo': round(min(latencias), 2),
+            'maximo': round(max(latencias), 2),
+        }
+    }
+
+
+def comparar(actual, base, tolerancia):
+    """Regresiones respecto a la línea base: más consultas o latencia mediana fuera de tolerancia"""
+    regresiones = []
+    for tamano, casos in actual['resultados'].items():
+        for nombre, medicion in casos.items():
+            anterior = base.get('resultados', {}).get(tamano, {}).get(nombre)
+            if not anterior:
+                continue
+            if medicion['consultas'] > anterior['consultas']:
+                regresiones.append(
+                    f"{tamano}/{nombre}: consultas {anterior['consultas']} -> {medicion['consultas']}"
+                )
+            limite = anterior['latencia_ms']['mediana'] * (1 + tolerancia)
+            if medicion['latencia_ms']['mediana'] > limite:
+                regresiones.append(
+                    f"{tamano}/{nombre}: latencia {anterior['latencia_ms']['mediana']} ms -> "
+                    f"{medicion['latencia_ms']['mediana']} ms"
+                )
+    return regresiones
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas y latencia de los reportes, el dashboard y la lista de transacciones con datos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos', default='1000,10000',
+            help='Números de pólizas separados por coma; se genera una empresa por tamaño'
+        )
+        parser.add_argument('--movimientos-por-poliza', type=int, default=4)
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', default='benchmark_reportes.json', help='Archivo JSON de resultados')
+        parser.add_argument('--comparar', help='Línea base JSON contra la cual comparar')
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.25,
+            help='Aumento relativo de latencia mediana tolerado al comparar (0.25 = 25%%)'
+        )
+        parser.add_argument(
+            '--conservar', action='store_true',
+            help='No eliminar las empresas sintéticas al terminar'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = [int(tamano) for tamano in options['tamanos'].split(',')]
+        except ValueError:
+            raise CommandError('--tamanos debe ser una lista de enteros separada por comas')
+
+        resultado = {
+            'fecha': date.today().isoformat(),
+            'motor': connection.vendor,
+            'movimientos_por_poliza': options['movimientos_por_poliza'],
+            'repeticiones': options['repeticiones'],
+            'resultados': {},
+        }
+
+        for tamano in tamanos:
+            self.stdout.write(f'Generando empresa con {tamano} pólizas...')
+            empresa, resumen = generar_empresa_sintetica(
+                polizas=tamano,
+                movimientos_por_poliza=options['movimientos_por_poliza'],
+                semilla=options['semilla']
+            )
+            usuario = empresa.creado_por
+            try:
+                cuenta_id = CuentaContable.objects.filter(empresa=empresa).order_by('codigo').values_list(
+                    'id', flat=True
+                ).first()
+                client = Client()
+                client.force_login(usuario)
+
+                mediciones = {}
+                with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver']):
+                    for nombre, url, params in casos_benchmark(resumen, cuenta_id):
+                        mediciones[nombre] = medir(client, empresa, url, params, options['repeticiones'])
+                        self.stdout.write(
+                            f"  {nombre}: {mediciones[nombre]['latencia_ms']['mediana']} ms, "
+                            f"{mediciones[nombre]['consultas']} consultas"
+                        )
+                resultado['resultados'][str(tamano)] = mediciones
+            finally:
+                if not options['conservar']:
+                    eliminar_empresa_sintetica(empresa)
+
+        with open(options['salida'], 'w') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            with open(options['comparar']) as archivo:
+                base = json.load(archivo)
+            regresiones = comparar(resultado, base, options['tolerancia'])
+            if regresiones:
+                raise CommandError('Regresiones respecto a la línea base:\n' + '\n'.join(regresiones))
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la línea base'))
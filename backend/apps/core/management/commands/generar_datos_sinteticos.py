@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.catalogo_cuentas.plantillas import PLANTILLAS
+from apps.core.datos_sinteticos import generar_empresa_sintetica
+
+
+class Command(BaseCommand):
+    help = 'Genera una empresa sintética con catálogo, pólizas, centros de costo y CFDIs para pruebas de volumen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polizas', type=int, default=10000, help='Número de pólizas')
+        parser.add_argument(
+            '--movimientos-por-poliza', type=int, default=4,
+            help='Movimientos por póliza (se generan en pares cargo/abono)'
+        )
+        parser.add_argument('--plantilla', choices=sorted(PLANTILLAS), default='comercial',
+                            help='Plantilla de catálogo de cuentas')
+        parser.add_argument('--centros', type=int, default=20, help='Centros de costo')
+        parser.add_argument('--proyectos', type=int, default=10, help='Proyectos')
+        parser.add_argument('--cfdis', type=int, default=0, help='CFDIs a generar')
+        parser.add_argument('--meses', type=int, default=12, help='Meses hacia atrás que cubren las pólizas')
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla para datos reproducibles')
+
+    def handle(self, *args, **options):
+        if options['polizas'] < 1 or options['movimientos_por_poliza'] < 2:
+            raise CommandError('Se requiere al menos una póliza con dos movimientos')
+
+        def progreso(creadas, total):
+            self.stdout.write(f'  {creadas}/{total} pólizas')
+
+        empresa, resumen = generar_empresa_sintetica(
+            polizas=options['polizas'],
+            movimientos_por_poliza=options['movimientos_por_poliza'],
+            plantilla=options['plantilla'],
+            centros=options['centros'],
+            proyectos=options['proyectos'],
+            cfdis=options['cfdis'],
+            meses=options['meses'],
+            semilla=options['semilla'],
+            progreso=progreso
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Empresa sintética {empresa.nombre} (id {empresa.id}, usuario {resumen['usuario']}): "
+            f"{resumen['polizas']} pólizas, {resumen['movimientos']} movimientos, "
+            f"{resumen['cfdis']} CFDIs"
+        ))
@@ -0,0 +1,188 @@
+"""
+Métricas para Prometheus
+prometheus_client es opcional y se importa hasta el primer uso: sin la
+librería, o con METRICAS_HABILITADAS en False, las funciones de registro no
+hacen nada y el endpoint responde 503.
+Con la variable de entorno PROMETHEUS_MULTIPROC_DIR cada proceso (workers de
+gunicorn y de Celery) escribe sus valores en ese directorio y el endpoint
+agrega todos los procesos
+"""
+import os
+import time
+from contextlib import contextmanager
+from django.conf import settings
+
+# Buckets en segundos para la generación de reportes y tareas largas
+BUCKETS_LARGOS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+_metricas = None
+
+# Se recuerda que la librería falta para no reintentar el import en cada petición
+_sin_libreria = False
+
+
+def prometheus():
+    """Módulo prometheus_client, o None si no está instalado o las métricas están deshabilitadas"""
+    global _sin_libreria
+    if _sin_libreria or not getattr(settings, 'METRICAS_HABILITADAS', True):
+        return None
+    try:
+        import prometheus_client
+    except ImportError:
+        _sin_libreria = True
+        return None
+    return prometheus_client
+
+
+def _obtener_metricas():
+    """Crea las métricas una sola vez por proceso"""
+    global _metricas
+    if _metricas is None:
+        prom = prometheus()
+        if prom is None:
+            return None
+        _metricas = {
+            'peticion_duracion': prom.Histogram(
+                'ziva_http_peticion_duracion_segundos',
+                'Latencia de las peticiones por ruta',
+                ['metodo', 'ruta', 'status']
+            ),
+            'reporte_duracion': prom.Histogram(
+                'ziva_reporte_generacion_segundos',
+                'Duración de la generación de reportes',
+                ['reporte', 'formato'],
+                buckets=BUCKETS_LARGOS
+            ),
+            'reportes_cache': prom.Counter(
+                'ziva_reportes_cache_consultas',
+                'Consultas a la caché de reportes por resultado (acierto o fallo)',
+                ['resultado']
+            ),
+            'cfdi_archivos': prom.Counter(
+                'ziva_cfdi_archivos_procesados',
+                'XML de CFDI procesados en descargas masivas'
+            ),
+            'cfdi_errores': prom.Counter(
+                'ziva_cfdi_errores_parseo',
+                'XML de CFDI que no se pudieron interpretar'
+            ),
+            'cfdi_espera_cola': prom.Histogram(
+                'ziva_cfdi_descarga_espera_cola_segundos',
+                'Tiempo entre la creación de la descarga masiva y el inicio de su tarea',
+                buckets=BUCKETS_LARGOS
+            ),
+            'cfdi_procesamiento': prom.Histogram(
+                'ziva_cfdi_descarga_procesamiento_segundos',
+                'Duración del procesamiento de los archivos de una descarga masiva',
+                buckets=BUCKETS_LARGOS
+            ),
+            'tareas': prom.Counter(
+                'ziva_celery_tareas',
+                'Tareas de Celery terminadas por estado',
+                ['tarea', 'estado']
+            ),
+            'tarea_duracion': prom.Histogram(
+                'ziva_celery_tarea_duracion_segundos',
+                'Duración de las tareas de Celery',
+                ['tarea'],
+                buckets=BUCKETS_LARGOS
+            ),
+        }
+    return _metricas
+
+
+def metricas_activas():
+    """True si hay dónde registrar métricas"""
+    return _obtener_metricas() is not None
+
+
+def observar_peticion(metodo, ruta, status, segundos):
+    metricas = _obtener_metricas()
+    if metricas:
+        metricas['peticion_duracion'].labels(metodo, ruta, str(status)).observe(segundos)
+
+
+@contextmanager
+def medir_reporte(reporte, formato):
+    """Mide la generación de un reporte; en respuestas streaming solo cubre su preparación"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas = _obtener_metricas()
+        if metricas:
+            metricas['reporte_duracion'].labels(reporte, formato).observe(time.perf_counter() - inicio)
+
+
+def contar_cache_reportes(acierto):
+    metricas = _obtener_metricas()
+    if metricas:
+        metricas['reportes_cache'].labels('acierto' if acierto else 'fallo').inc()
+
+
+def contar_cfdi_procesado():
+    metricas = _obtener_metricas()
+    if metricas:
+        metricas['cfdi_archivos'].inc()
+
+
+def contar_error_parseo_cfdi():
+    metricas = _obtener_metricas()
+    if metricas:
+        metricas['cfdi_errores'].inc()
+
+
+def observar_espera_cola_cfdi(segundos):
+    metricas = _obtener_metricas()
+    if metricas:
+        metricas['cfdi_espera_cola'].observe(max(segundos, 0))
+
+
+def observar_procesamiento_cfdi(segundos):
+    metricas = _obtener_metricas()
+    if metricas:
+        metricas['cfdi_procesamiento'].observe(segundos)
+
+
+# Inicio de cada tarea de Celery en ejecución, por task_id
+_inicio_tareas = {}
+
+
+def _tarea_iniciada(task_id=None, **kwargs):
+    _inicio_tareas[task_id] = time.perf_counter()
+
+
+def _tarea_terminada(task_id=None, task=None, state=None, **kwargs):
+    inicio = _inicio_tareas.pop(task_id, None)
+    metricas = _obtener_metricas()
+    if metricas and task is not None:
+        metricas['tareas'].labels(task.name, state or 'DESCONOCIDO').inc()
+        if inicio is not None:
+            metricas['tarea_duracion'].labels(task.name).observe(time.perf_counter() - inicio)
+
+
+def conectar_senales_celery():
+    """Registra duración y estado final de todas las tareas de Celery"""
+    if not metricas_activas():
+        return
+    from celery.signals import task_prerun, task_postrun
+    task_prerun.connect(_tarea_iniciada, weak=False)
+    task_postrun.connect(_tarea_terminada, weak=False)
+
+
+def exposicion():
+    """
+    (contenido, content_type) en formato de exposición de texto, o None si
+    prometheus_client no está disponible
+    """
+    prom = prometheus()
+    if prom is None:
+        return None
+    _obtener_metricas()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registro = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = prom.REGISTRY
+    return prom.generate_latest(registro), prom.CONTENT_TYPE_LATEST
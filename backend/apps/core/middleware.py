@@ -0,0 +1,81 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .metricas import metricas_activas, observar_peticion
+from .perfilado import RegistroConsultas, acumular_perfil, configuracion_perfilado
+
+logger = logging.getLogger('apps.core.perfilado')
+
+
+def nombre_ruta(request):
+    """Nombre de la vista resuelta (las rutas de DRF por basename y acción)"""
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match.route) if match else 'sin_ruta'
+
+
+def ruta_peticion(request):
+    """Método y nombre de la vista, para agrupar peticiones de la misma ruta"""
+    return f'{request.method} {nombre_ruta(request)}'
+
+
+class PerfiladoSQLMiddleware:
+    """
+    Middleware opcional de perfilado SQL por petición
+    Con PERFILADO_SQL['MUESTREO'] en 0 se descarta al arrancar y no agrega
+    costo; con muestreo, las peticiones elegidas registran sus consultas, se
+    acumulan por ruta y las que rebasan el umbral van al log de peticiones lentas
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        configuracion = configuracion_perfilado()
+        self.muestreo = configuracion['MUESTREO']
+        self.umbral_ms = configuracion['UMBRAL_LENTO_MS']
+        self.limite_lentas = configuracion['CONSULTAS_LENTAS']
+        if self.muestreo <= 0:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if self.muestreo < 1 and random.random() >= self.muestreo:
+            return self.get_response(request)
+
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        perfil = registro.perfil(self.limite_lentas)
+        perfil.update({
+            'ruta': ruta_peticion(request),
+            'path': request.path,
+            'status': response.status_code,
+            'duracion_ms': round(duracion_ms, 2),
+        })
+        lenta = duracion_ms >= self.umbral_ms
+        acumular_perfil(perfil['ruta'], perfil, lenta)
+        if lenta:
+            logger.warning(json.dumps(perfil, ensure_ascii=False))
+        return response
+
+
+class MetricasMiddleware:
+    """
+    Latencia de cada petición por ruta para Prometheus
+    Se descarta al arrancar si prometheus_client no está instalado
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not metricas_activas():
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        observar_peticion(request.method, nombre_ruta(request), response.status_code, time.perf_counter() - inicio)
+        return response
@@ -0,0 +1,80 @@
+"""
+Paginación keyset para listados grandes
+A diferencia de PageNumberPagination no usa OFFSET ni COUNT: cada página se
+pide con el cursor de la última fila de la anterior, así que cuesta lo mismo
+a cualquier profundidad. El orden es fijo (el de `campos`, que debe ser único)
+"""
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .utils import codificar_cursor, decodificar_cursor, filtro_posterior
+
+
+class PaginacionCursor(BasePagination):
+    """Paginación por cursor sobre `campos`; solo avanza hacia adelante"""
+    campos = ('id',)
+    descendente = True
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(tamano, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamano = self.get_page_size(request)
+        orden = [f'-{campo}' if self.descendente else campo for campo in self.campos]
+        queryset = queryset.order_by(*orden)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            # Los valores se convierten con los campos del modelo al filtrar;
+            # un cursor alterado (p. ej. una fecha que no lo es) falla aquí
+            try:
+                valores = decodificar_cursor(cursor, len(self.campos))
+                queryset = queryset.filter(filtro_posterior(self.campos, valores, self.descendente))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound('Cursor inválido')
+
+        # Una fila de más indica si hay página siguiente
+        filas = list(queryset[:tamano + 1])
+        self.siguiente = None
+        if len(filas) > tamano:
+            filas = filas[:tamano]
+            ultima = filas[-1]
+            self.siguiente = codificar_cursor(*(getattr(ultima, campo) for campo in self.campos))
+        return filas
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.siguiente)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
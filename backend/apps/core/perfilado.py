@@ -0,0 +1,150 @@
+"""
+Perfilado SQL por petición
+Registra las consultas de una petición (conteo, tiempo total, más lentas y
+repetidas por huella) y acumula estadísticas por ruta en la caché compartida,
+de modo que se agregan entre los procesos de gunicorn
+"""
+import hashlib
+import re
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+
+PERFILADO_SQL_DEFAULTS = {
+    'MUESTREO': 0.0,            # Fracción de peticiones perfiladas; 0 desactiva el middleware
+    'UMBRAL_LENTO_MS': 1000,    # Peticiones a partir de esta duración van al log de lentas
+    'CONSULTAS_LENTAS': 5,      # Consultas más lentas incluidas en cada perfil
+    'ESTADISTICAS_TIMEOUT': 60 * 60 * 24 * 7,
+}
+
+CLAVE_RUTAS = 'perfilado_sql:rutas'
+
+# Contadores enteros por ruta; los tiempos se acumulan en microsegundos
+CAMPOS_CONTADOR = ('peticiones', 'consultas', 'tiempo_sql_us', 'duracion_us', 'consultas_duplicadas', 'lentas')
+CAMPOS_RUTA = CAMPOS_CONTADOR + ('max_consultas',)
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def configuracion_perfilado():
+    """Configuración PERFILADO_SQL del proyecto sobre los valores por defecto"""
+    return {**PERFILADO_SQL_DEFAULTS, **getattr(settings, 'PERFILADO_SQL', {})}
+
+
+def huella_sql(sql):
+    """
+    Huella de una consulta: literales y listas IN colapsados, de modo que la
+    misma consulta con distintos parámetros (un N+1) comparte huella
+    """
+    sql = _LITERALES.sub('?', sql)
+    sql = _LISTAS.sub('(...)', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+class RegistroConsultas:
+    """Envoltura de ejecución (connection.execute_wrapper) que mide cada consulta"""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, time.perf_counter() - inicio))
+
+    def perfil(self, limite_lentas):
+        """Conteo, tiempo total, consultas más lentas y consultas repetidas"""
+        huellas = Counter(huella_sql(sql) for sql, _duracion in self.consultas)
+        duplicadas = [(huella, veces) for huella, veces in huellas.most_common() if veces > 1]
+        lentas = sorted(self.consultas, key=lambda consulta: consulta[1], reverse=True)[:limite_lentas]
+        return {
+            'consultas': len(self.consultas),
+            'tiempo_sql_ms': round(sum(duracion for _sql, duracion in self.consultas) * 1000, 2),
+            'consultas_lentas': [
+                {'sql': sql, 'ms': round(duracion * 1000, 2)} for sql, duracion in lentas
+            ],
+            'consultas_duplicadas': [
+                {'sql': huella, 'veces': veces} for huella, veces in duplicadas
+            ],
+        }
+
+
+def _clave_ruta(ruta, campo):
+    # La ruta puede llevar espacios y caracteres no válidos en claves de caché
+    return f'perfilado_sql:ruta:{hashlib.md5(ruta.encode()).hexdigest()}:{campo}'
+
+
+def _sumar(clave, valor, timeout):
+    if not cache.add(clave, valor, timeout):
+        try:
+            cache.incr(clave, valor)
+        except ValueError:
+            cache.add(clave, valor, timeout)
+
+
+def acumular_perfil(ruta, perfil, lenta):
+    """Suma el perfil de una petición a las estadísticas de su ruta"""
+    timeout = configuracion_perfilado()['ESTADISTICAS_TIMEOUT']
+
+    # El índice de rutas se actualiza con lectura y escritura; en una carrera
+    # solo se pierde el alta de una ruta nueva, que se repite en su siguiente muestra
+    rutas = cache.get(CLAVE_RUTAS) or []
+    if ruta not in rutas:
+        cache.set(CLAVE_RUTAS, rutas + [ruta], timeout)
+
+    valores = {
+        'peticiones': 1,
+        'consultas': perfil['consultas'],
+        'tiempo_sql_us': int(perfil['tiempo_sql_ms'] * 1000),
+        'duracion_us': int(perfil['duracion_ms'] * 1000),
+        'consultas_duplicadas': sum(d['veces'] - 1 for d in perfil['consultas_duplicadas']),
+        'lentas': int(lenta),
+    }
+    for campo, valor in valores.items():
+        if valor:
+            _sumar(_clave_ruta(ruta, campo), valor, timeout)
+
+    clave_maximo = _clave_ruta(ruta, 'max_consultas')
+    if perfil['consultas'] > (cache.get(clave_maximo) or 0):
+        cache.set(clave_maximo, perfil['consultas'], timeout)
+
+
+def estadisticas_rutas():
+    """Estadísticas acumuladas por ruta, de mayor a menor tiempo SQL total"""
+    rutas = cache.get(CLAVE_RUTAS) or []
+    claves = [_clave_ruta(ruta, campo) for ruta in rutas for campo in CAMPOS_RUTA]
+    valores = cache.get_many(claves)
+
+    resultado = []
+    for ruta in rutas:
+        datos = {campo: valores.get(_clave_ruta(ruta, campo), 0) for campo in CAMPOS_RUTA}
+        peticiones = datos['peticiones']
+        if not peticiones:
+            continue
+        resultado.append({
+            'ruta': ruta,
+            'peticiones': peticiones,
+            'consultas_promedio': round(datos['consultas'] / peticiones, 2),
+            'max_consultas': datos['max_consultas'],
+            'tiempo_sql_total_ms': round(datos['tiempo_sql_us'] / 1000, 2),
+            'tiempo_sql_promedio_ms': round(datos['tiempo_sql_us'] / 1000 / peticiones, 2),
+            'duracion_promedio_ms': round(datos['duracion_us'] / 1000 / peticiones, 2),
+            'consultas_duplicadas': datos['consultas_duplicadas'],
+            'peticiones_lentas': datos['lentas'],
+        })
+    resultado.sort(key=lambda fila: fila['tiempo_sql_total_ms'], reverse=True)
+    return resultado
+
+
+def reiniciar_estadisticas():
+    """Descarta las estadísticas acumuladas de todas las rutas"""
+    rutas = cache.get(CLAVE_RUTAS) or []
+    cache.delete_many(
+        [_clave_ruta(ruta, campo) for ruta in rutas for campo in CAMPOS_RUTA]
+        + [CLAVE_RUTAS]
+    )
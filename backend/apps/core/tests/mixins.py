@@ -0,0 +1,88 @@
+from datetime import date
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from apps.empresas.models import Empresa, UsuarioEmpresa
+from apps.catalogo_cuentas.models import CuentaContable
+from apps.transacciones.models import TransaccionContable, MovimientoContable
+
+User = get_user_model()
+
+
+class ContabilidadPruebaMixin:
+    """
+    Datos base de los tests contables: usuario contador, empresa con acceso,
+    cliente de API autenticado y las cuentas de `cuentas` como atributos
+    """
+    # atributo -> (código, nombre, tipo, naturaleza)
+    cuentas = {
+        'banco': ('1.1', 'BANCOS', 'ACTIVO', 'DEUDORA'),
+        'ventas': ('4.1', 'VENTAS', 'INGRESO', 'ACREEDORA'),
+    }
+    # Formato del folio consecutivo de crear_poliza
+    formato_folio = '{}'
+
+    def setUp(self):
+        """Configuración inicial para las pruebas"""
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user(username='contador', password='testpass123')
+        self.empresa = Empresa.objects.create(
+            nombre='Empresa Prueba',
+            rfc='EPR010101AAA',
+            creado_por=self.user
+        )
+        UsuarioEmpresa.objects.create(
+            usuario=self.user,
+            empresa=self.empresa,
+            rol='CONTADOR',
+            creado_por=self.user
+        )
+        for atributo, datos in self.cuentas.items():
+            setattr(self, atributo, self.crear_cuenta(*datos))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.folio = 0
+
+    def crear_cuenta(self, codigo, nombre, tipo, naturaleza, cuenta_padre=None, **campos):
+        return CuentaContable.objects.create(
+            empresa=campos.pop('empresa', self.empresa),
+            codigo=codigo,
+            nombre=nombre,
+            cuenta_padre=cuenta_padre,
+            nivel=cuenta_padre.nivel + 1 if cuenta_padre else 1,
+            tipo=tipo,
+            naturaleza=naturaleza,
+            creado_por=self.user,
+            **campos
+        )
+
+    def crear_poliza(self, cargo, abono, importe, fecha=date(2024, 3, 1), folio=None,
+                     concepto='Póliza', contabilizar=True, importe_abono=None, **campos):
+        """
+        Póliza de un cargo por `importe` y un abono por `importe_abono` (el
+        mismo importe si no se indica); la valida y contabiliza salvo
+        contabilizar=False. Sin folio usa el siguiente consecutivo
+        """
+        if folio is None:
+            self.folio += 1
+            folio = self.formato_folio.format(self.folio)
+        transaccion = TransaccionContable.objects.create(
+            empresa=self.empresa,
+            folio=folio,
+            fecha=fecha,
+            concepto=concepto,
+            creado_por=self.user,
+            **campos
+        )
+        MovimientoContable.objects.create(
+            transaccion=transaccion, cuenta=cargo, debe=importe, creado_por=self.user
+        )
+        MovimientoContable.objects.create(
+            transaccion=transaccion, cuenta=abono, haber=importe_abono or importe, creado_por=self.user
+        )
+        if contabilizar:
+            transaccion.validar()
+            with self.captureOnCommitCallbacks(execute=True):
+                transaccion.contabilizar()
+        return transaccion
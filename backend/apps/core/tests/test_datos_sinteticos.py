@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from apps.core.datos_sinteticos import eliminar_empresa_sintetica, generar_empresa_sintetica
+from apps.empresas.models import Empresa
+from apps.sat_integration.models import CFDI
+from apps.transacciones.models import MovimientoContable, SaldoPeriodo
+
+
+class DatosSinteticosTest(TestCase):
+    """Tests para el generador de empresas sintéticas y el benchmark de reportes"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generar_empresa(self):
+        """Test que las pólizas generadas estén balanceadas y con saldos por periodo"""
+        empresa, resumen = generar_empresa_sintetica(polizas=30, movimientos_por_poliza=4, cfdis=10, semilla=1)
+
+        movimientos = MovimientoContable.objects.filter(transaccion__empresa=empresa)
+        self.assertEqual(resumen['movimientos'], 120)
+        self.assertEqual(movimientos.count(), 120)
+        totales = movimientos.aggregate(debe=Sum('debe'), haber=Sum('haber'))
+        self.assertEqual(totales['debe'], totales['haber'])
+        self.assertTrue(SaldoPeriodo.objects.filter(empresa=empresa).exists())
+        self.assertEqual(CFDI.objects.filter(empresa=empresa).count(), 10)
+
+        eliminar_empresa_sintetica(empresa)
+        self.assertFalse(Empresa.objects.filter(id=empresa.id).exists())
+        self.assertFalse(MovimientoContable.objects.filter(transaccion__empresa_id=empresa.id).exists())
+
+    def test_benchmark_reportes(self):
+        """Test que el benchmark guarde consultas y latencia por endpoint y compare contra la línea base"""
+        directorio = tempfile.mkdtemp()
+        salida = os.path.join(directorio, 'benchmark.json')
+
+        call_command('benchmark_reportes', tamanos='20', repeticiones=1, salida=salida, stdout=open(os.devnull, 'w'))
+
+        with open(salida) as archivo:
+            resultado = json.load(archivo)
+        casos = resultado['resultados']['20']
+        self.assertIn('balanza_comprobacion', casos)
+        self.assertIn('dashboard', casos)
+        self.assertGreater(casos['libro_mayor']['consultas'], 0)
+        self.assertFalse(Empresa.objects.filter(rfc__startswith='SIN').exists())
+
+        # Contra sí mismo y con tolerancia amplia no hay regresiones
+        call_command(
+            'benchmark_reportes', tamanos='20', repeticiones=1, salida=salida + '.2',
+            comparar=salida, tolerancia=100, stdout=open(os.devnull, 'w')
+        )
@@ -0,0 +1,50 @@
+import importlib.util
+from unittest import skipIf, skipUnless
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from apps.core.metricas import contar_cache_reportes, medir_reporte, metricas_activas
+from apps.empresas.models import Empresa, UsuarioEmpresa
+
+User = get_user_model()
+
+PROMETHEUS_INSTALADO = importlib.util.find_spec('prometheus_client') is not None
+
+
+class MetricasTest(TestCase):
+    """Tests para el endpoint de métricas de Prometheus"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='contador', password='testpass123')
+        self.empresa = Empresa.objects.create(nombre='Empresa Prueba', rfc='EPR010101AAA', creado_por=self.user)
+        UsuarioEmpresa.objects.create(usuario=self.user, empresa=self.empresa, rol='CONTADOR', creado_por=self.user)
+        self.client = APIClient()
+
+    def test_solo_ips_permitidas(self):
+        """Test que el endpoint rechace peticiones fuera de METRICAS_IPS_PERMITIDAS"""
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 403)
+
+    @skipIf(PROMETHEUS_INSTALADO, 'prometheus_client está instalado')
+    def test_sin_prometheus(self):
+        """Test que sin prometheus_client el registro no falle y el endpoint responda 503"""
+        self.assertFalse(metricas_activas())
+        with medir_reporte('balanza_comprobacion', 'json'):
+            contar_cache_reportes(acierto=True)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 503)
+
+    @skipUnless(PROMETHEUS_INSTALADO, 'prometheus_client no está instalado')
+    def test_exposicion(self):
+        """Test que las latencias por ruta y la caché de reportes aparezcan en la exposición"""
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/reportes/reportes/balanza_comprobacion/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        contenido = response.content.decode()
+        self.assertIn('ziva_reporte_generacion_segundos', contenido)
+        self.assertIn('ziva_reportes_cache_consultas_total{resultado="fallo"}', contenido)
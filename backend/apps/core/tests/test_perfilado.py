@@ -0,0 +1,81 @@
+import json
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from rest_framework.test import APIClient
+from apps.core.perfilado import RegistroConsultas, huella_sql
+from apps.empresas.models import Empresa, UsuarioEmpresa
+
+User = get_user_model()
+
+
+class PerfiladoSQLTest(TestCase):
+    """Tests para el middleware de perfilado SQL y sus estadísticas por ruta"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='contador', password='testpass123')
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.empresa = Empresa.objects.create(nombre='Empresa Prueba', rfc='EPR010101AAA', creado_por=self.user)
+        UsuarioEmpresa.objects.create(usuario=self.user, empresa=self.empresa, rol='CONTADOR', creado_por=self.user)
+        self.client = APIClient()
+
+    def test_huella_y_duplicadas(self):
+        """Test que la misma consulta con distintos parámetros comparta huella"""
+        self.assertEqual(
+            huella_sql("SELECT * FROM t WHERE id = 15 AND rfc = 'ABC'"),
+            huella_sql("SELECT *  FROM t WHERE id = 7 AND rfc = 'XYZ'")
+        )
+        self.assertEqual(
+            huella_sql('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            huella_sql('SELECT * FROM t WHERE id IN (%s, %s)')
+        )
+
+        registro = RegistroConsultas()
+        with connection.execute_wrapper(registro):
+            for usuario_id in (self.user.id, self.admin.id, self.user.id):
+                list(User.objects.filter(id=usuario_id))
+        perfil = registro.perfil(limite_lentas=2)
+        self.assertEqual(perfil['consultas'], 3)
+        self.assertEqual(len(perfil['consultas_lentas']), 2)
+        self.assertEqual(len(perfil['consultas_duplicadas']), 1)
+        self.assertEqual(perfil['consultas_duplicadas'][0]['veces'], 3)
+
+    @override_settings(PERFILADO_SQL={'MUESTREO': 1, 'UMBRAL_LENTO_MS': 0})
+    def test_estadisticas_por_ruta(self):
+        """Test que las peticiones perfiladas se registren en el log de lentas y por ruta"""
+        self.client.force_login(self.user)
+        with self.assertLogs('apps.core.perfilado', level='WARNING') as logs:
+            response = self.client.get('/api/catalogo/cuentas/arbol/')
+        self.assertEqual(response.status_code, 200)
+
+        perfil = json.loads(logs.records[0].getMessage())
+        self.assertEqual(perfil['path'], '/api/catalogo/cuentas/arbol/')
+        self.assertGreater(perfil['consultas'], 0)
+
+        # Solo administradores consultan las estadísticas
+        response = self.client.get('/api/core/perfilado-sql/')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/core/perfilado-sql/')
+        self.assertEqual(response.status_code, 200)
+        rutas = {fila['ruta']: fila for fila in response.data['rutas']}
+        self.assertEqual(rutas[perfil['ruta']]['peticiones'], 1)
+        self.assertEqual(rutas[perfil['ruta']]['max_consultas'], perfil['consultas'])
+
+        response = self.client.delete('/api/core/perfilado-sql/')
+        self.assertEqual(response.status_code, 204)
+        response = self.client.get('/api/core/perfilado-sql/')
+        self.assertNotIn(perfil['ruta'], [fila['ruta'] for fila in response.data['rutas']])
+
+    def test_desactivado_sin_muestreo(self):
+        """Test que sin muestreo el middleware no registre peticiones"""
+        self.client.force_login(self.user)
+        self.client.get('/api/catalogo/cuentas/arbol/')
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/core/perfilado-sql/')
+        self.assertEqual(response.data['rutas'], [])
+        self.assertEqual(response.data['muestreo'], 0)
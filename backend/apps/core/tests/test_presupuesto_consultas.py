@@ -0,0 +1,104 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.catalogo_cuentas.models import CuentaContable
+from apps.core.datos_sinteticos import generar_empresa_sintetica
+from apps.empresas.models import UsuarioEmpresa
+from apps.core.management.commands.benchmark_reportes import casos_benchmark
+from apps.reportes.cache import purgar_reportes
+
+# Máximo de consultas SQL por endpoint, incluidas las de sesión y empresa del
+# middleware. El número no debe depender del volumen de datos: un N+1 nuevo
+# rebasa el presupuesto o crece entre los dos fixtures
+PRESUPUESTO_CONSULTAS = {
+    'balanza_comprobacion': 9,
+    'balanza_por_nivel': 9,
+    'estado_resultados': 8,
+    'estado_resultados_mensual': 7,
+    'balance_general': 8,
+    'libro_diario': 9,
+    'libro_mayor': 11,
+    'flujo_efectivo': 11,
+    'chart_ingresos_gastos': 7,
+    'chart_balance_cuentas': 8,
+    'dashboard': 16,
+    'lista_transacciones': 8,
+    'arbol_cuentas': 7,
+    'centros_jerarquicos': 7,
+    'resumen_cfdi': 7,
+}
+
+
+def casos_presupuesto(resumen, cuenta_id):
+    """Reportes medidos por el benchmark más catálogo, centros de costo y CFDI"""
+    return casos_benchmark(resumen, cuenta_id) + [
+        ('arbol_cuentas', '/api/catalogo/cuentas/arbol/', {}),
+        ('centros_jerarquicos', '/api/centros-costo/centros/jerarquicos/', {}),
+        ('resumen_cfdi', '/api/sat/api/cfdi/summary/', {}),
+    ]
+
+
+class PresupuestoConsultasTest(TestCase):
+    """Tests de presupuesto de consultas SQL por endpoint con datos chicos y grandes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.chica = cls._fixture(polizas=5, centros=4, cfdis=3, subcuentas=2)
+        cls.grande = cls._fixture(polizas=120, centros=30, cfdis=40, subcuentas=25)
+
+    @classmethod
+    def _fixture(cls, polizas, centros, cfdis, subcuentas):
+        empresa, resumen = generar_empresa_sintetica(
+            polizas=polizas, movimientos_por_poliza=4, centros=centros, cfdis=cfdis, meses=3, semilla=7
+        )
+        usuario = UsuarioEmpresa.objects.get(empresa=empresa).usuario
+
+        # Subcuentas en dos niveles para que el árbol del catálogo tenga profundidad
+        padre = CuentaContable.objects.filter(empresa=empresa).order_by('codigo').first()
+        for i in range(subcuentas):
+            subcuenta = CuentaContable.objects.create(
+                empresa=empresa, codigo=f'{padre.codigo}.{i + 1:02d}', nombre=f'Subcuenta {i + 1}',
+                tipo=padre.tipo, naturaleza=padre.naturaleza, nivel=padre.nivel + 1,
+                cuenta_padre=padre, creado_por=usuario
+            )
+            CuentaContable.objects.create(
+                empresa=empresa, codigo=f'{subcuenta.codigo}.01', nombre=f'Auxiliar {i + 1}',
+                tipo=padre.tipo, naturaleza=padre.naturaleza, nivel=padre.nivel + 2,
+                cuenta_padre=subcuenta, creado_por=usuario
+            )
+        return empresa, usuario, resumen, padre.id
+
+    def setUp(self):
+        cache.clear()
+
+    def _consultas(self, fixture):
+        """Consultas de cada endpoint para un fixture, sin caché de reportes"""
+        empresa, usuario, resumen, cuenta_id = fixture
+        self.client.force_login(usuario)
+        sesion = self.client.session
+        sesion['empresa_id'] = empresa.id
+        sesion.save()
+
+        consultas = {}
+        for nombre, url, params in casos_presupuesto(resumen, cuenta_id):
+            purgar_reportes(empresa)
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, f'{nombre}: {response.status_code}')
+            consultas[nombre] = len(capturadas.captured_queries)
+        return consultas
+
+    def test_presupuesto_por_endpoint(self):
+        """Test que cada endpoint respete su presupuesto y no crezca con el volumen de datos"""
+        chica = self._consultas(self.chica)
+        grande = self._consultas(self.grande)
+
+        self.assertEqual(set(grande), set(PRESUPUESTO_CONSULTAS))
+        for nombre, presupuesto in PRESUPUESTO_CONSULTAS.items():
+            with self.subTest(endpoint=nombre):
+                self.assertLessEqual(grande[nombre], presupuesto)
+                self.assertLessEqual(
+                    grande[nombre], chica[nombre],
+                    f'{nombre}: {chica[nombre]} consultas con datos chicos y {grande[nombre]} con datos grandes'
+                )
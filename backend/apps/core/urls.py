@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import buscar_usuario
+from .views import buscar_usuario, perfilado_sql
 
 urlpatterns = [
     path('buscar-usuario/', buscar_usuario, name='buscar-usuario'),
+    path('perfilado-sql/', perfilado_sql, name='perfilado-sql'),
 ]
@@ -1,6 +1,9 @@
+import base64
 import decimal
+import json
 from datetime import datetime
 from django.db import transaction
+from django.db.models import Q
 
 def validar_cuadratura(debe_total, haber_total, tolerancia=0.01):
     """
@@ -94,4 +97,40 @@ def validar_periodo_contable(periodo):
     """
     Valida que el periodo esté entre 1 y 12
     """
-    return 1 <= periodo <= 12
\ No newline at end of file
+    return 1 <= periodo <= 12
+
+def codificar_cursor(*valores):
+    """
+    Codifica los valores de orden de la última fila de una página en un cursor opaco
+    Usado para paginación keyset (p. ej. fecha, folio, id)
+    """
+    texto = json.dumps([str(valor) for valor in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+def decodificar_cursor(cursor, num_valores):
+    """
+    Decodifica un cursor generado con codificar_cursor
+    Lanza ValueError si el cursor no es válido
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except ValueError:
+        raise ValueError('Cursor inválido')
+    if not isinstance(valores, list) or len(valores) != num_valores:
+        raise ValueError('Cursor inválido')
+    return valores
+
+def filtro_posterior(campos, valores, descendente=False):
+    """
+    Construye el filtro Q de las filas posteriores a `valores` en el orden
+    ascendente (o descendente) de `campos` (comparación de tuplas para
+    paginación keyset)
+    """
+    comparacion = 'lt' if descendente else 'gt'
+    filtro = Q()
+    for posicion, campo in enumerate(campos):
+        condicion = Q(**{f'{campo}__{comparacion}': valores[posicion]})
+        for anterior, valor in zip(campos[:posicion], valores[:posicion]):
+            condicion &= Q(**{anterior: valor})
+        filtro |= condicion
+    return filtro
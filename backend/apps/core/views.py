@@ -1,13 +1,14 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout as auth_logout
-from django.db.models import Sum, Q
+from django.db.models import Q
 from decimal import Decimal
 from datetime import date, datetime, timedelta
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from apps.transacciones.models import TransaccionContable, MovimientoContable
+from apps.transacciones.models import TransaccionContable
+from apps.transacciones.saldos import calcular_saldos
 from apps.catalogo_cuentas.models import CuentaContable
 from apps.empresas.models import Empresa, UsuarioEmpresa
 from django.contrib.auth.models import User
@@ -227,40 +228,34 @@ def get_empresa_actual(request):
 
 def calcular_estadisticas_mes(empresa, fecha_inicio, fecha_fin):
     """Calcula las estadísticas del mes"""
-    # Filtro base
-    filtro = Q(
-        transaccion__empresa=empresa,
-        transaccion__estado='CONTABILIZADA',
-        transaccion__fecha__gte=fecha_inicio,
-        transaccion__fecha__lte=fecha_fin,
-        activo=True
+    # Saldos del período de cuentas de resultados
+    saldos_mes = calcular_saldos(
+        empresa,
+        fecha_fin=fecha_fin,
+        fecha_inicio=fecha_inicio,
+        tipos=['INGRESO', 'GASTO', 'COSTO']
     )
     
     # Calcular ingresos
-    ingresos = MovimientoContable.objects.filter(
-        filtro,
-        cuenta__tipo='INGRESO'
-    ).aggregate(
-        total=Sum('haber') - Sum('debe')
-    )['total'] or Decimal('0.00')
+    ingresos = sum(
+        (s['abonos'] - s['cargos'] for s in saldos_mes if s['tipo'] == 'INGRESO'),
+        Decimal('0.00')
+    )
     
     # Calcular gastos
-    gastos = MovimientoContable.objects.filter(
-        filtro,
-        cuenta__tipo__in=['GASTO', 'COSTO']
-    ).aggregate(
-        total=Sum('debe') - Sum('haber')
-    )['total'] or Decimal('0.00')
+    gastos = sum(
+        (s['cargos'] - s['abonos'] for s in saldos_mes if s['tipo'] in ['GASTO', 'COSTO']),
+        Decimal('0.00')
+    )
     
     # Saldo en caja
-    caja = MovimientoContable.objects.filter(
-        transaccion__empresa=empresa,
-        transaccion__estado='CONTABILIZADA',
-        cuenta__codigo='1.1.1',  # Asumiendo que 1.1.1 es CAJA
-        activo=True
-    ).aggregate(
-        total=Sum('debe') - Sum('haber')
-    )['total'] or Decimal('0.00')
+    caja = sum(
+        (s['cargos'] - s['abonos'] for s in calcular_saldos(
+            empresa,
+            cuentas=CuentaContable.objects.filter(empresa=empresa, codigo='1.1.1')  # Asumiendo que 1.1.1 es CAJA
+        )),
+        Decimal('0.00')
+    )
     
     return {
         'ingresos': float(ingresos),
@@ -487,6 +482,41 @@ def buscar_usuario(request):
         return Response({'error': 'Usuario no encontrado'}, status=404)
 
 
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def perfilado_sql(request):
+    """Estadísticas de consultas SQL por ruta del middleware de perfilado; DELETE las reinicia"""
+    from .perfilado import configuracion_perfilado, estadisticas_rutas, reiniciar_estadisticas
+
+    if request.method == 'DELETE':
+        reiniciar_estadisticas()
+        return Response(status=204)
+
+    configuracion = configuracion_perfilado()
+    return Response({
+        'muestreo': configuracion['MUESTREO'],
+        'umbral_lento_ms': configuracion['UMBRAL_LENTO_MS'],
+        'rutas': estadisticas_rutas(),
+    })
+
+
+def metricas(request):
+    """Métricas en formato de exposición de texto de Prometheus, solo para IPs permitidas"""
+    from django.conf import settings
+    from django.http import HttpResponse
+    from .metricas import exposicion
+
+    if request.META.get('REMOTE_ADDR') not in settings.METRICAS_IPS_PERMITIDAS:
+        return HttpResponse('Acceso no permitido', status=403, content_type='text/plain')
+
+    resultado = exposicion()
+    if resultado is None:
+        return HttpResponse('Métricas no disponibles: prometheus_client no está instalado',
+                            status=503, content_type='text/plain')
+    contenido, content_type = resultado
+    return HttpResponse(contenido, content_type=content_type)
+
+
 @login_required 
 def configuracion_transacciones_get(request, tipo_id):
     """API endpoint para obtener datos de un tipo de transacción"""
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_auto_20250824_1016'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='version_contable',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión contable'),
+        ),
+    ]
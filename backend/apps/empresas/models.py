@@ -35,6 +35,13 @@ class Empresa(BaseModel):
         verbose_name='Límite de usuarios'
     )
     
+    # Versión del libro contable: cambia con cada afectación a transacciones contabilizadas
+    version_contable = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Versión contable'
+    )
+    
     class Meta:
         verbose_name = 'Empresa'
         verbose_name_plural = 'Empresas'
@@ -42,6 +49,13 @@ class Empresa(BaseModel):
         
     def __str__(self):
         return f"{self.nombre} ({self.rfc})"
+    
+    @classmethod
+    def incrementar_version_contable(cls, empresa_id):
+        """Incrementa la versión del libro contable (invalida los reportes en caché)"""
+        cls.objects.filter(pk=empresa_id).update(
+            version_contable=models.F('version_contable') + 1
+        )
 
 
 class UsuarioEmpresa(BaseModel):
@@ -0,0 +1,167 @@
+"""
+Caché de resultados de reportes versionada por el libro contable
+La clave combina empresa, reporte, parámetros normalizados, versión contable
+de la empresa y época de purga, por lo que un reporte nunca se sirve después
+de contabilizar, cancelar o editar una transacción contabilizada.
+Los reportes que incluyen borradores (libro diario) no se guardan en caché:
+la versión contable no cambia al crear o editar una póliza sin contabilizar
+"""
+import hashlib
+import json
+import time
+from datetime import date
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from apps.core.metricas import contar_cache_reportes, medir_reporte
+
+# Vigencia por defecto de un reporte en caché (segundos)
+REPORTES_CACHE_TIMEOUT = getattr(settings, 'REPORTES_CACHE_TIMEOUT', 60 * 60 * 24)
+
+# Parámetros que no afectan el contenido del reporte
+PARAMETROS_IGNORADOS = {'format'}
+
+
+def normalizar_parametros(params):
+    """
+    Normaliza los parámetros del reporte en una huella estable
+    Incluye la fecha del día porque varios reportes usan hoy como fecha por defecto
+    """
+    normalizados = {
+        clave: sorted(params.getlist(clave)) if hasattr(params, 'getlist') else params[clave]
+        for clave in params
+        if clave not in PARAMETROS_IGNORADOS
+    }
+    normalizados['_hoy'] = date.today().isoformat()
+    texto = json.dumps(normalizados, sort_keys=True, default=str)
+    return hashlib.sha1(texto.encode()).hexdigest()
+
+
+def _clave_contador(empresa_id, contador):
+    return f'reportes_cache:{empresa_id}:{contador}'
+
+
+def _epoca(empresa_id):
+    """Época de purga de la empresa; inicializada con la hora actual"""
+    clave = _clave_contador(empresa_id, 'epoca')
+    epoca = cache.get(clave)
+    if epoca is None:
+        cache.add(clave, int(time.time() * 1000), None)
+        epoca = cache.get(clave)
+    return epoca
+
+
+def _incrementar(clave):
+    if not cache.add(clave, 1, None):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.add(clave, 1, None)
+
+
+def clave_reporte(empresa, reporte, params):
+    """Clave de caché de un reporte para la versión contable vigente de la empresa"""
+    return (
+        f'reportes_cache:{empresa.id}:{_epoca(empresa.id)}:{reporte}:'
+        f'v{empresa.version_contable}:{normalizar_parametros(params)}'
+    )
+
+
+def obtener_reporte(empresa, reporte, params, generar):
+    """
+    Obtiene los datos del reporte desde caché o los genera con `generar()`
+    `generar` regresa (datos, cacheable)
+    """
+    clave = clave_reporte(empresa, reporte, params)
+    datos = cache.get(clave)
+    if datos is not None:
+        _incrementar(_clave_contador(empresa.id, 'aciertos'))
+        contar_cache_reportes(acierto=True)
+        return datos
+
+    _incrementar(_clave_contador(empresa.id, 'fallos'))
+    contar_cache_reportes(acierto=False)
+    datos, cacheable = generar()
+    if cacheable:
+        cache.set(clave, datos, REPORTES_CACHE_TIMEOUT)
+    return datos
+
+
+def purgar_reportes(empresa):
+    """Descarta todos los reportes en caché de la empresa cambiando su época"""
+    _epoca(empresa.id)
+    try:
+        cache.incr(_clave_contador(empresa.id, 'epoca'))
+    except ValueError:
+        cache.add(_clave_contador(empresa.id, 'epoca'), int(time.time() * 1000), None)
+
+
+def estadisticas_cache(empresa):
+    """Aciertos y fallos de la caché de reportes de la empresa"""
+    contadores = cache.get_many([
+        _clave_contador(empresa.id, 'aciertos'),
+        _clave_contador(empresa.id, 'fallos'),
+    ])
+    aciertos = contadores.get(_clave_contador(empresa.id, 'aciertos'), 0)
+    fallos = contadores.get(_clave_contador(empresa.id, 'fallos'), 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else None,
+        'version_contable': empresa.version_contable,
+    }
+
+
+def reporte_en_cache(reporte):
+    """
+    Decorador para acciones de ReporteViewSet que regresan un Response JSON
+    Sólo se guardan respuestas 200 de DRF; descargas (PDF, Excel, CSV) y
+    respuestas streaming pasan sin caché
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            params = request.query_params
+            formato = params.get('formato', 'json')
+            if formato != 'json' or params.get('stream'):
+                with medir_reporte(reporte, formato):
+                    return metodo(self, request, *args, **kwargs)
+
+            empresa = self.get_empresa()
+            if not empresa:
+                return metodo(self, request, *args, **kwargs)
+
+            respuesta = {}
+
+            def generar():
+                with medir_reporte(reporte, formato):
+                    respuesta['original'] = metodo(self, request, *args, **kwargs)
+                original = respuesta['original']
+                cacheable = (
+                    isinstance(original, Response)
+                    and original.status_code == 200
+                    and not original.exception
+                )
+                return (original.data if cacheable else None), cacheable
+
+            datos = obtener_reporte(empresa, reporte, params, generar)
+            if 'original' in respuesta:
+                return respuesta['original']
+            return Response(datos)
+
+        return envoltura
+    return decorador
+
+
+def reporte_medido(reporte):
+    """Decorador para acciones de ReporteViewSet que sólo registran métricas, sin caché"""
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            with medir_reporte(reporte, request.query_params.get('formato', 'json')):
+                return metodo(self, request, *args, **kwargs)
+
+        return envoltura
+    return decorador
@@ -0,0 +1,284 @@
+"""
+Capa de exportación de reportes
+Los reportes entregan sus filas como un iterable (idealmente un cursor del
+servidor leído por bloques) y el exportador las escribe una por una, sin
+construir el documento completo en memoria
+"""
+import csv
+import tempfile
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from django.http import FileResponse, StreamingHttpResponse
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Filas de datos por tabla del PDF; cada tabla cabe en una página y repite el
+# encabezado, de modo que el acomodo de reportlab crece linealmente con las filas
+FILAS_POR_TABLA_PDF = 40
+
+# Suma de anchos (en caracteres) a partir de la cual el PDF se genera horizontal
+ANCHO_MAXIMO_VERTICAL_PDF = 110
+
+# Filas de CSV que se agrupan en cada fragmento enviado al cliente
+FILAS_POR_FRAGMENTO_CSV = 500
+
+# Definición de una columna exportada: encabezado, ancho y tipo de dato
+# (texto, moneda, numero o fecha)
+Columna = namedtuple('Columna', ['titulo', 'ancho', 'tipo'])
+
+# Filas especiales dentro del iterable de filas
+FilaSeccion = namedtuple('FilaSeccion', ['titulo'])
+FilaTotal = namedtuple('FilaTotal', ['valores'])
+
+
+def _valor_celda(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _texto_pdf(valor, tipo, max_caracteres):
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, Decimal) or tipo == 'moneda':
+        return f"${float(valor):,.2f}"
+    return str(valor)[:max_caracteres]
+
+
+def exportar_excel(nombre_archivo, hoja, titulos, columnas, filas):
+    """
+    Escribe un XLSX en modo constant_memory a un archivo temporal y lo regresa
+    como FileResponse
+    `titulos` son las líneas del encabezado del reporte, `columnas` una lista de
+    Columna y `filas` un iterable de tuplas, FilaSeccion o FilaTotal que se
+    consume una sola vez
+    """
+    import xlsxwriter
+
+    archivo = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(archivo, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(hoja[:31])
+
+    # Formatos
+    title_format = workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center'})
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#D7E4BC', 'border': 1})
+    section_format = workbook.add_format({'bold': True, 'border': 1})
+    formatos = {
+        'texto': workbook.add_format({'border': 1}),
+        'moneda': workbook.add_format({'num_format': '$#,##0.00', 'border': 1}),
+        'numero': workbook.add_format({'border': 1}),
+        'fecha': workbook.add_format({'num_format': 'yyyy-mm-dd', 'border': 1}),
+    }
+    total_format = workbook.add_format({'bold': True, 'bg_color': '#F2F2F2', 'num_format': '$#,##0.00', 'border': 1})
+
+    ultima_columna = len(columnas) - 1
+
+    # Anchos de columna (deben definirse antes de escribir filas en modo constant_memory)
+    for col, columna in enumerate(columnas):
+        worksheet.set_column(col, col, columna.ancho)
+
+    # Título
+    row = 0
+    for titulo in titulos:
+        if ultima_columna > 0:
+            worksheet.merge_range(row, 0, row, ultima_columna, titulo, title_format)
+        else:
+            worksheet.write(row, 0, titulo, title_format)
+        row += 1
+    if titulos:
+        row += 1
+
+    # Headers
+    for col, columna in enumerate(columnas):
+        worksheet.write(row, col, columna.titulo, header_format)
+    row += 1
+
+    # Datos
+    for fila in filas:
+        if isinstance(fila, FilaSeccion):
+            worksheet.write(row, 0, fila.titulo, section_format)
+        elif isinstance(fila, FilaTotal):
+            for col, valor in enumerate(fila.valores):
+                worksheet.write(row, col, _valor_celda(valor), total_format)
+        else:
+            for col, valor in enumerate(fila):
+                if valor is None:
+                    continue
+                formato = formatos[columnas[col].tipo]
+                if isinstance(valor, (date, datetime)):
+                    worksheet.write_datetime(row, col, valor, formatos['fecha'])
+                else:
+                    worksheet.write(row, col, _valor_celda(valor), formato)
+        row += 1
+
+    workbook.close()
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=nombre_archivo,
+        content_type=CONTENT_TYPE_XLSX
+    )
+
+
+class _Eco:
+    """Destino de csv.writer que regresa la línea escrita en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def _fila_csv(fila):
+    if isinstance(fila, FilaSeccion):
+        return [fila.titulo]
+    if isinstance(fila, FilaTotal):
+        return fila.valores
+    return fila
+
+
+def exportar_csv(nombre_archivo, columnas, filas):
+    """
+    Regresa un StreamingHttpResponse que escribe el CSV conforme se consumen
+    las filas; el encabezado se envía de inmediato y el resto en fragmentos
+    de FILAS_POR_FRAGMENTO_CSV filas
+    """
+    writer = csv.writer(_Eco())
+
+    def contenido():
+        yield writer.writerow([columna.titulo for columna in columnas])
+        fragmento = []
+        for fila in filas:
+            fragmento.append(writer.writerow(_fila_csv(fila)))
+            if len(fragmento) >= FILAS_POR_FRAGMENTO_CSV:
+                yield ''.join(fragmento)
+                fragmento = []
+        if fragmento:
+            yield ''.join(fragmento)
+
+    response = StreamingHttpResponse(contenido(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+class _FlowablesPerezosos(list):
+    """
+    Lista de flowables que se llena desde un generador conforme reportlab la
+    consume (len, [0] y del [0]), así que sólo hay una tabla en memoria a la vez
+    """
+
+    def __init__(self, generador):
+        super().__init__()
+        self._generador = generador
+
+    def __len__(self):
+        if not super().__len__():
+            siguiente = next(self._generador, None)
+            if siguiente is not None:
+                self.append(siguiente)
+        return super().__len__()
+
+    def __iter__(self):
+        while len(self):
+            yield self.pop(0)
+
+
+def exportar_pdf(nombre_archivo, titulos, columnas, filas, notas=None):
+    """
+    Genera un PDF tabular a un archivo temporal y lo regresa como FileResponse
+    Las filas se reparten en tablas de FILAS_POR_TABLA_PDF filas con el
+    encabezado repetido, en lugar de una sola tabla con todo el reporte, y
+    cada tabla se arma cuando reportlab llega a ella.
+    `notas` son párrafos opcionales al final del documento
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    ancho_total = sum(columna.ancho for columna in columnas)
+    pagina = landscape(A4) if ancho_total > ANCHO_MAXIMO_VERTICAL_PDF else A4
+
+    archivo = tempfile.TemporaryFile()
+    doc = SimpleDocTemplate(archivo, pagesize=pagina,
+                            rightMargin=36, leftMargin=36,
+                            topMargin=54, bottomMargin=36)
+
+    # Anchos proporcionales al ancho disponible; el texto se trunca a su columna
+    anchos = [doc.width * columna.ancho / ancho_total for columna in columnas]
+    max_caracteres = [int(ancho / 4.5) for ancho in anchos]
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle',
+                                 parent=styles['Heading1'],
+                                 fontSize=16,
+                                 spaceAfter=12,
+                                 alignment=1)  # Centrado
+    estilo_base = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ]
+    estilo_base += [
+        ('ALIGN', (col, 0), (col, -1), 'RIGHT')
+        for col, columna in enumerate(columnas) if columna.tipo == 'moneda'
+    ]
+    encabezado = [columna.titulo for columna in columnas]
+
+    def tabla(bloque, estilos_filas):
+        t = Table([encabezado] + bloque, colWidths=anchos, repeatRows=1)
+        t.setStyle(TableStyle(estilo_base + estilos_filas))
+        return t
+
+    def elementos():
+        for i, titulo in enumerate(titulos):
+            yield Paragraph(titulo, title_style if i == 0 else styles['Normal'])
+        yield Spacer(1, 12)
+
+        bloque = []
+        estilos_filas = []
+        tablas = 0
+        for fila in filas:
+            renglon = len(bloque) + 1
+            if isinstance(fila, FilaSeccion):
+                bloque.append([fila.titulo] + [''] * (len(columnas) - 1))
+                estilos_filas.append(('FONTNAME', (0, renglon), (-1, renglon), 'Helvetica-Bold'))
+            elif isinstance(fila, FilaTotal):
+                bloque.append([
+                    _texto_pdf(valor, columnas[col].tipo, max_caracteres[col])
+                    for col, valor in enumerate(fila.valores)
+                ])
+                estilos_filas.append(('FONTNAME', (0, renglon), (-1, renglon), 'Helvetica-Bold'))
+                estilos_filas.append(('BACKGROUND', (0, renglon), (-1, renglon), colors.lightgrey))
+            else:
+                bloque.append([
+                    _texto_pdf(valor, columnas[col].tipo, max_caracteres[col])
+                    for col, valor in enumerate(fila)
+                ])
+            if len(bloque) >= FILAS_POR_TABLA_PDF:
+                yield tabla(bloque, estilos_filas)
+                tablas += 1
+                bloque = []
+                estilos_filas = []
+        if bloque or not tablas:
+            yield tabla(bloque, estilos_filas)
+
+        for nota in notas or []:
+            yield Spacer(1, 12)
+            yield Paragraph(nota, styles['Normal'])
+
+    doc.build(_FlowablesPerezosos(elementos()))
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=nombre_archivo,
+        content_type='application/pdf'
+    )
@@ -0,0 +1,158 @@
+"""
+Motor del flujo de efectivo
+Las cuentas de efectivo se guardan por empresa en core.Configuracion con la
+clave 'cuentas_efectivo' (lista de códigos; cada código incluye sus subcuentas)
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q
+from apps.catalogo_cuentas.models import CuentaContable
+from apps.core.models import Configuracion
+from apps.empresas.models import Empresa
+from apps.transacciones.models import MovimientoContable
+from apps.transacciones.saldos import calcular_saldos
+
+CLAVE_CUENTAS_EFECTIVO = 'cuentas_efectivo'
+
+# Movimientos leídos del cursor del servidor por bloque
+TAMANO_BLOQUE_FLUJO = 500
+
+
+def codigos_cuentas_efectivo(empresa):
+    """Códigos de cuentas de efectivo configurados, o None si la empresa no los ha definido"""
+    return Configuracion.objects.filter(
+        empresa=empresa,
+        clave=CLAVE_CUENTAS_EFECTIVO,
+        activo=True
+    ).values_list('valor', flat=True).first()
+
+
+def cuentas_efectivo(empresa):
+    """
+    Cuentas de efectivo de la empresa
+    Sin configuración se usa la convención del catálogo (1.1.x) y, si no
+    existe, las cuentas cuyo nombre contiene 'caja' o 'banco'
+    """
+    cuentas = CuentaContable.objects.filter(empresa=empresa, activo=True)
+
+    codigos = codigos_cuentas_efectivo(empresa)
+    if codigos:
+        filtro = Q()
+        for codigo in codigos:
+            filtro |= Q(codigo=codigo) | Q(codigo__startswith=f'{codigo}.')
+        return cuentas.filter(filtro)
+
+    por_codigo = cuentas.filter(codigo__startswith='1.1')
+    if por_codigo.exists():
+        return por_codigo
+    return cuentas.filter(Q(nombre__icontains='caja') | Q(nombre__icontains='banco'))
+
+
+def guardar_cuentas_efectivo(empresa, codigos, usuario):
+    """
+    Guarda los códigos de cuentas de efectivo de la empresa
+    Se incrementa la versión contable para que los reportes en caché y los
+    trabajos de reporte existentes no se reutilicen con el conjunto anterior
+    """
+    with transaction.atomic():
+        configuracion = Configuracion.objects.select_for_update().filter(
+            empresa=empresa,
+            clave=CLAVE_CUENTAS_EFECTIVO
+        ).first()
+        if configuracion is None:
+            configuracion = Configuracion(
+                empresa=empresa,
+                clave=CLAVE_CUENTAS_EFECTIVO,
+                tipo='REPORTES',
+                descripcion='Cuentas de efectivo para el flujo de efectivo',
+                creado_por=usuario
+            )
+        else:
+            configuracion.modificado_por = usuario
+        configuracion.valor = codigos
+        configuracion.activo = True
+        configuracion.save()
+
+        Empresa.incrementar_version_contable(empresa.id)
+    return configuracion
+
+
+def movimientos_efectivo(empresa, cuentas, fecha_inicio, fecha_fin):
+    """Movimientos contabilizados de las cuentas de efectivo en el período, en orden cronológico"""
+    return MovimientoContable.objects.filter(
+        empresa=empresa,
+        estado='CONTABILIZADA',
+        fecha__gte=fecha_inicio,
+        fecha__lte=fecha_fin,
+        cuenta__in=cuentas,
+        activo=True
+    ).order_by('fecha', 'transaccion__folio', 'id')
+
+
+def saldos_iniciales_efectivo(empresa, cuentas, fecha_inicio):
+    """Saldo de cada cuenta de efectivo al día anterior al período en una consulta agrupada"""
+    saldos = calcular_saldos(
+        empresa,
+        fecha_fin=fecha_inicio - timedelta(days=1),
+        cuentas=cuentas
+    )
+
+    total = Decimal('0.00')
+    detalle = []
+    for saldo in saldos:
+        # Para cuentas de efectivo (activos), el saldo es debe - haber
+        saldo_inicial = saldo['cargos'] - saldo['abonos']
+        total += saldo_inicial
+        if saldo_inicial != 0:
+            detalle.append({
+                'cuenta_codigo': saldo['codigo'],
+                'cuenta_nombre': saldo['nombre'],
+                'saldo_inicial': saldo_inicial
+            })
+    return total, detalle
+
+
+def calcular_flujo(empresa, fecha_inicio, fecha_fin, cuentas):
+    """
+    Entradas, salidas y totales por tipo de transacción en un solo recorrido
+    de los movimientos de efectivo del período
+    """
+    entradas = []
+    salidas = []
+    total_entradas = Decimal('0.00')
+    total_salidas = Decimal('0.00')
+    por_tipo = {}
+
+    movimientos = movimientos_efectivo(empresa, cuentas, fecha_inicio, fecha_fin).values_list(
+        'fecha', 'transaccion__folio', 'transaccion__concepto', 'transaccion__tipo',
+        'cuenta__codigo', 'cuenta__nombre', 'concepto', 'debe', 'haber'
+    )
+    for (fecha, folio, concepto_transaccion, tipo, codigo, nombre,
+         concepto, debe, haber) in movimientos.iterator(chunk_size=TAMANO_BLOQUE_FLUJO):
+        detalle = {
+            'fecha': fecha,
+            'folio': folio,
+            'cuenta_efectivo': f"{codigo} - {nombre}",
+            'concepto': concepto or concepto_transaccion,
+            'tipo_transaccion': tipo,
+            'monto': debe if debe > 0 else haber
+        }
+        totales_tipo = por_tipo.setdefault(tipo, {'entradas': Decimal('0.00'), 'salidas': Decimal('0.00')})
+
+        if debe > 0:  # Entrada de efectivo
+            entradas.append(detalle)
+            total_entradas += debe
+            totales_tipo['entradas'] += debe
+        else:  # Salida de efectivo
+            salidas.append(detalle)
+            total_salidas += haber
+            totales_tipo['salidas'] += haber
+
+    return {
+        'entradas': entradas,
+        'salidas': salidas,
+        'total_entradas': total_entradas,
+        'total_salidas': total_salidas,
+        'por_tipo': por_tipo,
+    }
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresas', '0004_empresa_version_contable'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última modificación')),
+                ('activo', models.BooleanField(default=True, help_text='Soft delete: False indica registro eliminado', verbose_name='Activo')),
+                ('version', models.IntegerField(default=1, verbose_name='Versión del registro')),
+                ('reporte', models.CharField(choices=[('balanza_comprobacion', 'Balanza de Comprobación'), ('estado_resultados', 'Estado de Resultados'), ('balance_general', 'Balance General'), ('libro_diario', 'Libro Diario'), ('libro_mayor', 'Libro Mayor'), ('flujo_efectivo', 'Flujo de Efectivo')], max_length=30, verbose_name='Reporte')),
+                ('formato', models.CharField(choices=[('json', 'JSON'), ('pdf', 'PDF'), ('excel', 'Excel'), ('csv', 'CSV')], default='json', max_length=10, verbose_name='Formato')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('huella', models.CharField(help_text='Hash de reporte, formato y parámetros normalizados', max_length=40, verbose_name='Huella de parámetros')),
+                ('version_contable', models.PositiveIntegerField(help_text='Versión del libro contable con la que se generó el reporte', verbose_name='Versión contable')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('task_id', models.CharField(blank=True, max_length=100, verbose_name='ID de tarea')),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='reportes/%Y/%m/', verbose_name='Archivo generado')),
+                ('mensaje_error', models.TextField(blank=True, verbose_name='Mensaje de error')),
+                ('fecha_inicio_proceso', models.DateTimeField(blank=True, null=True, verbose_name='Inicio del proceso')),
+                ('fecha_fin_proceso', models.DateTimeField(blank=True, null=True, verbose_name='Fin del proceso')),
+                ('creado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_creados', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_reporte', to='empresas.empresa')),
+                ('modificado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_modificados', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Reporte',
+                'verbose_name_plural': 'Trabajos de Reporte',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['empresa', 'huella', 'version_contable'], name='reportes_re_empresa_b72144_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,118 @@
-# Placeholder para modelos de reportes
-# Se implementarán en la Etapa 5
+from django.db import models
+from apps.core.models import BaseModel
 
-from django.db import models
\ No newline at end of file
+
+class ReporteJob(BaseModel):
+    """
+    Trabajos de generación asíncrona de reportes
+    El archivo generado se reutiliza mientras no cambie la versión contable
+    de la empresa y se soliciten los mismos parámetros
+    """
+
+    REPORTE_CHOICES = [
+        ('balanza_comprobacion', 'Balanza de Comprobación'),
+        ('estado_resultados', 'Estado de Resultados'),
+        ('balance_general', 'Balance General'),
+        ('libro_diario', 'Libro Diario'),
+        ('libro_mayor', 'Libro Mayor'),
+        ('flujo_efectivo', 'Flujo de Efectivo'),
+    ]
+
+    FORMATO_CHOICES = [
+        ('json', 'JSON'),
+        ('pdf', 'PDF'),
+        ('excel', 'Excel'),
+        ('csv', 'CSV'),
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        related_name='trabajos_reporte'
+    )
+
+    # Parámetros del reporte
+    reporte = models.CharField(
+        max_length=30,
+        choices=REPORTE_CHOICES,
+        verbose_name='Reporte'
+    )
+    formato = models.CharField(
+        max_length=10,
+        choices=FORMATO_CHOICES,
+        default='json',
+        verbose_name='Formato'
+    )
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Parámetros'
+    )
+    huella = models.CharField(
+        max_length=40,
+        verbose_name='Huella de parámetros',
+        help_text='Hash de reporte, formato y parámetros normalizados'
+    )
+    version_contable = models.PositiveIntegerField(
+        verbose_name='Versión contable',
+        help_text='Versión del libro contable con la que se generó el reporte'
+    )
+
+    # Estado del trabajo
+    estado = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDIENTE',
+        verbose_name='Estado'
+    )
+    progreso = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Progreso (%)'
+    )
+    task_id = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='ID de tarea'
+    )
+
+    # Resultados
+    archivo = models.FileField(
+        upload_to='reportes/%Y/%m/',
+        blank=True,
+        null=True,
+        verbose_name='Archivo generado'
+    )
+    mensaje_error = models.TextField(
+        blank=True,
+        verbose_name='Mensaje de error'
+    )
+
+    # Fechas de proceso
+    fecha_inicio_proceso = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Inicio del proceso'
+    )
+    fecha_fin_proceso = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fin del proceso'
+    )
+
+    class Meta:
+        verbose_name = 'Trabajo de Reporte'
+        verbose_name_plural = 'Trabajos de Reporte'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['empresa', 'huella', 'version_contable']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_reporte_display()} ({self.formato}) - {self.empresa.nombre} ({self.estado})"
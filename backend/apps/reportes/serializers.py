@@ -0,0 +1,41 @@
+from rest_framework import serializers
+from .models import ReporteJob
+
+
+class ReporteJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer para trabajos de generación de reportes
+    """
+    empresa_nombre = serializers.CharField(source='empresa.nombre', read_only=True)
+    url_descarga = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReporteJob
+        fields = [
+            'id', 'empresa', 'empresa_nombre', 'reporte', 'formato', 'parametros',
+            'version_contable', 'estado', 'progreso', 'mensaje_error', 'url_descarga',
+            'fecha_inicio_proceso', 'fecha_fin_proceso', 'fecha_creacion'
+        ]
+        read_only_fields = fields
+
+    def get_url_descarga(self, obj):
+        """URL de descarga cuando el archivo ya está disponible"""
+        if obj.estado != 'COMPLETADO' or not obj.archivo:
+            return None
+        request = self.context.get('request')
+        url = f'/api/reportes/trabajos/{obj.id}/descargar/'
+        return request.build_absolute_uri(url) if request else url
+
+
+class ReporteJobCreateSerializer(serializers.Serializer):
+    """
+    Serializer para solicitar un reporte asíncrono
+    """
+    reporte = serializers.ChoiceField(choices=ReporteJob.REPORTE_CHOICES)
+    formato = serializers.ChoiceField(choices=ReporteJob.FORMATO_CHOICES, default='json')
+    parametros = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
+
+    def validate_parametros(self, value):
+        """El formato se indica en su propio campo"""
+        value.pop('formato', None)
+        return value
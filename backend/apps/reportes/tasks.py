@@ -0,0 +1,62 @@
+from celery import shared_task
+from django.utils import timezone as django_timezone
+from .models import ReporteJob
+from .trabajos import ejecutar_reporte
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def generar_reporte(self, job_id):
+    """
+    Genera el archivo de un trabajo de reporte y lo guarda en el trabajo
+    """
+    try:
+        job = ReporteJob.objects.select_related('empresa', 'creado_por').get(id=job_id)
+    except ReporteJob.DoesNotExist:
+        logger.error(f"Trabajo de reporte no encontrado (job_id: {job_id})")
+        return {'status': 'error', 'message': 'Trabajo no encontrado'}
+
+    try:
+        job.estado = 'PROCESANDO'
+        job.progreso = 10
+        job.task_id = self.request.id or ''
+        job.fecha_inicio_proceso = django_timezone.now()
+        job.save(update_fields=['estado', 'progreso', 'task_id', 'fecha_inicio_proceso'])
+
+        self.update_state(
+            state='PROGRESS',
+            meta={'current': 10, 'total': 100, 'status': 'Generando reporte...'}
+        )
+
+        contenido, nombre = ejecutar_reporte(job)
+
+        job.progreso = 90
+        job.save(update_fields=['progreso'])
+
+        # Guardar el archivo generado
+        job.archivo.save(nombre, contenido, save=False)
+        job.estado = 'COMPLETADO'
+        job.progreso = 100
+        job.fecha_fin_proceso = django_timezone.now()
+        job.save(update_fields=['archivo', 'estado', 'progreso', 'fecha_fin_proceso'])
+
+        logger.info(f"Reporte {job.reporte} generado (job_id: {job_id}, {contenido.size} bytes)")
+
+        return {
+            'status': 'success',
+            'job_id': job_id,
+            'archivo': job.archivo.name
+        }
+
+    except Exception as e:
+        # Marcar el trabajo como error
+        job.estado = 'ERROR'
+        job.mensaje_error = str(e)
+        job.fecha_fin_proceso = django_timezone.now()
+        job.save(update_fields=['estado', 'mensaje_error', 'fecha_fin_proceso'])
+
+        logger.error(f"Error generando reporte (job_id: {job_id}): {str(e)}")
+
+        return {'status': 'error', 'message': str(e)}
@@ -0,0 +1,87 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class BalanzaComprobacionTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para la balanza de comprobación con motor de saldos agrupado"""
+
+    cuentas = {'capital': ('3.1', 'CAPITAL SOCIAL', 'CAPITAL', 'ACREEDORA')}
+
+    def _aportar(self, cuenta, importe):
+        """Crea y contabiliza una póliza de aportación a la cuenta indicada"""
+        self.crear_poliza(cuenta, self.capital, importe, fecha=date(2024, 1, 15), concepto='Aportación')
+
+    def _crear_cuentas_con_movimientos(self, cantidad, inicio=0):
+        for i in range(inicio, inicio + cantidad):
+            cuenta = self.crear_cuenta(f'1.{i + 1}', f'BANCO {i + 1}', 'ACTIVO', 'DEUDORA')
+            self._aportar(cuenta, Decimal('100.00'))
+
+    def _consultas_balanza(self):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(
+                '/api/reportes/reportes/balanza_comprobacion/', {'fecha': '2024-12-31'}
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(contexto.captured_queries)
+
+    def test_balanza_saldos(self):
+        """Test que la balanza calcule cargos, abonos y saldos por cuenta"""
+        self._crear_cuentas_con_movimientos(2)
+
+        response, _ = self._consultas_balanza()
+        data = response.json()
+
+        cuentas = {c['cuenta_codigo']: c for c in data['cuentas']}
+        self.assertEqual(list(cuentas), ['1.1', '1.2', '3.1'])
+        self.assertEqual(Decimal(cuentas['1.1']['cargos']), Decimal('100.00'))
+        self.assertEqual(Decimal(cuentas['1.1']['saldo_deudor']), Decimal('100.00'))
+        self.assertEqual(Decimal(cuentas['3.1']['abonos']), Decimal('200.00'))
+        self.assertEqual(Decimal(cuentas['3.1']['saldo_acreedor']), Decimal('200.00'))
+        self.assertTrue(data['totales']['balanceado'])
+
+    def test_consultas_constantes(self):
+        """Test que el número de consultas no crezca con el número de cuentas"""
+        self._crear_cuentas_con_movimientos(2)
+        _, consultas_pocas = self._consultas_balanza()
+
+        self._crear_cuentas_con_movimientos(20, inicio=2)
+        response, consultas_muchas = self._consultas_balanza()
+
+        self.assertEqual(len(response.json()['cuentas']), 23)
+        self.assertEqual(consultas_pocas, consultas_muchas)
+
+    def test_acumulado_por_nivel(self):
+        """Test que la balanza por nivel acumule subtotales en las cuentas padre"""
+        activo = self.crear_cuenta('1', 'ACTIVO', 'ACTIVO', 'DEUDORA')
+        circulante = self.crear_cuenta('1.1', 'CIRCULANTE', 'ACTIVO', 'DEUDORA', activo)
+        self._aportar(self.crear_cuenta('1.1.1', 'CAJA', 'ACTIVO', 'DEUDORA', circulante), Decimal('30.00'))
+        self._aportar(self.crear_cuenta('1.1.2', 'BANCOS', 'ACTIVO', 'DEUDORA', circulante), Decimal('70.00'))
+        self._aportar(self.crear_cuenta('1.2', 'FIJO', 'ACTIVO', 'DEUDORA', activo), Decimal('5.00'))
+
+        def balanza(nivel):
+            response = self.client.get(
+                '/api/reportes/reportes/balanza_comprobacion/', {'fecha': '2024-12-31', 'nivel': nivel}
+            )
+            self.assertEqual(response.status_code, 200)
+            return response.json()
+
+        data = balanza('todos')
+        cuentas = {c['cuenta_codigo']: c for c in data['cuentas']}
+        self.assertEqual(list(cuentas), ['1', '1.1', '1.1.1', '1.1.2', '1.2', '3.1'])
+        self.assertEqual(Decimal(cuentas['1']['saldo_deudor']), Decimal('105.00'))
+        self.assertEqual(Decimal(cuentas['1.1']['saldo_deudor']), Decimal('100.00'))
+        self.assertTrue(cuentas['1.1']['es_subtotal'])
+        self.assertFalse(cuentas['1.1.1']['es_subtotal'])
+        self.assertEqual(Decimal(data['totales']['total_deudor']), Decimal('105.00'))
+        self.assertTrue(data['totales']['balanceado'])
+
+        data = balanza('1')
+        self.assertEqual([c['cuenta_codigo'] for c in data['cuentas']], ['1', '3.1'])
+
+        self.assertEqual(self.client.get(
+            '/api/reportes/reportes/balanza_comprobacion/', {'nivel': 'x'}
+        ).status_code, 400)
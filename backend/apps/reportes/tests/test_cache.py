@@ -0,0 +1,63 @@
+from decimal import Decimal
+from django.test import TestCase
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class CacheReportesTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para la caché de reportes versionada por el libro contable"""
+
+    def _venta(self, importe):
+        return self.crear_poliza(self.banco, self.ventas, importe, concepto='Venta')
+
+    def _saldo_banco(self):
+        response = self.client.get(
+            '/api/reportes/reportes/balanza_comprobacion/', {'fecha': '2024-12-31'}
+        )
+        self.assertEqual(response.status_code, 200)
+        cuentas = {c['cuenta_codigo']: c for c in response.json()['cuentas']}
+        return Decimal(cuentas['1.1']['saldo_deudor'])
+
+    def _estadisticas(self):
+        return self.client.get('/api/reportes/reportes/cache/estadisticas/').json()
+
+    def test_version_contable_invalida(self):
+        """Test que contabilizar y cancelar cambien la versión y no se sirvan datos viejos"""
+        transaccion = self._venta(Decimal('100.00'))
+        self.assertEqual(self._saldo_banco(), Decimal('100.00'))
+        self.assertEqual(self._saldo_banco(), Decimal('100.00'))
+        self.assertEqual(self._estadisticas()['aciertos'], 1)
+
+        self._venta(Decimal('50.00'))
+        self.assertEqual(self._saldo_banco(), Decimal('150.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transaccion.cancelar()
+        self.assertEqual(self._saldo_banco(), Decimal('50.00'))
+
+        estadisticas = self._estadisticas()
+        self.assertEqual(estadisticas['fallos'], 3)
+        self.assertEqual(estadisticas['version_contable'], 3)
+
+    def test_edicion_contabilizada_incrementa_version(self):
+        """Test que editar un movimiento de una transacción contabilizada cambie la versión"""
+        transaccion = self._venta(Decimal('100.00'))
+        self.empresa.refresh_from_db()
+        version = self.empresa.version_contable
+
+        movimiento = transaccion.movimientos.first()
+        movimiento.concepto = 'Corrección'
+        movimiento.save()
+
+        self.empresa.refresh_from_db()
+        self.assertGreater(self.empresa.version_contable, version)
+
+    def test_purgar(self):
+        """Test que la purga descarte los reportes en caché de la empresa"""
+        self._venta(Decimal('100.00'))
+        self._saldo_banco()
+
+        response = self.client.post('/api/reportes/reportes/cache/purgar/')
+        self.assertEqual(response.status_code, 200)
+
+        self._saldo_banco()
+        self.assertEqual(self._estadisticas()['fallos'], 2)
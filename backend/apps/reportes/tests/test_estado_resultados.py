@@ -0,0 +1,74 @@
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from django.test import TestCase
+from openpyxl import load_workbook
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class EstadoResultadosComparativoTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para el estado de resultados comparativo por periodos"""
+
+    cuentas = {
+        **ContabilidadPruebaMixin.cuentas,
+        'renta': ('6.1', 'RENTA', 'GASTO', 'DEUDORA'),
+    }
+
+    def setUp(self):
+        super().setUp()
+        self._poliza(date(2024, 1, 10), self.banco, self.ventas, Decimal('100.00'))
+        self._poliza(date(2024, 2, 10), self.banco, self.ventas, Decimal('200.00'))
+        self._poliza(date(2024, 2, 20), self.renta, self.banco, Decimal('50.00'))
+        self._poliza(date(2024, 4, 5), self.banco, self.ventas, Decimal('300.00'))
+
+    def _poliza(self, fecha, cargo, abono, importe):
+        self.crear_poliza(cargo, abono, importe, fecha=fecha)
+
+    def _comparativo(self, **params):
+        params.update({'desde': '2024-01-01', 'hasta': '2024-04-30'})
+        return self.client.get('/api/reportes/reportes/estado_resultados/', params)
+
+    def test_comparativo_mensual(self):
+        """Test que los importes se distribuyan en una columna por mes"""
+        response = self._comparativo(periodos='mensual')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual([c['etiqueta'] for c in data['columnas']], ['2024-01', '2024-02', '2024-03', '2024-04'])
+        self.assertEqual(
+            [Decimal(i) for i in data['resumen']['ingresos']],
+            [Decimal('100.00'), Decimal('200.00'), Decimal('0.00'), Decimal('300.00')]
+        )
+        self.assertEqual(
+            [Decimal(u) for u in data['resumen']['utilidad_neta']],
+            [Decimal('100.00'), Decimal('150.00'), Decimal('0.00'), Decimal('300.00')]
+        )
+        self.assertEqual(Decimal(data['detalle']['gastos'][0]['total']), Decimal('50.00'))
+
+    def test_comparativo_trimestral(self):
+        """Test que la agrupación trimestral sume los meses de cada trimestre"""
+        data = self._comparativo(periodos='trimestral').json()
+
+        self.assertEqual([c['etiqueta'] for c in data['columnas']], ['2024-T1', '2024-T2'])
+        self.assertEqual(data['columnas'][1]['fecha_fin'], '2024-04-30')
+        self.assertEqual(
+            [Decimal(i) for i in data['resumen']['ingresos']],
+            [Decimal('300.00'), Decimal('300.00')]
+        )
+
+    def test_comparativo_excel(self):
+        """Test que la exportación a Excel tenga una columna por periodo"""
+        response = self._comparativo(periodos='mensual', formato='excel')
+        self.assertEqual(response.status_code, 200)
+
+        hoja = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        encabezados = [celda.value for celda in hoja[5]]
+        self.assertEqual(encabezados, ['Código', 'Cuenta', '2024-01', '2024-02', '2024-03', '2024-04', 'Total'])
+
+        utilidades = {fila[1]: fila[2:] for fila in hoja.iter_rows(values_only=True) if fila[0] is None}
+        self.assertEqual(utilidades['UTILIDAD OPERATIVA'], (100, 150, 0, 300, 550))
+        self.assertEqual(utilidades['UTILIDAD NETA'], utilidades['UTILIDAD OPERATIVA'])
+
+    def test_agrupacion_invalida(self):
+        """Test que una agrupación desconocida regrese error"""
+        self.assertEqual(self._comparativo(periodos='semanal').status_code, 400)
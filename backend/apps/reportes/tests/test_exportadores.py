@@ -0,0 +1,83 @@
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import SimpleTestCase
+from apps.reportes import exportadores
+from apps.reportes.exportadores import Columna, FilaTotal, exportar_pdf
+
+COLUMNAS = [
+    Columna('Fecha', 12, 'fecha'),
+    Columna('Folio', 12, 'texto'),
+    Columna('Cuenta', 30, 'texto'),
+    Columna('Concepto', 40, 'texto'),
+    Columna('Debe', 15, 'moneda'),
+    Columna('Haber', 15, 'moneda'),
+]
+
+
+def _filas(cantidad):
+    for i in range(cantidad):
+        yield (date(2024, 5, 1), f'{i:06d}', '1.1 - BANCOS', 'Pago a proveedor', Decimal('1234.56'), None)
+    yield FilaTotal(('', '', '', 'TOTALES', Decimal('1234.56') * cantidad, Decimal('0.00')))
+
+
+class ExportarPdfTest(SimpleTestCase):
+    """Tests para el PDF en tablas del tamaño de una página"""
+
+    def _tiempo(self, cantidad):
+        """Mejor tiempo de dos ejecuciones para reducir el ruido"""
+        tiempos = []
+        for _ in range(2):
+            inicio = time.perf_counter()
+            response = exportar_pdf('prueba.pdf', ['PRUEBA'], COLUMNAS, _filas(cantidad))
+            tiempos.append(time.perf_counter() - inicio)
+            response.close()
+        return min(tiempos)
+
+    def test_pdf_por_tablas(self):
+        """Test que las filas se repartan en tablas con el encabezado repetido"""
+        tablas = []
+        original = exportadores.FILAS_POR_TABLA_PDF
+
+        with mock.patch('reportlab.platypus.SimpleDocTemplate.build',
+                        side_effect=lambda elementos: tablas.extend(
+                            e for e in elementos if e.__class__.__name__ == 'Table')):
+            exportar_pdf('prueba.pdf', ['PRUEBA'], COLUMNAS, _filas(original * 2 + 5))
+
+        self.assertEqual(len(tablas), 3)
+        self.assertEqual(tablas[0]._cellvalues[0][0], 'Fecha')
+        self.assertEqual(tablas[2]._cellvalues[0][0], 'Fecha')
+        self.assertEqual(len(tablas[2]._cellvalues), 1 + 6)
+
+    def test_tablas_bajo_demanda(self):
+        """Test que cada tabla se arme cuando reportlab la consume y no todas antes de construir"""
+        consumidas = []
+        leidas_por_tabla = []
+
+        def filas(cantidad):
+            for fila in _filas(cantidad):
+                consumidas.append(fila)
+                yield fila
+
+        def construir(elementos):
+            while len(elementos):
+                if elementos[0].__class__.__name__ == 'Table':
+                    leidas_por_tabla.append(len(consumidas))
+                del elementos[0]
+
+        with mock.patch('reportlab.platypus.SimpleDocTemplate.build', side_effect=construir):
+            exportar_pdf('prueba.pdf', ['PRUEBA'], COLUMNAS, filas(exportadores.FILAS_POR_TABLA_PDF * 3))
+
+        por_tabla = exportadores.FILAS_POR_TABLA_PDF
+        self.assertEqual(leidas_por_tabla, [por_tabla, por_tabla * 2, por_tabla * 3, por_tabla * 3 + 1])
+
+    def test_tiempo_lineal(self):
+        """Benchmark: el tiempo por fila no crece con el número de filas"""
+        self._tiempo(50)  # Calentar fuentes y módulos de reportlab
+
+        pocas = self._tiempo(300)
+        muchas = self._tiempo(2400)
+
+        # Con una sola tabla la relación por fila ronda 1.6; por bloques es ~1
+        self.assertLess(muchas / (8 * pocas), 1.4)
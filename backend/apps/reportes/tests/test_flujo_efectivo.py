@@ -0,0 +1,87 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class FlujoEfectivoTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para el flujo de efectivo con cuentas de efectivo configurables"""
+
+    cuentas = {
+        'caja': ('1.1', 'CAJA', 'ACTIVO', 'DEUDORA'),
+        'inversiones': ('1.2', 'INVERSIONES', 'ACTIVO', 'DEUDORA'),
+        'ventas': ('4.1', 'VENTAS', 'INGRESO', 'ACREEDORA'),
+        'gastos': ('6.1', 'GASTOS GENERALES', 'GASTO', 'DEUDORA'),
+    }
+
+    def setUp(self):
+        super().setUp()
+        self._poliza(date(2024, 4, 30), self.caja, self.ventas, Decimal('1000.00'))
+        self._poliza(date(2024, 4, 30), self.inversiones, self.ventas, Decimal('500.00'))
+        self._poliza(date(2024, 5, 10), self.caja, self.ventas, Decimal('200.00'), tipo='INGRESO')
+        self._poliza(date(2024, 5, 12), self.gastos, self.caja, Decimal('50.00'), tipo='EGRESO')
+        self._poliza(date(2024, 5, 15), self.inversiones, self.ventas, Decimal('300.00'), tipo='INGRESO')
+
+    def _poliza(self, fecha, cargo, abono, importe, tipo='DIARIO'):
+        self.crear_poliza(cargo, abono, importe, fecha=fecha, tipo=tipo)
+
+    def _flujo(self):
+        response = self.client.get('/api/reportes/reportes/flujo_efectivo/', {
+            'fecha_inicio': '2024-05-01', 'fecha_fin': '2024-05-31'
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _configurar(self, cuentas):
+        return self.client.put(
+            '/api/reportes/reportes/flujo-efectivo/cuentas/', {'cuentas': cuentas}, format='json'
+        )
+
+    def test_cuentas_por_convencion(self):
+        """Test que sin configuración se usen las cuentas 1.1.x"""
+        data = self._flujo()
+
+        self.assertEqual([c['codigo'] for c in data['cuentas_efectivo']], ['1.1'])
+        self.assertEqual(Decimal(data['resumen']['saldo_inicial']), Decimal('1000.00'))
+        self.assertEqual(Decimal(data['resumen']['total_entradas']), Decimal('200.00'))
+        self.assertEqual(Decimal(data['resumen']['total_salidas']), Decimal('50.00'))
+        self.assertEqual(Decimal(data['por_tipo_transaccion']['EGRESO']['salidas']), Decimal('50.00'))
+        self.assertEqual(data['estadisticas']['total_movimientos'], 2)
+
+    def test_cuentas_configuradas(self):
+        """Test que las cuentas configuradas reemplacen la convención e invaliden la caché"""
+        self._flujo()
+
+        response = self._configurar(['1.1', '1.2'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['configuradas'], ['1.1', '1.2'])
+
+        data = self._flujo()
+        self.assertEqual([c['codigo'] for c in data['cuentas_efectivo']], ['1.1', '1.2'])
+        self.assertEqual(Decimal(data['resumen']['saldo_inicial']), Decimal('1500.00'))
+        self.assertEqual(Decimal(data['resumen']['total_entradas']), Decimal('500.00'))
+        self.assertEqual(Decimal(data['por_tipo_transaccion']['INGRESO']['entradas']), Decimal('500.00'))
+        self.assertEqual(Decimal(data['resumen']['saldo_final']), Decimal('1950.00'))
+
+    def test_configurar_cuenta_inexistente(self):
+        """Test que no se acepten códigos fuera del catálogo"""
+        response = self._configurar(['9.9'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_consultas_constantes(self):
+        """Test que el número de consultas no dependa del número de cuentas de efectivo"""
+        self._configurar(['1.1'])
+        cache.clear()
+        with CaptureQueriesContext(connection) as pocas:
+            self._flujo()
+
+        self._configurar(['1.1', '1.2'])
+        cache.clear()
+        with CaptureQueriesContext(connection) as muchas:
+            data = self._flujo()
+
+        self.assertEqual(len(data['cuentas_efectivo']), 2)
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
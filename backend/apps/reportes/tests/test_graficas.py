@@ -0,0 +1,61 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.transacciones.saldos import serie_ingresos_gastos
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class GraficaIngresosGastosTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para la serie mensual de ingresos vs gastos"""
+
+    cuentas = {
+        **ContabilidadPruebaMixin.cuentas,
+        'renta': ('6.1', 'RENTA', 'GASTO', 'DEUDORA'),
+    }
+
+    def setUp(self):
+        super().setUp()
+        hoy = date.today()
+        self.mes_actual = date(hoy.year, hoy.month, 1)
+        self.mes_pasado = date(hoy.year - 1, 12, 1) if hoy.month == 1 else date(hoy.year, hoy.month - 1, 1)
+
+    def _poliza(self, fecha, cargo, abono, importe):
+        self.crear_poliza(cargo, abono, importe, fecha=fecha)
+
+    def _serie(self, **params):
+        response = self.client.get('/api/reportes/reportes/charts/ingresos-gastos/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_serie_con_horizonte(self):
+        """Test que la serie tenga un punto por mes del horizonte solicitado"""
+        self._poliza(self.mes_pasado, self.banco, self.ventas, Decimal('100.00'))
+        self._poliza(self.mes_pasado, self.renta, self.banco, Decimal('40.00'))
+        self._poliza(self.mes_actual, self.banco, self.ventas, Decimal('25.00'))
+
+        data = self._serie(meses=24)
+        self.assertEqual(len(data['labels']), 24)
+        self.assertEqual(data['ingresos'][-2:], [100.0, 25.0])
+        self.assertEqual(data['gastos'][-2:], [40.0, 0.0])
+
+    def test_meses_cerrados_en_cache(self):
+        """Test que los meses cerrados se lean de caché y se invaliden con pólizas de fecha pasada"""
+        self._poliza(self.mes_pasado, self.banco, self.ventas, Decimal('100.00'))
+        self._serie(meses=3)
+
+        # Sólo el mes en curso se vuelve a consultar (sin pasar por la caché de reportes)
+        with CaptureQueriesContext(connection) as contexto:
+            serie_ingresos_gastos(self.empresa, 3)
+        consultas = [q['sql'] for q in contexto.captured_queries if 'movimientocontable' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+        self.assertIn(f"'{self.mes_actual}'", consultas[0])
+
+        self._poliza(self.mes_pasado, self.banco, self.ventas, Decimal('50.00'))
+        self.assertEqual(self._serie(meses=3)['ingresos'][-2], 150.0)
+
+    def test_horizonte_invalido(self):
+        """Test que un horizonte fuera de rango regrese error"""
+        response = self.client.get('/api/reportes/reportes/charts/ingresos-gastos/', {'meses': 0})
+        self.assertEqual(response.status_code, 400)
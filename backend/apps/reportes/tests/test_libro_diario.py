@@ -0,0 +1,89 @@
+import csv
+import json
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+from django.test import TestCase
+from apps.transacciones.models import TransaccionContable
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class LibroDiarioTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para el libro diario paginado y en streaming"""
+
+    def setUp(self):
+        super().setUp()
+        for folio in range(1, 6):
+            self._crear_transaccion(str(folio), date(2024, 5, folio))
+        TransaccionContable.objects.filter(folio='5').update(estado='CONTABILIZADA')
+
+    def _crear_transaccion(self, folio, fecha):
+        return self.crear_poliza(
+            self.banco, self.ventas, Decimal('10.00'), fecha=fecha, folio=folio,
+            concepto=f'Venta {folio}', contabilizar=False
+        )
+
+    def _libro_diario(self, **params):
+        params.update({'fecha_inicio': '2024-05-01', 'fecha_fin': '2024-05-31'})
+        return self.client.get('/api/reportes/reportes/libro_diario/', params)
+
+    def test_paginacion_keyset(self):
+        """Test que las páginas recorran todas las transacciones sin repetir"""
+        folios = []
+        cursor = None
+        while True:
+            params = {'limite': 2}
+            if cursor:
+                params['despues'] = cursor
+            data = self._libro_diario(**params).json()
+            folios += [t['folio'] for t in data['transacciones']]
+            self.assertEqual(data['resumen']['total_transacciones'], 5)
+            self.assertEqual(data['resumen']['por_estado']['CONTABILIZADA'], 1)
+            cursor = data['paginacion']['siguiente']
+            if not cursor:
+                break
+
+        self.assertEqual(folios, ['1', '2', '3', '4', '5'])
+
+    def test_incluye_borradores_nuevos(self):
+        """Test que una póliza en borrador recién creada aparezca sin esperar a que cambie la versión contable"""
+        self.assertEqual(self._libro_diario().json()['resumen']['total_transacciones'], 5)
+
+        self._crear_transaccion('6', date(2024, 5, 6))
+
+        data = self._libro_diario().json()
+        self.assertEqual(data['resumen']['total_transacciones'], 6)
+        self.assertEqual(data['resumen']['por_estado']['BORRADOR'], 5)
+
+    def test_cursor_invalido(self):
+        """Test que un cursor inválido regrese error"""
+        response = self._libro_diario(limite=2, despues='no-es-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_ndjson(self):
+        """Test que el modo streaming emita una línea por transacción"""
+        response = self._libro_diario(stream='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lineas = [json.loads(linea) for linea in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(lineas[0]['tipo'], 'encabezado')
+        self.assertEqual([linea['folio'] for linea in lineas[1:-1]], ['1', '2', '3', '4', '5'])
+        self.assertEqual(len(lineas[1]['movimientos']), 2)
+        self.assertEqual(lineas[-1]['tipo'], 'resumen')
+        self.assertEqual(lineas[-1]['total_transacciones'], 5)
+
+    def test_csv_streaming(self):
+        """Test que el CSV se entregue en streaming por fragmentos de filas"""
+        with patch('apps.reportes.exportadores.FILAS_POR_FRAGMENTO_CSV', 4):
+            response = self._libro_diario(formato='csv')
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'text/csv')
+            fragmentos = list(response.streaming_content)
+
+        # Encabezado inmediato y 10 movimientos en fragmentos de 4, 4 y 2 filas
+        self.assertEqual(len(fragmentos), 4)
+        filas = list(csv.reader(b''.join(fragmentos).decode().splitlines()))
+        self.assertEqual(filas[0][:2], ['Fecha', 'Folio'])
+        self.assertEqual(len(filas), 11)
+        self.assertEqual(filas[1][1], '1')
+        self.assertEqual(filas[1][7], '10.00')
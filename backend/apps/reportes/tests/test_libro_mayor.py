@@ -0,0 +1,121 @@
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from openpyxl import load_workbook
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class LibroMayorTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para el libro mayor con saldos acumulados en la base de datos"""
+
+    formato_folio = '{:04d}'
+
+    def setUp(self):
+        super().setUp()
+        # Saldo inicial anterior al período y movimientos del período
+        self._venta(date(2024, 4, 30), Decimal('1000.00'))
+        for dia, importe in [(3, '10.00'), (3, '20.00'), (9, '30.00'), (15, '40.00'), (20, '50.00')]:
+            self._venta(date(2024, 5, dia), Decimal(importe))
+
+    def _venta(self, fecha, importe, cuenta=None):
+        self.crear_poliza(cuenta or self.banco, self.ventas, importe, fecha=fecha, concepto='Venta')
+
+    def _libro_mayor(self, **params):
+        params.update({'fecha_inicio': '2024-05-01', 'fecha_fin': '2024-05-31'})
+        response = self.client.get('/api/reportes/reportes/libro_mayor/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_saldos_acumulados(self):
+        """Test que el saldo acumulado y los totales coincidan por cuenta"""
+        data = self._libro_mayor()
+        cuentas = {c['cuenta']['codigo']: c for c in data['libro_mayor']}
+
+        banco = cuentas['1.1']
+        self.assertEqual(Decimal(banco['saldo_inicial']), Decimal('1000.00'))
+        self.assertEqual(
+            [Decimal(m['saldo']) for m in banco['movimientos']],
+            [Decimal('1010.00'), Decimal('1030.00'), Decimal('1060.00'), Decimal('1100.00'), Decimal('1150.00')]
+        )
+        self.assertEqual(Decimal(banco['totales_periodo']['debe']), Decimal('150.00'))
+        self.assertEqual(Decimal(banco['saldo_final']), Decimal('1150.00'))
+
+        ventas = cuentas['4.1']
+        self.assertEqual(Decimal(ventas['totales_periodo']['haber']), Decimal('150.00'))
+        self.assertEqual(Decimal(ventas['saldo_final']), Decimal('1150.00'))
+        self.assertEqual(data['resumen']['total_movimientos'], 10)
+
+    def test_consultas_constantes(self):
+        """Test que el número de consultas no dependa del número de cuentas"""
+        with CaptureQueriesContext(connection) as pocas:
+            self._libro_mayor()
+
+        for i in range(10):
+            cuenta = self.crear_cuenta(f'1.{i + 2}', f'BANCO {i + 2}', 'ACTIVO', 'DEUDORA')
+            self._venta(date(2024, 5, 10), Decimal('5.00'), cuenta=cuenta)
+
+        with CaptureQueriesContext(connection) as muchas:
+            data = self._libro_mayor()
+
+        self.assertEqual(len(data['libro_mayor']), 12)
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+
+    def test_paginacion_por_cuenta(self):
+        """Test que las páginas de una cuenta continúen el saldo acumulado"""
+        completo = self._libro_mayor(cuenta_id=self.banco.id)['libro_mayor'][0]
+
+        movimientos = []
+        cursor = None
+        while True:
+            params = {'cuenta_id': self.banco.id, 'limite': 2}
+            if cursor:
+                params['despues'] = cursor
+            cuenta = self._libro_mayor(**params)['libro_mayor'][0]
+            movimientos += cuenta['movimientos']
+            self.assertEqual(cuenta['saldo_final'], completo['saldo_final'])
+            self.assertEqual(cuenta['totales_periodo'], completo['totales_periodo'])
+            cursor = cuenta['paginacion']['siguiente']
+            if not cursor:
+                break
+
+        self.assertEqual(movimientos, completo['movimientos'])
+
+    def test_exportar_pagina(self):
+        """Test que la descarga con cursor respete el límite de la página"""
+        primera = self._libro_mayor(cuenta_id=self.banco.id, limite=2)['libro_mayor'][0]
+        response = self.client.get('/api/reportes/reportes/libro_mayor/', {
+            'fecha_inicio': '2024-05-01', 'fecha_fin': '2024-05-31', 'formato': 'excel',
+            'cuenta_id': self.banco.id, 'limite': 2, 'despues': primera['paginacion']['siguiente']
+        })
+        self.assertEqual(response.status_code, 200)
+
+        hoja = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        filas = [fila for fila in hoja.iter_rows(min_row=6, values_only=True) if fila[0] == '1.1']
+
+        self.assertEqual(filas[0][4], 'SALDO INICIAL')
+        self.assertEqual(filas[0][7], 1030)
+        self.assertEqual([fila[7] for fila in filas[1:]], [1060, 1100])
+
+    def test_paginacion_requiere_cuenta(self):
+        """Test que la paginación sin cuenta específica regrese error"""
+        response = self.client.get('/api/reportes/reportes/libro_mayor/', {'limite': 2})
+        self.assertEqual(response.status_code, 400)
+
+    def test_exportar_excel(self):
+        """Test que el Excel del libro mayor incluya saldo inicial y saldo corrido por cuenta"""
+        response = self.client.get('/api/reportes/reportes/libro_mayor/', {
+            'fecha_inicio': '2024-05-01', 'fecha_fin': '2024-05-31', 'formato': 'excel'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('libro_mayor_2024-05-01_2024-05-31.xlsx', response['Content-Disposition'])
+
+        hoja = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        filas = [fila for fila in hoja.iter_rows(min_row=6, values_only=True) if fila[0] == '1.1']
+
+        self.assertEqual(filas[0][4], 'SALDO INICIAL')
+        self.assertEqual(filas[0][7], 1000)
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(filas[-1][7], 1150)
@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from apps.transacciones.models import TransaccionContable, MovimientoContable
+from apps.reportes.models import ReporteJob
+from apps.reportes.tasks import generar_reporte
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class ReporteJobTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para la generación asíncrona de reportes"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self._venta(Decimal('100.00'))
+
+        # Ejecutar la tarea en el mismo proceso en lugar de enviarla al broker
+        patcher = mock.patch(
+            'apps.reportes.tasks.generar_reporte.delay',
+            side_effect=lambda job_id: generar_reporte.apply(args=[job_id])
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _venta(self, importe):
+        self.crear_poliza(self.banco, self.ventas, importe, concepto='Venta')
+
+    def _solicitar(self, formato='excel', reporte='balanza_comprobacion', parametros=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reportes/trabajos/', {
+                'reporte': reporte,
+                'formato': formato,
+                'parametros': parametros or {'fecha': '2024-12-31'}
+            }, format='json')
+        return response
+
+    def test_generar_y_descargar(self):
+        """Test que el trabajo genere el archivo y se pueda descargar"""
+        response = self._solicitar()
+        self.assertEqual(response.status_code, 202)
+
+        estado = self.client.get(f"/api/reportes/trabajos/{response.json()['id']}/").json()
+        self.assertEqual(estado['estado'], 'COMPLETADO')
+        self.assertEqual(estado['progreso'], 100)
+        self.assertIsNotNone(estado['url_descarga'])
+
+        descarga = self.client.get(f"/api/reportes/trabajos/{estado['id']}/descargar/")
+        self.assertEqual(descarga.status_code, 200)
+        self.assertTrue(b''.join(descarga.streaming_content).startswith(b'PK'))
+        self.assertIn('balanza_comprobacion_2024-12-31.xlsx', descarga['Content-Disposition'])
+
+    def test_reutilizar_por_version_contable(self):
+        """Test que se reutilice el archivo hasta que cambie la versión contable"""
+        primero = self._solicitar().json()
+
+        segundo = self._solicitar()
+        self.assertEqual(segundo.status_code, 200)
+        self.assertTrue(segundo.json()['reutilizado'])
+        self.assertEqual(segundo.json()['id'], primero['id'])
+
+        self._venta(Decimal('50.00'))
+        tercero = self._solicitar()
+        self.assertEqual(tercero.status_code, 202)
+        self.assertNotEqual(tercero.json()['id'], primero['id'])
+        self.assertEqual(ReporteJob.objects.filter(estado='COMPLETADO').count(), 2)
+
+    def test_libro_diario_no_se_reutiliza(self):
+        """Test que el libro diario se regenere aunque no cambie la versión contable"""
+        parametros = {'fecha_inicio': '2024-03-01', 'fecha_fin': '2024-03-31'}
+        primero = self._solicitar('csv', 'libro_diario', parametros)
+        self.assertEqual(primero.status_code, 202)
+
+        borrador = TransaccionContable.objects.create(
+            empresa=self.empresa,
+            folio='BORRADOR-1',
+            fecha=date(2024, 3, 2),
+            concepto='Venta pendiente',
+            creado_por=self.user
+        )
+        MovimientoContable.objects.create(
+            transaccion=borrador, cuenta=self.banco, debe=Decimal('30.00'), creado_por=self.user
+        )
+        segundo = self._solicitar('csv', 'libro_diario', parametros)
+        self.assertEqual(segundo.status_code, 202)
+        self.assertNotEqual(segundo.json()['id'], primero.json()['id'])
+
+        descarga = self.client.get(f"/api/reportes/trabajos/{segundo.json()['id']}/descargar/")
+        self.assertIn(b'BORRADOR-1', b''.join(descarga.streaming_content))
+
+    def test_reporte_invalido(self):
+        """Test que un reporte desconocido regrese error de validación"""
+        response = self.client.post('/api/reportes/trabajos/', {
+            'reporte': 'inexistente', 'formato': 'pdf'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_pdf_libro_mayor(self):
+        """Test que el PDF del libro mayor se genere en el trabajo"""
+        response = self._solicitar('pdf', 'libro_mayor', {
+            'fecha_inicio': '2024-03-01', 'fecha_fin': '2024-03-31'
+        })
+        self.assertEqual(response.status_code, 202)
+
+        descarga = self.client.get(f"/api/reportes/trabajos/{response.json()['id']}/descargar/")
+        self.assertEqual(descarga.status_code, 200)
+        self.assertTrue(b''.join(descarga.streaming_content).startswith(b'%PDF'))
+        self.assertIn('libro_mayor_2024-03-01_2024-03-31.pdf', descarga['Content-Disposition'])
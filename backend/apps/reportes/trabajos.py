@@ -0,0 +1,122 @@
+"""
+Generación de reportes fuera del ciclo de la petición
+Los trabajos ejecutan las mismas acciones de ReporteViewSet con los parámetros
+guardados, de modo que el contenido es idéntico al de la descarga directa
+"""
+import hashlib
+import json
+import re
+import tempfile
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.http import FileResponse, HttpRequest, QueryDict, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from .cache import normalizar_parametros
+from .models import ReporteJob
+
+# Reportes que incluyen pólizas sin contabilizar: la versión contable no
+# cambia al editarlas, así que su archivo no se reutiliza
+REPORTES_SIN_REUTILIZAR = {'libro_diario'}
+
+EXTENSIONES = {
+    'json': 'json',
+    'pdf': 'pdf',
+    'excel': 'xlsx',
+    'csv': 'csv',
+}
+
+
+def huella_reporte(reporte, formato, parametros):
+    """Huella estable de un reporte: nombre, formato y parámetros normalizados"""
+    texto = json.dumps([reporte, formato, normalizar_parametros(parametros)])
+    return hashlib.sha1(texto.encode()).hexdigest()
+
+
+def solicitar_reporte(empresa, usuario, reporte, formato, parametros):
+    """
+    Crea un trabajo de reporte o reutiliza uno vigente
+    Se reutiliza el trabajo pendiente, en proceso o completado con la misma
+    huella y la versión contable actual de la empresa, salvo en los reportes
+    de REPORTES_SIN_REUTILIZAR.
+    Regresa (trabajo, creado)
+    """
+    huella = huella_reporte(reporte, formato, parametros)
+
+    if reporte not in REPORTES_SIN_REUTILIZAR:
+        existente = ReporteJob.objects.filter(
+            empresa=empresa,
+            huella=huella,
+            version_contable=empresa.version_contable,
+            estado__in=['PENDIENTE', 'PROCESANDO', 'COMPLETADO'],
+            activo=True
+        ).first()
+        if existente:
+            return existente, False
+
+    trabajo = ReporteJob.objects.create(
+        empresa=empresa,
+        reporte=reporte,
+        formato=formato,
+        parametros=parametros,
+        huella=huella,
+        version_contable=empresa.version_contable,
+        creado_por=usuario
+    )
+
+    # Encolar la tarea cuando el trabajo ya sea visible para el worker
+    from .tasks import generar_reporte
+    transaction.on_commit(lambda: generar_reporte.delay(trabajo.id))
+
+    return trabajo, True
+
+
+def ejecutar_reporte(trabajo):
+    """
+    Ejecuta la acción del reporte con los parámetros del trabajo
+    Regresa (contenido, nombre_archivo) donde contenido es un File de Django
+    """
+    from .views import ReporteViewSet
+
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = QueryDict(mutable=True)
+    http_request.GET.update({
+        clave: str(valor) for clave, valor in trabajo.parametros.items()
+    })
+    http_request.GET['formato'] = trabajo.formato
+    http_request.user = trabajo.creado_por
+    http_request.empresa = trabajo.empresa
+
+    request = Request(http_request)
+    vista = ReporteViewSet(request=request, format_kwarg=None, action=trabajo.reporte)
+    respuesta = getattr(vista, trabajo.reporte)(request)
+
+    if respuesta.status_code != 200:
+        detalle = respuesta.data if isinstance(respuesta, Response) else respuesta.content[:500]
+        raise ValueError(f'El reporte no se pudo generar: {detalle}')
+
+    if isinstance(respuesta, Response):
+        contenido = ContentFile(JSONRenderer().render(respuesta.data))
+    elif isinstance(respuesta, FileResponse):
+        # PDF y Excel ya están en un archivo temporal; se guarda sin leerlo a memoria
+        contenido = File(respuesta.file_to_stream)
+    elif isinstance(respuesta, StreamingHttpResponse):
+        # CSV y NDJSON se escriben por partes a un temporal en disco
+        temporal = tempfile.TemporaryFile()
+        for parte in respuesta.streaming_content:
+            temporal.write(parte)
+        temporal.seek(0)
+        contenido = File(temporal)
+    else:
+        contenido = ContentFile(respuesta.content)
+
+    # Usar el nombre de archivo de la descarga directa si existe
+    coincidencia = re.search(r'filename="([^"]+)"', respuesta.get('Content-Disposition', ''))
+    if coincidencia:
+        nombre = coincidencia.group(1)
+    else:
+        nombre = f'{trabajo.reporte}_{trabajo.id}.{EXTENSIONES[trabajo.formato]}'
+
+    return contenido, nombre
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReporteViewSet, reportes_root
+from .views import ReporteViewSet, ReporteJobViewSet, reportes_root
 
 router = DefaultRouter()
 router.register(r'reportes', ReporteViewSet, basename='reporte')
+router.register(r'trabajos', ReporteJobViewSet, basename='reporte-trabajo')
 
 urlpatterns = [
     path('', reportes_root, name='reportes-root'),
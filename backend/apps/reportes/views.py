@@ -2,13 +2,98 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Sum, Q, F
-from django.http import HttpResponse
+import json
+import os
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import (
+    Sum, Q, F, Count, Prefetch, Case, When, DecimalField, Window, RowRange
+)
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
 from decimal import Decimal
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from apps.transacciones.models import TransaccionContable, MovimientoContable
+from apps.transacciones.saldos import (
+    AGRUPACIONES_PERIODO, calcular_saldos, calcular_saldos_por_periodo, acumular_por_nivel,
+    serie_ingresos_gastos
+)
 from apps.catalogo_cuentas.models import CuentaContable
 from apps.empresas.models import Empresa
+from .cache import reporte_en_cache, reporte_medido, purgar_reportes, estadisticas_cache
+from .models import ReporteJob
+from .serializers import ReporteJobSerializer, ReporteJobCreateSerializer
+from .trabajos import solicitar_reporte
+from .exportadores import Columna, FilaSeccion, FilaTotal, exportar_csv, exportar_excel, exportar_pdf
+from .flujo import (
+    calcular_flujo, codigos_cuentas_efectivo, cuentas_efectivo, guardar_cuentas_efectivo,
+    movimientos_efectivo, saldos_iniciales_efectivo
+)
+from apps.core.utils import codificar_cursor, decodificar_cursor, filtro_posterior
+
+# Tamaño máximo de página en la paginación keyset de los libros
+LIMITE_MAXIMO_PAGINA = 1000
+
+# Orden de los movimientos en el libro mayor (también define el cursor keyset)
+CAMPOS_ORDEN_MAYOR = ['fecha', 'transaccion__folio', 'id']
+
+# Horizonte máximo de la gráfica de ingresos vs gastos
+MESES_MAXIMOS_GRAFICA = 120
+
+# Filas que se leen del cursor del servidor por bloque al generar respuestas streaming
+TAMANO_BLOQUE_STREAMING = 500
+
+# Formatos de descarga de los reportes (además de la respuesta JSON)
+FORMATOS_DESCARGA = ('pdf', 'excel', 'csv')
+
+# Columnas de las exportaciones tabulares
+COLUMNAS_BALANZA = [
+    Columna('Código', 12, 'texto'),
+    Columna('Cuenta', 30, 'texto'),
+    Columna('Tipo', 10, 'texto'),
+    Columna('Cargos', 15, 'moneda'),
+    Columna('Abonos', 15, 'moneda'),
+    Columna('Saldo Deudor', 15, 'moneda'),
+    Columna('Saldo Acreedor', 15, 'moneda'),
+]
+
+COLUMNAS_IMPORTES_CUENTA = [
+    Columna('Código', 12, 'texto'),
+    Columna('Cuenta', 40, 'texto'),
+    Columna('Importe', 18, 'moneda'),
+]
+
+COLUMNAS_LIBRO_DIARIO = [
+    Columna('Fecha', 12, 'fecha'),
+    Columna('Folio', 12, 'texto'),
+    Columna('Tipo', 12, 'texto'),
+    Columna('Estado', 15, 'texto'),
+    Columna('Código', 12, 'texto'),
+    Columna('Cuenta', 30, 'texto'),
+    Columna('Concepto', 40, 'texto'),
+    Columna('Debe', 15, 'moneda'),
+    Columna('Haber', 15, 'moneda'),
+]
+
+COLUMNAS_LIBRO_MAYOR = [
+    Columna('Código', 12, 'texto'),
+    Columna('Cuenta', 30, 'texto'),
+    Columna('Fecha', 12, 'fecha'),
+    Columna('Folio', 12, 'texto'),
+    Columna('Concepto', 40, 'texto'),
+    Columna('Debe', 15, 'moneda'),
+    Columna('Haber', 15, 'moneda'),
+    Columna('Saldo', 15, 'moneda'),
+]
+
+COLUMNAS_FLUJO_EFECTIVO = [
+    Columna('Fecha', 12, 'fecha'),
+    Columna('Folio', 12, 'texto'),
+    Columna('Cuenta', 30, 'texto'),
+    Columna('Concepto', 40, 'texto'),
+    Columna('Tipo', 12, 'texto'),
+    Columna('Entrada', 15, 'moneda'),
+    Columna('Salida', 15, 'moneda'),
+    Columna('Saldo', 15, 'moneda'),
+]
 
 
 class ReporteViewSet(viewsets.ViewSet):
@@ -34,7 +119,29 @@ class ReporteViewSet(viewsets.ViewSet):
         ).first()
         return acceso.empresa if acceso else None
     
+    @action(detail=False, methods=['get'], url_path='cache/estadisticas')
+    def cache_estadisticas(self, request):
+        """Aciertos y fallos de la caché de reportes de la empresa"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return Response({'error': 'No se pudo determinar la empresa'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(estadisticas_cache(empresa))
+    
+    @action(detail=False, methods=['post'], url_path='cache/purgar')
+    def cache_purgar(self, request):
+        """Descarta los reportes en caché de la empresa"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return Response({'error': 'No se pudo determinar la empresa'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        purgar_reportes(empresa)
+        return Response({'mensaje': 'Caché de reportes purgada', 'empresa': empresa.nombre})
+    
     @action(detail=False, methods=['get'])
+    @reporte_en_cache('balanza_comprobacion')
     def balanza_comprobacion(self, request):
         """Genera la balanza de comprobación"""
         empresa = self.get_empresa()
@@ -50,58 +157,50 @@ class ReporteViewSet(viewsets.ViewSet):
         # Obtener formato de descarga
         formato = request.query_params.get('formato', 'json')
         
-        # Obtener todas las cuentas con movimientos
-        cuentas_con_movimientos = MovimientoContable.objects.filter(
-            transaccion__empresa=empresa,
-            transaccion__estado='CONTABILIZADA',
-            transaccion__fecha__lte=fecha_corte,
-            activo=True
-        ).values('cuenta').distinct()
+        # Nivel de acumulación opcional: 1, 2, 3... o 'todos'
+        nivel = request.query_params.get('nivel')
+        if nivel and nivel != 'todos':
+            try:
+                nivel = int(nivel)
+                if nivel < 1:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': "nivel debe ser un entero positivo o 'todos'"}, 
+                              status=status.HTTP_400_BAD_REQUEST)
         
-        balanza = []
+        # Saldos de todas las cuentas con movimientos en una sola consulta
+        saldos = calcular_saldos(empresa, fecha_fin=fecha_corte)
+        
+        # Los totales se calculan sobre las cuentas con movimientos (sin subtotales)
         total_debe = Decimal('0.00')
         total_haber = Decimal('0.00')
-        
-        for cuenta_dict in cuentas_con_movimientos:
-            cuenta = CuentaContable.objects.get(id=cuenta_dict['cuenta'])
-            
-            # Calcular saldos
-            movimientos = MovimientoContable.objects.filter(
-                cuenta=cuenta,
-                transaccion__empresa=empresa,
-                transaccion__estado='CONTABILIZADA',
-                transaccion__fecha__lte=fecha_corte,
-                activo=True
-            )
-            
-            suma_debe = movimientos.aggregate(Sum('debe'))['debe__sum'] or Decimal('0.00')
-            suma_haber = movimientos.aggregate(Sum('haber'))['haber__sum'] or Decimal('0.00')
-            
-            # Determinar saldo según naturaleza
-            if cuenta.naturaleza == 'DEUDORA':
-                saldo = suma_debe - suma_haber
-                saldo_debe = saldo if saldo > 0 else Decimal('0.00')
-                saldo_haber = abs(saldo) if saldo < 0 else Decimal('0.00')
-            else:
-                saldo = suma_haber - suma_debe
-                saldo_haber = saldo if saldo > 0 else Decimal('0.00')
-                saldo_debe = abs(saldo) if saldo < 0 else Decimal('0.00')
-            
+        for cuenta in saldos:
+            saldo_debe, saldo_haber = self._columnas_saldo(cuenta)
             total_debe += saldo_debe
             total_haber += saldo_haber
-            
-            balanza.append({
-                'cuenta_codigo': cuenta.codigo,
-                'cuenta_nombre': cuenta.nombre,
-                'tipo': cuenta.tipo,
-                'cargos': suma_debe,
-                'abonos': suma_haber,
+        
+        if nivel:
+            # Subtotales por nivel del catálogo
+            filas = acumular_por_nivel(empresa, saldos, None if nivel == 'todos' else nivel)
+        else:
+            filas = saldos
+        
+        balanza = []
+        for cuenta in filas:
+            saldo_debe, saldo_haber = self._columnas_saldo(cuenta)
+            fila = {
+                'cuenta_codigo': cuenta['codigo'],
+                'cuenta_nombre': cuenta['nombre'],
+                'tipo': cuenta['tipo'],
+                'cargos': cuenta['cargos'],
+                'abonos': cuenta['abonos'],
                 'saldo_deudor': saldo_debe,
                 'saldo_acreedor': saldo_haber
-            })
-        
-        # Ordenar por código de cuenta
-        balanza.sort(key=lambda x: x['cuenta_codigo'])
+            }
+            if nivel:
+                fila['nivel'] = cuenta['nivel']
+                fila['es_subtotal'] = cuenta['es_subtotal']
+            balanza.append(fila)
         
         data = {
             'fecha_corte': fecha_corte,
@@ -115,16 +214,43 @@ class ReporteViewSet(viewsets.ViewSet):
         }
         
         # Generar descarga según formato
-        if formato == 'pdf':
-            return self._generar_pdf_balanza(data)
-        elif formato == 'excel':
-            return self._generar_excel_balanza(data)
-        elif formato == 'csv':
-            return self._generar_csv_balanza(data)
+        if formato in FORMATOS_DESCARGA:
+            notas = []
+            if data['totales']['balanceado']:
+                notas.append('✅ La balanza está correctamente balanceada')
+            return self._exportar(
+                formato,
+                f'balanza_comprobacion_{fecha_corte}',
+                'Balanza de Comprobación',
+                ['BALANZA DE COMPROBACIÓN', data['empresa'],
+                 f"Al {fecha_corte.strftime('%d de %B de %Y')}"],
+                COLUMNAS_BALANZA,
+                self._filas_balanza(data),
+                notas=notas
+            )
+        return Response(data)
+    
+    def _exportar(self, formato, nombre, hoja, titulos, columnas, filas, notas=None):
+        """Descarga tabular de un reporte en el formato solicitado (pdf, excel o csv)"""
+        if formato == 'excel':
+            return exportar_excel(f'{nombre}.xlsx', hoja, titulos, columnas, filas)
+        if formato == 'csv':
+            return exportar_csv(f'{nombre}.csv', columnas, filas)
+        return exportar_pdf(f'{nombre}.pdf', titulos, columnas, filas, notas=notas)
+    
+    def _columnas_saldo(self, cuenta):
+        """Separa el saldo en columnas deudora y acreedora según la naturaleza"""
+        saldo = cuenta['saldo']
+        if cuenta['naturaleza'] == 'DEUDORA':
+            saldo_debe = saldo if saldo > 0 else Decimal('0.00')
+            saldo_haber = abs(saldo) if saldo < 0 else Decimal('0.00')
         else:
-            return Response(data)
+            saldo_haber = saldo if saldo > 0 else Decimal('0.00')
+            saldo_debe = abs(saldo) if saldo < 0 else Decimal('0.00')
+        return saldo_debe, saldo_haber
     
     @action(detail=False, methods=['get'])
+    @reporte_en_cache('estado_resultados')
     def estado_resultados(self, request):
         """Genera el estado de resultados"""
         empresa = self.get_empresa()
@@ -132,6 +258,10 @@ class ReporteViewSet(viewsets.ViewSet):
             return Response({'error': 'No se pudo determinar la empresa'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
+        # Modo comparativo por periodos (?periodos=mensual|trimestral|anual)
+        if request.query_params.get('periodos'):
+            return self._estado_resultados_comparativo(request, empresa)
+        
         # Obtener período
         fecha_inicio = request.query_params.get('fecha_inicio')
         fecha_fin = request.query_params.get('fecha_fin', date.today())
@@ -144,38 +274,18 @@ class ReporteViewSet(viewsets.ViewSet):
         elif isinstance(fecha_inicio, str):
             fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
         
-        # Filtro base para movimientos del período
-        filtro_base = Q(
-            transaccion__empresa=empresa,
-            transaccion__estado='CONTABILIZADA',
-            transaccion__fecha__gte=fecha_inicio,
-            transaccion__fecha__lte=fecha_fin,
-            activo=True
+        # Saldos del período de cuentas de resultados en una sola consulta
+        saldos = calcular_saldos(
+            empresa,
+            fecha_fin=fecha_fin,
+            fecha_inicio=fecha_inicio,
+            tipos=['INGRESO', 'COSTO', 'GASTO']
         )
         
-        # Calcular ingresos
-        ingresos = MovimientoContable.objects.filter(
-            filtro_base,
-            cuenta__tipo='INGRESO'
-        ).aggregate(
-            total=Sum('haber') - Sum('debe')
-        )['total'] or Decimal('0.00')
-        
-        # Calcular costos
-        costos = MovimientoContable.objects.filter(
-            filtro_base,
-            cuenta__tipo='COSTO'
-        ).aggregate(
-            total=Sum('debe') - Sum('haber')
-        )['total'] or Decimal('0.00')
-        
-        # Calcular gastos
-        gastos = MovimientoContable.objects.filter(
-            filtro_base,
-            cuenta__tipo='GASTO'
-        ).aggregate(
-            total=Sum('debe') - Sum('haber')
-        )['total'] or Decimal('0.00')
+        # Totales por tipo de cuenta
+        ingresos = self._total_resultados(saldos, 'INGRESO')
+        costos = self._total_resultados(saldos, 'COSTO')
+        gastos = self._total_resultados(saldos, 'GASTO')
         
         # Calcular utilidad
         utilidad_bruta = ingresos - costos
@@ -183,11 +293,11 @@ class ReporteViewSet(viewsets.ViewSet):
         utilidad_neta = utilidad_operativa  # En MVP no consideramos impuestos
         
         # Detalle por cuenta
-        detalle_ingresos = self._obtener_detalle_cuentas(empresa, 'INGRESO', fecha_inicio, fecha_fin)
-        detalle_costos = self._obtener_detalle_cuentas(empresa, 'COSTO', fecha_inicio, fecha_fin)
-        detalle_gastos = self._obtener_detalle_cuentas(empresa, 'GASTO', fecha_inicio, fecha_fin)
+        detalle_ingresos = self._obtener_detalle_cuentas(saldos, 'INGRESO')
+        detalle_costos = self._obtener_detalle_cuentas(saldos, 'COSTO')
+        detalle_gastos = self._obtener_detalle_cuentas(saldos, 'GASTO')
         
-        return Response({
+        data = {
             'periodo': {
                 'fecha_inicio': fecha_inicio,
                 'fecha_fin': fecha_fin
@@ -206,46 +316,183 @@ class ReporteViewSet(viewsets.ViewSet):
                 'costos': detalle_costos,
                 'gastos': detalle_gastos
             }
-        })
+        }
+        
+        formato = request.query_params.get('formato')
+        if formato in FORMATOS_DESCARGA:
+            return self._exportar(
+                formato,
+                f'estado_resultados_{fecha_inicio}_{fecha_fin}',
+                'Estado de Resultados',
+                ['ESTADO DE RESULTADOS', empresa.nombre, f'Del {fecha_inicio} al {fecha_fin}'],
+                COLUMNAS_IMPORTES_CUENTA,
+                self._filas_resultados(data)
+            )
+        return Response(data)
     
-    def _obtener_detalle_cuentas(self, empresa, tipo_cuenta, fecha_inicio, fecha_fin):
-        """Obtiene el detalle de movimientos por tipo de cuenta"""
-        cuentas = CuentaContable.objects.filter(
-            empresa=empresa,
-            tipo=tipo_cuenta,
-            activo=True
+    def _filas_resultados(self, data):
+        """Filas del estado de resultados por sección con totales y utilidades"""
+        resumen = data['resumen']
+        secciones = [
+            ('INGRESOS', 'ingresos'),
+            ('COSTOS', 'costos'),
+            ('GASTOS', 'gastos'),
+        ]
+        for titulo, clave in secciones:
+            yield FilaSeccion(titulo)
+            for cuenta in data['detalle'][clave]:
+                yield (cuenta['cuenta_codigo'], cuenta['cuenta_nombre'], cuenta['saldo'])
+            yield FilaTotal(('', f'TOTAL {titulo}', resumen[clave]))
+        yield FilaTotal(('', 'UTILIDAD BRUTA', resumen['utilidad_bruta']))
+        yield FilaTotal(('', 'UTILIDAD OPERATIVA', resumen['utilidad_operativa']))
+        yield FilaTotal(('', 'UTILIDAD NETA', resumen['utilidad_neta']))
+    
+    def _estado_resultados_comparativo(self, request, empresa):
+        """Estado de resultados con una columna por periodo a partir de una consulta agrupada"""
+        agrupacion = request.query_params.get('periodos')
+        if agrupacion not in AGRUPACIONES_PERIODO:
+            return Response({'error': f"periodos debe ser uno de: {', '.join(AGRUPACIONES_PERIODO)}"}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        # Obtener rango
+        try:
+            fecha_fin = request.query_params.get('hasta')
+            fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date() if fecha_fin else date.today()
+            fecha_inicio = request.query_params.get('desde')
+            fecha_inicio = (datetime.strptime(fecha_inicio, '%Y-%m-%d').date() if fecha_inicio
+                            else date(fecha_fin.year, 1, 1))
+        except ValueError:
+            return Response({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        if fecha_inicio > fecha_fin:
+            return Response({'error': 'La fecha desde debe ser anterior a la fecha hasta'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        periodos, cuentas = calcular_saldos_por_periodo(
+            empresa, fecha_inicio, fecha_fin, agrupacion, tipos=['INGRESO', 'COSTO', 'GASTO']
         )
         
-        detalle = []
+        # Importes por cuenta y columna
+        detalle = {'INGRESO': [], 'COSTO': [], 'GASTO': []}
+        totales = {tipo: [Decimal('0.00')] * len(periodos) for tipo in detalle}
         for cuenta in cuentas:
-            movimientos = MovimientoContable.objects.filter(
-                cuenta=cuenta,
-                transaccion__empresa=empresa,
-                transaccion__estado='CONTABILIZADA',
-                transaccion__fecha__gte=fecha_inicio,
-                transaccion__fecha__lte=fecha_fin,
-                activo=True
+            importes = [self._importe_resultados(cuenta['tipo'], columna) for columna in cuenta['periodos']]
+            totales[cuenta['tipo']] = [total + importe for total, importe in zip(totales[cuenta['tipo']], importes)]
+            if cuenta['activa'] and any(importes):
+                detalle[cuenta['tipo']].append({
+                    'cuenta_codigo': cuenta['codigo'],
+                    'cuenta_nombre': cuenta['nombre'],
+                    'importes': importes,
+                    'total': sum(importes, Decimal('0.00'))
+                })
+        
+        # Utilidades por columna
+        utilidad_bruta = [i - c for i, c in zip(totales['INGRESO'], totales['COSTO'])]
+        utilidad_operativa = [u - g for u, g in zip(utilidad_bruta, totales['GASTO'])]
+        
+        data = {
+            'periodo': {
+                'fecha_inicio': fecha_inicio,
+                'fecha_fin': fecha_fin,
+                'agrupacion': agrupacion
+            },
+            'empresa': empresa.nombre,
+            'columnas': [
+                {
+                    'etiqueta': periodo['etiqueta'],
+                    'fecha_inicio': periodo['fecha_inicio'],
+                    'fecha_fin': periodo['fecha_fin']
+                }
+                for periodo in periodos
+            ],
+            'resumen': {
+                'ingresos': totales['INGRESO'],
+                'costos': totales['COSTO'],
+                'utilidad_bruta': utilidad_bruta,
+                'gastos': totales['GASTO'],
+                'utilidad_operativa': utilidad_operativa,
+                'utilidad_neta': utilidad_operativa  # En MVP no consideramos impuestos
+            },
+            'detalle': {
+                'ingresos': detalle['INGRESO'],
+                'costos': detalle['COSTO'],
+                'gastos': detalle['GASTO']
+            }
+        }
+        
+        formato = request.query_params.get('formato')
+        if formato in FORMATOS_DESCARGA:
+            columnas = [Columna('Código', 12, 'texto'), Columna('Cuenta', 30, 'texto')]
+            columnas += [Columna(columna['etiqueta'], 15, 'moneda') for columna in data['columnas']]
+            columnas.append(Columna('Total', 15, 'moneda'))
+            return self._exportar(
+                formato,
+                f'estado_resultados_{agrupacion}_{fecha_inicio}_{fecha_fin}',
+                'Estado de Resultados',
+                ['ESTADO DE RESULTADOS COMPARATIVO', empresa.nombre,
+                 f'Del {fecha_inicio} al {fecha_fin}'],
+                columnas,
+                self._filas_resultados_comparativo(data)
             )
+        return Response(data)
+    
+    def _filas_resultados_comparativo(self, data):
+        """Filas del estado de resultados comparativo con una columna por periodo y el total"""
+        def con_total(importes):
+            return tuple(importes) + (sum(importes, Decimal('0.00')),)
+        
+        secciones = [
+            ('INGRESOS', 'ingresos'),
+            ('COSTOS', 'costos'),
+            ('GASTOS', 'gastos'),
+        ]
+        for titulo, clave in secciones:
+            yield FilaSeccion(titulo)
+            for cuenta in data['detalle'][clave]:
+                yield (cuenta['cuenta_codigo'], cuenta['cuenta_nombre']) + con_total(cuenta['importes'])
+            yield FilaTotal(('', f'TOTAL {titulo}') + con_total(data['resumen'][clave]))
+        utilidades = [
+            ('UTILIDAD BRUTA', 'utilidad_bruta'),
+            ('UTILIDAD OPERATIVA', 'utilidad_operativa'),
+            ('UTILIDAD NETA', 'utilidad_neta'),
+        ]
+        for titulo, clave in utilidades:
+            yield FilaTotal(('', titulo) + con_total(data['resumen'][clave]))
+    
+    def _importe_resultados(self, tipo_cuenta, cuenta):
+        """Importe de una cuenta de resultados (ingresos acreedores, costos y gastos deudores)"""
+        if tipo_cuenta in ['COSTO', 'GASTO']:
+            return cuenta['cargos'] - cuenta['abonos']
+        return cuenta['abonos'] - cuenta['cargos']
+    
+    def _total_resultados(self, saldos, tipo_cuenta):
+        """Suma los importes de un tipo de cuenta de resultados"""
+        return sum(
+            (self._importe_resultados(tipo_cuenta, cuenta)
+             for cuenta in saldos if cuenta['tipo'] == tipo_cuenta),
+            Decimal('0.00')
+        )
+    
+    def _obtener_detalle_cuentas(self, saldos, tipo_cuenta):
+        """Obtiene el detalle de movimientos por tipo de cuenta"""
+        detalle = []
+        for cuenta in saldos:
+            if cuenta['tipo'] != tipo_cuenta or not cuenta['activa']:
+                continue
             
-            if tipo_cuenta in ['COSTO', 'GASTO']:
-                saldo = movimientos.aggregate(
-                    total=Sum('debe') - Sum('haber')
-                )['total'] or Decimal('0.00')
-            else:  # INGRESO
-                saldo = movimientos.aggregate(
-                    total=Sum('haber') - Sum('debe')
-                )['total'] or Decimal('0.00')
-            
+            saldo = self._importe_resultados(tipo_cuenta, cuenta)
             if saldo != 0:
                 detalle.append({
-                    'cuenta_codigo': cuenta.codigo,
-                    'cuenta_nombre': cuenta.nombre,
+                    'cuenta_codigo': cuenta['codigo'],
+                    'cuenta_nombre': cuenta['nombre'],
                     'saldo': saldo
                 })
         
         return detalle
     
     @action(detail=False, methods=['get'])
+    @reporte_en_cache('balance_general')
     def balance_general(self, request):
         """Genera el balance general (Estado de Situación Financiera)"""
         empresa = self.get_empresa()
@@ -259,14 +506,15 @@ class ReporteViewSet(viewsets.ViewSet):
             fecha_corte = datetime.strptime(fecha_corte, '%Y-%m-%d').date()
         
         # Obtener saldos por tipo
-        activos = self._calcular_saldo_tipo(empresa, 'ACTIVO', fecha_corte)
-        pasivos = self._calcular_saldo_tipo(empresa, 'PASIVO', fecha_corte)
-        capital = self._calcular_saldo_tipo(empresa, 'CAPITAL', fecha_corte)
+        saldos = calcular_saldos(empresa, fecha_fin=fecha_corte, solo_cuentas_activas=True)
+        activos = self._calcular_saldo_tipo(saldos, 'ACTIVO')
+        pasivos = self._calcular_saldo_tipo(saldos, 'PASIVO')
+        capital = self._calcular_saldo_tipo(saldos, 'CAPITAL')
         
         # Calcular resultado del ejercicio
-        ingresos = self._calcular_saldo_tipo(empresa, 'INGRESO', fecha_corte)
-        costos = self._calcular_saldo_tipo(empresa, 'COSTO', fecha_corte)
-        gastos = self._calcular_saldo_tipo(empresa, 'GASTO', fecha_corte)
+        ingresos = self._calcular_saldo_tipo(saldos, 'INGRESO')
+        costos = self._calcular_saldo_tipo(saldos, 'COSTO')
+        gastos = self._calcular_saldo_tipo(saldos, 'GASTO')
         resultado_ejercicio = ingresos['total'] - costos['total'] - gastos['total']
         
         # Total capital contable
@@ -276,7 +524,7 @@ class ReporteViewSet(viewsets.ViewSet):
         total_activos = activos['total']
         total_pasivos_capital = pasivos['total'] + total_capital
         
-        return Response({
+        data = {
             'fecha_corte': fecha_corte,
             'empresa': empresa.nombre,
             'activos': activos,
@@ -292,44 +540,46 @@ class ReporteViewSet(viewsets.ViewSet):
                 'total_pasivos_capital': total_pasivos_capital,
                 'balanceado': abs(total_activos - total_pasivos_capital) < Decimal('0.01')
             }
-        })
-    
-    def _calcular_saldo_tipo(self, empresa, tipo, fecha_corte):
-        """Calcula el saldo total por tipo de cuenta"""
-        cuentas = CuentaContable.objects.filter(
-            empresa=empresa,
-            tipo=tipo,
-            activo=True
-        )
+        }
         
+        formato = request.query_params.get('formato')
+        if formato in FORMATOS_DESCARGA:
+            return self._exportar(
+                formato,
+                f'balance_general_{fecha_corte}',
+                'Balance General',
+                ['BALANCE GENERAL', empresa.nombre, f'Al {fecha_corte}'],
+                COLUMNAS_IMPORTES_CUENTA,
+                self._filas_balance(data)
+            )
+        return Response(data)
+    
+    def _filas_balance(self, data):
+        """Filas del balance general por sección con sus totales"""
+        for titulo, seccion in [('ACTIVO', data['activos']), ('PASIVO', data['pasivos']), ('CAPITAL', data['capital'])]:
+            yield FilaSeccion(titulo)
+            for cuenta in seccion['detalle']:
+                yield (cuenta['cuenta_codigo'], cuenta['cuenta_nombre'], cuenta['saldo'])
+            if titulo == 'CAPITAL':
+                yield ('', 'Resultado del ejercicio', seccion['resultado_ejercicio'])
+            yield FilaTotal(('', f'TOTAL {titulo}', seccion['total']))
+        yield FilaTotal(('', 'TOTAL PASIVO + CAPITAL', data['verificacion']['total_pasivos_capital']))
+    
+    def _calcular_saldo_tipo(self, saldos, tipo):
+        """Calcula el saldo total por tipo de cuenta a partir de los saldos por cuenta"""
         detalle = []
         total = Decimal('0.00')
         
-        for cuenta in cuentas:
-            movimientos = MovimientoContable.objects.filter(
-                cuenta=cuenta,
-                transaccion__empresa=empresa,
-                transaccion__estado='CONTABILIZADA',
-                transaccion__fecha__lte=fecha_corte,
-                activo=True
-            )
-            
-            suma_debe = movimientos.aggregate(Sum('debe'))['debe__sum'] or Decimal('0.00')
-            suma_haber = movimientos.aggregate(Sum('haber'))['haber__sum'] or Decimal('0.00')
+        for cuenta in saldos:
+            if cuenta['tipo'] != tipo or cuenta['saldo'] == 0:
+                continue
             
-            # Calcular saldo según naturaleza
-            if cuenta.naturaleza == 'DEUDORA':
-                saldo = suma_debe - suma_haber
-            else:
-                saldo = suma_haber - suma_debe
-            
-            if saldo != 0:
-                detalle.append({
-                    'cuenta_codigo': cuenta.codigo,
-                    'cuenta_nombre': cuenta.nombre,
-                    'saldo': saldo
-                })
-                total += saldo
+            detalle.append({
+                'cuenta_codigo': cuenta['codigo'],
+                'cuenta_nombre': cuenta['nombre'],
+                'saldo': cuenta['saldo']
+            })
+            total += cuenta['saldo']
         
         return {
             'detalle': detalle,
@@ -337,6 +587,7 @@ class ReporteViewSet(viewsets.ViewSet):
         }
     
     @action(detail=False, methods=['get'])
+    @reporte_medido('libro_diario')
     def libro_diario(self, request):
         """Genera el libro diario de transacciones"""
         empresa = self.get_empresa()
@@ -356,54 +607,167 @@ class ReporteViewSet(viewsets.ViewSet):
         elif isinstance(fecha_inicio, str):
             fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
         
-        # Obtener transacciones del período
+        # Obtener transacciones del período con sus movimientos activos precargados
         transacciones = TransaccionContable.objects.filter(
             empresa=empresa,
             fecha__gte=fecha_inicio,
             fecha__lte=fecha_fin,
             activo=True
-        ).defer('tipo_personalizado').order_by('fecha', 'folio').prefetch_related('movimientos__cuenta')
+        ).defer('tipo_personalizado').order_by('fecha', 'folio', 'id').prefetch_related(
+            Prefetch(
+                'movimientos',
+                queryset=MovimientoContable.objects.filter(activo=True).select_related('cuenta'),
+                to_attr='movimientos_activos'
+            )
+        )
         
-        libro = []
-        for trans in transacciones:
-            movimientos = []
-            for mov in trans.movimientos.filter(activo=True):
-                movimientos.append({
+        periodo = {
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin
+        }
+        
+        # Modo streaming: una transacción por línea, memoria acotada
+        if request.query_params.get('stream') == 'ndjson':
+            response = StreamingHttpResponse(
+                self._libro_diario_ndjson(empresa, periodo, transacciones),
+                content_type='application/x-ndjson'
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="libro_diario_{fecha_inicio}_{fecha_fin}.ndjson"'
+            )
+            return response
+        
+        formato = request.query_params.get('formato')
+        if formato in FORMATOS_DESCARGA:
+            return self._exportar(
+                formato,
+                f'libro_diario_{fecha_inicio}_{fecha_fin}',
+                'Libro Diario',
+                ['LIBRO DIARIO', empresa.nombre, f'Del {fecha_inicio} al {fecha_fin}'],
+                COLUMNAS_LIBRO_DIARIO,
+                self._filas_libro_diario(empresa, fecha_inicio, fecha_fin)
+            )
+        
+        # Paginación keyset opcional por (fecha, folio, id)
+        paginacion = None
+        limite = request.query_params.get('limite')
+        if limite:
+            try:
+                limite = int(limite)
+                if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': f'limite debe ser un entero entre 1 y {LIMITE_MAXIMO_PAGINA}'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+            
+            despues = request.query_params.get('despues')
+            if despues:
+                try:
+                    fecha, folio, trans_id = decodificar_cursor(despues, 3)
+                    valores = [datetime.strptime(fecha, '%Y-%m-%d').date(), folio, int(trans_id)]
+                except ValueError:
+                    return Response({'error': 'Cursor inválido'}, 
+                                  status=status.HTTP_400_BAD_REQUEST)
+                transacciones = transacciones.filter(
+                    filtro_posterior(['fecha', 'folio', 'id'], valores)
+                )
+            
+            transacciones = list(transacciones[:limite + 1])
+            siguiente = None
+            if len(transacciones) > limite:
+                transacciones = transacciones[:limite]
+                ultima = transacciones[-1]
+                siguiente = codificar_cursor(ultima.fecha, ultima.folio, ultima.id)
+            paginacion = {'limite': limite, 'siguiente': siguiente}
+        
+        libro = [self._transaccion_diario(trans) for trans in transacciones]
+        
+        respuesta = {
+            'periodo': periodo,
+            'empresa': empresa.nombre,
+            'transacciones': libro,
+            'resumen': self._resumen_diario(empresa, fecha_inicio, fecha_fin)
+        }
+        if paginacion:
+            respuesta['paginacion'] = paginacion
+        
+        return Response(respuesta)
+    
+    def _transaccion_diario(self, trans):
+        """Serializa una transacción del libro diario con sus movimientos precargados"""
+        return {
+            'fecha': trans.fecha,
+            'folio': trans.folio,
+            'tipo': trans.tipo,
+            'concepto': trans.concepto,
+            'estado': trans.estado,
+            'movimientos': [
+                {
                     'cuenta_codigo': mov.cuenta.codigo,
                     'cuenta_nombre': mov.cuenta.nombre,
                     'concepto': mov.concepto or trans.concepto,
                     'debe': mov.debe,
                     'haber': mov.haber
-                })
-            
-            libro.append({
-                'fecha': trans.fecha,
-                'folio': trans.folio,
-                'tipo': trans.tipo,
-                'concepto': trans.concepto,
-                'estado': trans.estado,
-                'movimientos': movimientos,
-                'total_debe': trans.total_debe,
-                'total_haber': trans.total_haber
-            })
-        
-        return Response({
-            'periodo': {
-                'fecha_inicio': fecha_inicio,
-                'fecha_fin': fecha_fin
-            },
-            'empresa': empresa.nombre,
-            'transacciones': libro,
-            'resumen': {
-                'total_transacciones': len(libro),
-                'por_estado': {
-                    estado: len([t for t in libro if t['estado'] == estado])
-                    for estado in ['BORRADOR', 'VALIDADA', 'CONTABILIZADA', 'CANCELADA']
                 }
+                for mov in trans.movimientos_activos
+            ],
+            'total_debe': trans.total_debe,
+            'total_haber': trans.total_haber
+        }
+    
+    def _filas_libro_diario(self, empresa, fecha_inicio, fecha_fin):
+        """Filas del libro diario (un movimiento por fila) leídas por bloques de un cursor del servidor"""
+        movimientos = MovimientoContable.objects.filter(
+            empresa=empresa,
+            fecha__gte=fecha_inicio,
+            fecha__lte=fecha_fin,
+            transaccion__activo=True,
+            activo=True
+        ).order_by(
+            'fecha', 'transaccion__folio', 'transaccion_id', 'id'
+        ).values_list(
+            'fecha', 'transaccion__folio', 'transaccion__tipo', 'transaccion__estado',
+            'cuenta__codigo', 'cuenta__nombre', 'concepto', 'transaccion__concepto', 'debe', 'haber'
+        )
+        
+        for (fecha, folio, tipo, estado, codigo, nombre,
+             concepto, concepto_transaccion, debe, haber) in movimientos.iterator(chunk_size=TAMANO_BLOQUE_STREAMING):
+            yield (fecha, folio, tipo, estado, codigo, nombre, concepto or concepto_transaccion, debe, haber)
+    
+    def _resumen_diario(self, empresa, fecha_inicio, fecha_fin):
+        """Conteo de transacciones del período por estado en una consulta agrupada"""
+        conteos = dict(
+            TransaccionContable.objects.filter(
+                empresa=empresa,
+                fecha__gte=fecha_inicio,
+                fecha__lte=fecha_fin,
+                activo=True
+            ).values_list('estado').annotate(total=Count('id')).order_by()
+        )
+        return {
+            'total_transacciones': sum(conteos.values()),
+            'por_estado': {
+                estado: conteos.get(estado, 0)
+                for estado in ['BORRADOR', 'VALIDADA', 'CONTABILIZADA', 'CANCELADA']
             }
-        })
+        }
+    
+    def _libro_diario_ndjson(self, empresa, periodo, transacciones):
+        """Genera el libro diario como NDJSON recorriendo un cursor del servidor por bloques"""
+        yield json.dumps({'tipo': 'encabezado', 'empresa': empresa.nombre, 'periodo': periodo},
+                         cls=DjangoJSONEncoder) + '\n'
+        
+        for trans in transacciones.iterator(chunk_size=TAMANO_BLOQUE_STREAMING):
+            yield json.dumps({'tipo': 'transaccion', **self._transaccion_diario(trans)},
+                             cls=DjangoJSONEncoder) + '\n'
+        
+        yield json.dumps({
+            'tipo': 'resumen',
+            **self._resumen_diario(empresa, periodo['fecha_inicio'], periodo['fecha_fin'])
+        }, cls=DjangoJSONEncoder) + '\n'
 
     @action(detail=False, methods=['get'])
+    @reporte_en_cache('libro_mayor')
     def libro_mayor(self, request):
         """Genera el libro mayor por cuenta"""
         empresa = self.get_empresa()
@@ -426,10 +790,10 @@ class ReporteViewSet(viewsets.ViewSet):
         
         # Filtro base
         filtro_base = Q(
-            transaccion__empresa=empresa,
-            transaccion__estado='CONTABILIZADA',
-            transaccion__fecha__gte=fecha_inicio,
-            transaccion__fecha__lte=fecha_fin,
+            empresa=empresa,
+            estado='CONTABILIZADA',
+            fecha__gte=fecha_inicio,
+            fecha__lte=fecha_fin,
             activo=True
         )
         
@@ -443,68 +807,137 @@ class ReporteViewSet(viewsets.ViewSet):
                               status=status.HTTP_400_BAD_REQUEST)
         else:
             # Obtener todas las cuentas con movimientos
-            cuentas_con_movimientos = MovimientoContable.objects.filter(
-                filtro_base
-            ).values('cuenta').distinct()
-            
             cuentas_analizar = CuentaContable.objects.filter(
-                id__in=[c['cuenta'] for c in cuentas_con_movimientos],
+                id__in=MovimientoContable.objects.filter(filtro_base).values('cuenta'),
                 empresa=empresa,
                 activo=True
             ).order_by('codigo')
         
-        libro_mayor = []
+        cuentas_analizar = list(cuentas_analizar)
+        cuentas_ids = [cuenta.id for cuenta in cuentas_analizar]
         
-        for cuenta in cuentas_analizar:
-            # Saldo inicial (movimientos anteriores a la fecha de inicio)
-            movimientos_anteriores = MovimientoContable.objects.filter(
-                cuenta=cuenta,
-                transaccion__empresa=empresa,
-                transaccion__estado='CONTABILIZADA',
-                transaccion__fecha__lt=fecha_inicio,
-                activo=True
+        # Saldos iniciales (movimientos anteriores a la fecha de inicio) de todas las cuentas
+        saldos_iniciales = {
+            saldo['cuenta_id']: saldo['saldo']
+            for saldo in calcular_saldos(
+                empresa,
+                fecha_fin=fecha_inicio - timedelta(days=1),
+                cuentas=cuentas_ids
             )
+        }
+        
+        movimientos = MovimientoContable.objects.filter(filtro_base, cuenta__in=cuentas_ids)
+        
+        # Efecto en el saldo según la naturaleza de la cuenta
+        efecto = Case(
+            When(cuenta__naturaleza='DEUDORA', then=F('debe') - F('haber')),
+            default=F('haber') - F('debe'),
+            output_field=DecimalField(max_digits=18, decimal_places=2)
+        )
+        
+        # Paginación keyset opcional de los movimientos de una cuenta
+        paginacion = None
+        totales = {}
+        efecto_previo = efecto_total = Decimal('0.00')
+        limite = request.query_params.get('limite')
+        if limite:
+            if len(cuentas_analizar) != 1:
+                return Response({'error': 'La paginación requiere especificar cuenta_id'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limite = int(limite)
+                if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': f'limite debe ser un entero entre 1 y {LIMITE_MAXIMO_PAGINA}'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
             
-            suma_debe_anterior = movimientos_anteriores.aggregate(Sum('debe'))['debe__sum'] or Decimal('0.00')
-            suma_haber_anterior = movimientos_anteriores.aggregate(Sum('haber'))['haber__sum'] or Decimal('0.00')
-            
-            if cuenta.naturaleza == 'DEUDORA':
-                saldo_inicial = suma_debe_anterior - suma_haber_anterior
-            else:
-                saldo_inicial = suma_haber_anterior - suma_debe_anterior
-            
-            # Movimientos del período
-            movimientos_periodo = MovimientoContable.objects.filter(
-                filtro_base,
-                cuenta=cuenta
-            ).select_related('transaccion').order_by('transaccion__fecha', 'transaccion__folio')
-            
-            movimientos_detalle = []
-            saldo_acumulado = saldo_inicial
-            
-            for mov in movimientos_periodo:
-                # Calcular el efecto en el saldo
-                if cuenta.naturaleza == 'DEUDORA':
-                    efecto = mov.debe - mov.haber
-                else:
-                    efecto = mov.haber - mov.debe
-                
-                saldo_acumulado += efecto
-                
-                movimientos_detalle.append({
-                    'fecha': mov.transaccion.fecha,
-                    'folio': mov.transaccion.folio,
-                    'concepto': mov.concepto or mov.transaccion.concepto,
-                    'debe': mov.debe,
-                    'haber': mov.haber,
-                    'saldo': saldo_acumulado
-                })
+            posteriores = Q()
+            despues = request.query_params.get('despues')
+            if despues:
+                try:
+                    fecha, folio, mov_id = decodificar_cursor(despues, 3)
+                    valores = [datetime.strptime(fecha, '%Y-%m-%d').date(), folio, int(mov_id)]
+                except ValueError:
+                    return Response({'error': 'Cursor inválido'}, 
+                                  status=status.HTTP_400_BAD_REQUEST)
+                posteriores = filtro_posterior(CAMPOS_ORDEN_MAYOR, valores)
             
-            # Totales del período
-            suma_debe_periodo = movimientos_periodo.aggregate(Sum('debe'))['debe__sum'] or Decimal('0.00')
-            suma_haber_periodo = movimientos_periodo.aggregate(Sum('haber'))['haber__sum'] or Decimal('0.00')
+            # Totales del período y efecto acumulado antes de la página en una consulta
+            agregados = movimientos.aggregate(
+                suma_debe=Sum('debe'),
+                suma_haber=Sum('haber'),
+                efecto_total=Sum(efecto),
+                efecto_previo=Sum(efecto, filter=~posteriores)
+            )
+            totales[cuentas_ids[0]] = (agregados['suma_debe'], agregados['suma_haber'])
+            efecto_total = agregados['efecto_total'] or Decimal('0.00')
+            efecto_previo = (agregados['efecto_previo'] or Decimal('0.00')) if despues else Decimal('0.00')
+            movimientos = movimientos.filter(posteriores)
+        
+        # Saldo acumulado y totales del período con funciones de ventana por cuenta
+        por_cuenta = [F('cuenta_id')]
+        movimientos = movimientos.annotate(
+            efecto_acumulado=Window(
+                Sum(efecto),
+                partition_by=por_cuenta,
+                order_by=[F(campo).asc() for campo in CAMPOS_ORDEN_MAYOR],
+                frame=RowRange(start=None, end=0)
+            ),
+            total_debe=Window(Sum('debe'), partition_by=por_cuenta),
+            total_haber=Window(Sum('haber'), partition_by=por_cuenta)
+        ).order_by('cuenta__codigo', *CAMPOS_ORDEN_MAYOR).values(
+            'id', 'cuenta_id', 'cuenta__codigo', 'cuenta__nombre', 'concepto', 'debe', 'haber',
+            'fecha', 'transaccion__folio', 'transaccion__concepto',
+            'efecto_acumulado', 'total_debe', 'total_haber'
+        )
+        
+        formato = request.query_params.get('formato')
+        if formato in FORMATOS_DESCARGA:
+            # La descarga de una página respeta el mismo límite que la consulta
+            if limite:
+                movimientos = movimientos[:limite]
+            return self._exportar(
+                formato,
+                f'libro_mayor_{fecha_inicio}_{fecha_fin}',
+                'Libro Mayor',
+                ['LIBRO MAYOR', empresa.nombre, f'Del {fecha_inicio} al {fecha_fin}'],
+                COLUMNAS_LIBRO_MAYOR,
+                self._filas_libro_mayor(movimientos, saldos_iniciales, efecto_previo)
+            )
+        
+        if limite:
+            movimientos = list(movimientos[:limite + 1])
+            siguiente = None
+            if len(movimientos) > limite:
+                movimientos = movimientos[:limite]
+                ultimo = movimientos[-1]
+                siguiente = codificar_cursor(
+                    ultimo['fecha'], ultimo['transaccion__folio'], ultimo['id']
+                )
+            paginacion = {'limite': limite, 'siguiente': siguiente}
+        
+        detalle = {cuenta_id: [] for cuenta_id in cuentas_ids}
+        for mov in movimientos:
+            saldo_inicial = saldos_iniciales.get(mov['cuenta_id'], Decimal('0.00'))
+            detalle[mov['cuenta_id']].append({
+                'fecha': mov['fecha'],
+                'folio': mov['transaccion__folio'],
+                'concepto': mov['concepto'] or mov['transaccion__concepto'],
+                'debe': mov['debe'],
+                'haber': mov['haber'],
+                'saldo': saldo_inicial + efecto_previo + mov['efecto_acumulado']
+            })
+            totales.setdefault(mov['cuenta_id'], (mov['total_debe'], mov['total_haber']))
+        
+        libro_mayor = []
+        
+        for cuenta in cuentas_analizar:
+            saldo_inicial = saldos_iniciales.get(cuenta.id, Decimal('0.00'))
+            movimientos_detalle = detalle[cuenta.id]
+            suma_debe_periodo, suma_haber_periodo = totales.get(cuenta.id, (None, None))
             
-            libro_mayor.append({
+            cuenta_mayor = {
                 'cuenta': {
                     'id': cuenta.id,
                     'codigo': cuenta.codigo,
@@ -515,11 +948,20 @@ class ReporteViewSet(viewsets.ViewSet):
                 'saldo_inicial': saldo_inicial,
                 'movimientos': movimientos_detalle,
                 'totales_periodo': {
-                    'debe': suma_debe_periodo,
-                    'haber': suma_haber_periodo
-                },
-                'saldo_final': saldo_acumulado
-            })
+                    'debe': suma_debe_periodo or Decimal('0.00'),
+                    'haber': suma_haber_periodo or Decimal('0.00')
+                }
+            }
+            
+            if paginacion:
+                cuenta_mayor['saldo_final'] = saldo_inicial + efecto_total
+                cuenta_mayor['paginacion'] = paginacion
+            else:
+                cuenta_mayor['saldo_final'] = (
+                    movimientos_detalle[-1]['saldo'] if movimientos_detalle else saldo_inicial
+                )
+            
+            libro_mayor.append(cuenta_mayor)
         
         # Obtener lista de cuentas disponibles para el selector
         todas_las_cuentas = CuentaContable.objects.filter(
@@ -542,7 +984,31 @@ class ReporteViewSet(viewsets.ViewSet):
             }
         })
 
+    def _filas_libro_mayor(self, movimientos, saldos_iniciales, efecto_previo=Decimal('0.00')):
+        """
+        Filas del libro mayor leídas por bloques de un cursor del servidor
+        Cada cuenta inicia con una fila de saldo inicial
+        """
+        cuenta_actual = None
+        for mov in movimientos.iterator(chunk_size=TAMANO_BLOQUE_STREAMING):
+            saldo_inicial = saldos_iniciales.get(mov['cuenta_id'], Decimal('0.00'))
+            if mov['cuenta_id'] != cuenta_actual:
+                cuenta_actual = mov['cuenta_id']
+                yield (mov['cuenta__codigo'], mov['cuenta__nombre'], None, None,
+                       'SALDO INICIAL', None, None, saldo_inicial + efecto_previo)
+            yield (
+                mov['cuenta__codigo'],
+                mov['cuenta__nombre'],
+                mov['fecha'],
+                mov['transaccion__folio'],
+                mov['concepto'] or mov['transaccion__concepto'],
+                mov['debe'],
+                mov['haber'],
+                saldo_inicial + efecto_previo + mov['efecto_acumulado']
+            )
+    
     @action(detail=False, methods=['get'])
+    @reporte_en_cache('flujo_efectivo')
     def flujo_efectivo(self, request):
         """Genera el flujo de efectivo"""
         empresa = self.get_empresa()
@@ -562,117 +1028,45 @@ class ReporteViewSet(viewsets.ViewSet):
         elif isinstance(fecha_inicio, str):
             fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
         
-        # Filtro base para movimientos del período
-        filtro_base = Q(
-            transaccion__empresa=empresa,
-            transaccion__estado='CONTABILIZADA',
-            transaccion__fecha__gte=fecha_inicio,
-            transaccion__fecha__lte=fecha_fin,
-            activo=True
-        )
-        
-        # Obtener cuentas de efectivo (normalmente Caja y Bancos)
-        # En un sistema completo esto sería configurable, para MVP usamos tipos estándar
-        cuentas_efectivo = CuentaContable.objects.filter(
-            empresa=empresa,
-            codigo__startswith='1.1',  # Asumiendo estructura estándar: 1.1.x para efectivo
-            activo=True
-        )
-        
-        if not cuentas_efectivo.exists():
-            # Fallback: buscar cualquier cuenta que contenga "caja" o "banco"
-            cuentas_efectivo = CuentaContable.objects.filter(
-                empresa=empresa,
-                nombre__icontains='caja',
-                activo=True
-            ) | CuentaContable.objects.filter(
-                empresa=empresa,
-                nombre__icontains='banco',
-                activo=True
-            )
-        
-        # Saldo inicial de efectivo
-        saldo_inicial_total = Decimal('0.00')
-        detalle_inicial = []
-        
-        for cuenta in cuentas_efectivo:
-            movimientos_anteriores = MovimientoContable.objects.filter(
-                cuenta=cuenta,
-                transaccion__empresa=empresa,
-                transaccion__estado='CONTABILIZADA',
-                transaccion__fecha__lt=fecha_inicio,
-                activo=True
+        # Cuentas de efectivo configuradas para la empresa
+        cuentas = list(cuentas_efectivo(empresa).values('id', 'codigo', 'nombre'))
+        ids_cuentas = [cuenta['id'] for cuenta in cuentas]
+        
+        # Saldo inicial de efectivo en una consulta agrupada
+        saldo_inicial_total, detalle_inicial = saldos_iniciales_efectivo(empresa, ids_cuentas, fecha_inicio)
+        
+        formato = request.query_params.get('formato')
+        if formato in FORMATOS_DESCARGA:
+            return self._exportar(
+                formato,
+                f'flujo_efectivo_{fecha_inicio}_{fecha_fin}',
+                'Flujo de Efectivo',
+                ['FLUJO DE EFECTIVO', empresa.nombre, f'Del {fecha_inicio} al {fecha_fin}'],
+                COLUMNAS_FLUJO_EFECTIVO,
+                self._filas_flujo_efectivo(
+                    movimientos_efectivo(empresa, ids_cuentas, fecha_inicio, fecha_fin),
+                    saldo_inicial_total
+                )
             )
-            
-            suma_debe = movimientos_anteriores.aggregate(Sum('debe'))['debe__sum'] or Decimal('0.00')
-            suma_haber = movimientos_anteriores.aggregate(Sum('haber'))['haber__sum'] or Decimal('0.00')
-            
-            # Para cuentas de efectivo (activos), el saldo es debe - haber
-            saldo_inicial = suma_debe - suma_haber
-            saldo_inicial_total += saldo_inicial
-            
-            if saldo_inicial != 0:
-                detalle_inicial.append({
-                    'cuenta_codigo': cuenta.codigo,
-                    'cuenta_nombre': cuenta.nombre,
-                    'saldo_inicial': saldo_inicial
-                })
         
-        # Movimientos de efectivo del período
-        movimientos_efectivo = MovimientoContable.objects.filter(
-            filtro_base,
-            cuenta__in=cuentas_efectivo
-        ).select_related('transaccion', 'cuenta').order_by('transaccion__fecha', 'transaccion__folio')
-        
-        # Clasificar movimientos
-        entradas = []
-        salidas = []
-        total_entradas = Decimal('0.00')
-        total_salidas = Decimal('0.00')
-        
-        for mov in movimientos_efectivo:
-            movimiento_detalle = {
-                'fecha': mov.transaccion.fecha,
-                'folio': mov.transaccion.folio,
-                'cuenta_efectivo': f"{mov.cuenta.codigo} - {mov.cuenta.nombre}",
-                'concepto': mov.concepto or mov.transaccion.concepto,
-                'tipo_transaccion': mov.transaccion.tipo,
-                'monto': mov.debe if mov.debe > 0 else mov.haber
-            }
-            
-            if mov.debe > 0:  # Entrada de efectivo
-                entradas.append(movimiento_detalle)
-                total_entradas += mov.debe
-            else:  # Salida de efectivo
-                salidas.append(movimiento_detalle)
-                total_salidas += mov.haber
+        # Entradas, salidas y totales por tipo en un solo recorrido
+        flujo = calcular_flujo(empresa, fecha_inicio, fecha_fin, ids_cuentas)
+        entradas = flujo['entradas']
+        salidas = flujo['salidas']
+        total_entradas = flujo['total_entradas']
+        total_salidas = flujo['total_salidas']
         
         # Saldo final
         flujo_neto = total_entradas - total_salidas
         saldo_final = saldo_inicial_total + flujo_neto
         
-        # Clasificación por tipo de transacción
-        flujo_por_tipo = {}
-        for mov in movimientos_efectivo:
-            tipo = mov.transaccion.tipo
-            if tipo not in flujo_por_tipo:
-                flujo_por_tipo[tipo] = {'entradas': Decimal('0.00'), 'salidas': Decimal('0.00')}
-            
-            if mov.debe > 0:
-                flujo_por_tipo[tipo]['entradas'] += mov.debe
-            else:
-                flujo_por_tipo[tipo]['salidas'] += mov.haber
-        
         return Response({
             'periodo': {
                 'fecha_inicio': fecha_inicio,
                 'fecha_fin': fecha_fin
             },
             'empresa': empresa.nombre,
-            'cuentas_efectivo': [
-                {'id': c.id, 'codigo': c.codigo, 'nombre': c.nombre} 
-                for c in cuentas_efectivo
-            ],
+            'cuentas_efectivo': cuentas,
             'saldo_inicial': {
                 'total': saldo_inicial_total,
                 'detalle': detalle_inicial
@@ -688,15 +1082,71 @@ class ReporteViewSet(viewsets.ViewSet):
                 'flujo_neto': flujo_neto,
                 'saldo_final': saldo_final
             },
-            'por_tipo_transaccion': flujo_por_tipo,
+            'por_tipo_transaccion': flujo['por_tipo'],
             'estadisticas': {
-                'total_movimientos': len(movimientos_efectivo),
+                'total_movimientos': len(entradas) + len(salidas),
                 'promedio_entradas': total_entradas / len(entradas) if entradas else Decimal('0.00'),
                 'promedio_salidas': total_salidas / len(salidas) if salidas else Decimal('0.00')
             }
         })
+    
+    @action(detail=False, methods=['get', 'put'], url_path='flujo-efectivo/cuentas')
+    def flujo_efectivo_cuentas(self, request):
+        """Consulta o define las cuentas de efectivo del flujo de efectivo"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return Response({'error': 'No se pudo determinar la empresa'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.method == 'PUT':
+            codigos = request.data.get('cuentas')
+            if not isinstance(codigos, list) or not codigos or not all(isinstance(c, str) for c in codigos):
+                return Response({'error': 'cuentas debe ser una lista de códigos de cuenta'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+            
+            existentes = set(CuentaContable.objects.filter(
+                empresa=empresa, codigo__in=codigos, activo=True
+            ).values_list('codigo', flat=True))
+            faltantes = [codigo for codigo in codigos if codigo not in existentes]
+            if faltantes:
+                return Response({'error': f"Cuentas no encontradas: {', '.join(faltantes)}"}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+            
+            guardar_cuentas_efectivo(empresa, codigos, request.user)
+        
+        return Response({
+            'configuradas': codigos_cuentas_efectivo(empresa),
+            'cuentas': list(cuentas_efectivo(empresa).values('id', 'codigo', 'nombre'))
+        })
 
+    def _filas_flujo_efectivo(self, movimientos_efectivo, saldo_inicial):
+        """Filas del flujo de efectivo con saldo corrido, leídas por bloques de un cursor del servidor"""
+        saldo = saldo_inicial
+        total_entradas = Decimal('0.00')
+        total_salidas = Decimal('0.00')
+        
+        yield (None, None, None, 'SALDO INICIAL', None, None, None, saldo_inicial)
+        
+        movimientos = movimientos_efectivo.values_list(
+            'fecha', 'transaccion__folio', 'cuenta__codigo', 'cuenta__nombre',
+            'concepto', 'transaccion__concepto', 'transaccion__tipo', 'debe', 'haber'
+        )
+        for (fecha, folio, codigo, nombre, concepto, concepto_transaccion,
+             tipo, debe, haber) in movimientos.iterator(chunk_size=TAMANO_BLOQUE_STREAMING):
+            saldo += debe - haber
+            total_entradas += debe
+            total_salidas += haber
+            yield (
+                fecha, folio, f'{codigo} - {nombre}', concepto or concepto_transaccion, tipo,
+                debe if debe > 0 else None,
+                haber if debe <= 0 else None,
+                saldo
+            )
+        
+        yield FilaTotal(('', '', '', 'TOTALES', '', total_entradas, total_salidas, saldo))
+    
     @action(detail=False, methods=['get'], url_path='charts/ingresos-gastos')
+    @reporte_en_cache('chart_ingresos_gastos')
     def chart_ingresos_gastos(self, request):
         """Genera datos para gráfico de ingresos vs gastos por mes"""
         empresa = self.get_empresa()
@@ -704,58 +1154,26 @@ class ReporteViewSet(viewsets.ViewSet):
             return Response({'error': 'No se pudo determinar la empresa'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Obtener últimos 6 meses
-        from datetime import datetime, timedelta
-        from dateutil.relativedelta import relativedelta
+        # Horizonte en meses y filtros opcionales
+        try:
+            num_meses = int(request.query_params.get('meses', 6))
+            if not 1 <= num_meses <= MESES_MAXIMOS_GRAFICA:
+                raise ValueError
+            centro_costo = request.query_params.get('centro_costo')
+            centro_costo = int(centro_costo) if centro_costo else None
+            proyecto = request.query_params.get('proyecto')
+            proyecto = int(proyecto) if proyecto else None
+        except ValueError:
+            return Response({'error': f'Parámetros inválidos: meses debe estar entre 1 y {MESES_MAXIMOS_GRAFICA}'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
         
-        fecha_actual = date.today()
-        meses = []
-        ingresos_data = []
-        gastos_data = []
+        serie = serie_ingresos_gastos(
+            empresa, num_meses, centro_costo=centro_costo, proyecto=proyecto
+        )
         
-        for i in range(5, -1, -1):  # Últimos 6 meses
-            fecha_mes = fecha_actual - relativedelta(months=i)
-            inicio_mes = date(fecha_mes.year, fecha_mes.month, 1)
-            
-            # Calcular último día del mes
-            if fecha_mes.month == 12:
-                fin_mes = date(fecha_mes.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                fin_mes = date(fecha_mes.year, fecha_mes.month + 1, 1) - timedelta(days=1)
-            
-            # Si es el mes actual, usar fecha actual como límite
-            if fecha_mes.month == fecha_actual.month and fecha_mes.year == fecha_actual.year:
-                fin_mes = fecha_actual
-            
-            # Filtro para el mes
-            filtro_mes = Q(
-                transaccion__empresa=empresa,
-                transaccion__estado='CONTABILIZADA',
-                transaccion__fecha__gte=inicio_mes,
-                transaccion__fecha__lte=fin_mes,
-                activo=True
-            )
-            
-            # Calcular ingresos del mes
-            ingresos_mes = MovimientoContable.objects.filter(
-                filtro_mes,
-                cuenta__tipo='INGRESO'
-            ).aggregate(
-                total=Sum('haber') - Sum('debe')
-            )['total'] or Decimal('0.00')
-            
-            # Calcular gastos del mes (incluye costos y gastos)
-            gastos_mes = MovimientoContable.objects.filter(
-                filtro_mes,
-                cuenta__tipo__in=['GASTO', 'COSTO']
-            ).aggregate(
-                total=Sum('debe') - Sum('haber')
-            )['total'] or Decimal('0.00')
-            
-            # Agregar a las listas
-            meses.append(fecha_mes.strftime('%b %Y'))
-            ingresos_data.append(float(ingresos_mes))
-            gastos_data.append(float(gastos_mes))
+        meses = [punto['mes'].strftime('%b %Y') for punto in serie]
+        ingresos_data = [float(punto['ingresos']) for punto in serie]
+        gastos_data = [float(punto['gastos']) for punto in serie]
         
         return Response({
             'labels': meses,
@@ -765,6 +1183,7 @@ class ReporteViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'], url_path='charts/balance-cuentas')
+    @reporte_en_cache('chart_balance_cuentas')
     def chart_balance_cuentas(self, request):
         """Genera datos para gráfico de balance por tipo de cuenta"""
         empresa = self.get_empresa()
@@ -780,8 +1199,15 @@ class ReporteViewSet(viewsets.ViewSet):
         labels = []
         values = []
         
+        saldos = calcular_saldos(
+            empresa,
+            fecha_fin=fecha_corte,
+            tipos=tipos_cuenta,
+            solo_cuentas_activas=True
+        )
+        
         for tipo in tipos_cuenta:
-            saldo_tipo = self._calcular_saldo_tipo(empresa, tipo, fecha_corte)
+            saldo_tipo = self._calcular_saldo_tipo(saldos, tipo)
             if saldo_tipo['total'] > 0:
                 labels.append(tipo.capitalize())
                 values.append(float(saldo_tipo['total']))
@@ -794,193 +1220,75 @@ class ReporteViewSet(viewsets.ViewSet):
         })
     
     # Métodos para generar archivos de descarga
-    def _generar_pdf_balanza(self, data):
-        """Genera PDF de balanza de comprobación"""
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4,
-                               rightMargin=72, leftMargin=72,
-                               topMargin=72, bottomMargin=18)
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle('CustomTitle',
-                                    parent=styles['Heading1'],
-                                    fontSize=16,
-                                    spaceAfter=30,
-                                    alignment=1)  # Centrado
-        
-        # Contenido
-        elements = []
-        
-        # Título
-        elements.append(Paragraph(f"BALANZA DE COMPROBACIÓN", title_style))
-        elements.append(Paragraph(f"{data['empresa']}", styles['Heading2']))
-        elements.append(Paragraph(f"Al {data['fecha_corte'].strftime('%d de %B de %Y')}", styles['Normal']))
-        elements.append(Spacer(1, 20))
-        
-        # Tabla de cuentas
-        table_data = [['Código', 'Cuenta', 'Tipo', 'Cargos', 'Abonos', 'Saldo Deudor', 'Saldo Acreedor']]
-        
+    def _filas_balanza(self, data):
+        """Filas de la balanza de comprobación con el renglón de totales"""
         for cuenta in data['cuentas']:
-            table_data.append([
+            yield (
                 cuenta['cuenta_codigo'],
-                cuenta['cuenta_nombre'][:30],  # Truncar nombre largo
+                cuenta['cuenta_nombre'],
                 cuenta['tipo'],
-                f"${float(cuenta['cargos']):,.2f}",
-                f"${float(cuenta['abonos']):,.2f}",
-                f"${float(cuenta['saldo_deudor']):,.2f}",
-                f"${float(cuenta['saldo_acreedor']):,.2f}"
-            ])
-        
-        # Totales
-        table_data.append([
-            '', 'TOTALES', '',
-            f"${float(data['totales']['total_deudor']):,.2f}",
-            f"${float(data['totales']['total_acreedor']):,.2f}",
-            f"${float(data['totales']['total_deudor']):,.2f}",
-            f"${float(data['totales']['total_acreedor']):,.2f}"
-        ])
-        
-        # Crear tabla
-        table = Table(table_data, colWidths=[0.8*inch, 2*inch, 0.8*inch, 1*inch, 1*inch, 1*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),  # Alinear números a la derecha
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        
-        # Balance status
-        if data['totales']['balanceado']:
-            elements.append(Spacer(1, 20))
-            elements.append(Paragraph("✅ La balanza está correctamente balanceada", styles['Normal']))
-        
-        # Construir PDF
-        doc.build(elements)
-        
-        # Preparar respuesta
-        buffer.seek(0)
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="balanza_comprobacion_{data["fecha_corte"]}.pdf"'
-        return response
+                cuenta['cargos'],
+                cuenta['abonos'],
+                cuenta['saldo_deudor'],
+                cuenta['saldo_acreedor']
+            )
+        totales = data['totales']
+        yield FilaTotal(('', 'TOTALES', '', totales['total_deudor'], totales['total_acreedor'],
+                         totales['total_deudor'], totales['total_acreedor']))
+
+
+class ReporteJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet para trabajos de generación asíncrona de reportes
+    POST crea (o reutiliza) un trabajo; GET consulta su estado y progreso
+    """
+    serializer_class = ReporteJobSerializer
+    permission_classes = [IsAuthenticated]
     
-    def _generar_excel_balanza(self, data):
-        """Genera Excel de balanza de comprobación"""
-        import xlsxwriter
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        workbook = xlsxwriter.Workbook(buffer)
-        worksheet = workbook.add_worksheet('Balanza de Comprobación')
-        
-        # Formatos
-        title_format = workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center'})
-        header_format = workbook.add_format({'bold': True, 'bg_color': '#D7E4BC', 'border': 1})
-        money_format = workbook.add_format({'num_format': '$#,##0.00', 'border': 1})
-        text_format = workbook.add_format({'border': 1})
-        total_format = workbook.add_format({'bold': True, 'bg_color': '#F2F2F2', 'num_format': '$#,##0.00', 'border': 1})
-        
-        # Título
-        worksheet.merge_range('A1:G1', 'BALANZA DE COMPROBACIÓN', title_format)
-        worksheet.merge_range('A2:G2', data['empresa'], title_format)
-        worksheet.merge_range('A3:G3', f"Al {data['fecha_corte'].strftime('%d de %B de %Y')}", title_format)
-        
-        # Headers
-        headers = ['Código', 'Cuenta', 'Tipo', 'Cargos', 'Abonos', 'Saldo Deudor', 'Saldo Acreedor']
-        for col, header in enumerate(headers):
-            worksheet.write(4, col, header, header_format)
-        
-        # Datos
-        row = 5
-        for cuenta in data['cuentas']:
-            worksheet.write(row, 0, cuenta['cuenta_codigo'], text_format)
-            worksheet.write(row, 1, cuenta['cuenta_nombre'], text_format)
-            worksheet.write(row, 2, cuenta['tipo'], text_format)
-            worksheet.write(row, 3, float(cuenta['cargos']), money_format)
-            worksheet.write(row, 4, float(cuenta['abonos']), money_format)
-            worksheet.write(row, 5, float(cuenta['saldo_deudor']), money_format)
-            worksheet.write(row, 6, float(cuenta['saldo_acreedor']), money_format)
-            row += 1
-        
-        # Totales
-        worksheet.write(row, 0, '', text_format)
-        worksheet.write(row, 1, 'TOTALES', total_format)
-        worksheet.write(row, 2, '', text_format)
-        worksheet.write(row, 3, float(data['totales']['total_deudor']), total_format)
-        worksheet.write(row, 4, float(data['totales']['total_acreedor']), total_format)
-        worksheet.write(row, 5, float(data['totales']['total_deudor']), total_format)
-        worksheet.write(row, 6, float(data['totales']['total_acreedor']), total_format)
-        
-        # Ajustar anchos de columna
-        worksheet.set_column('A:A', 12)  # Código
-        worksheet.set_column('B:B', 30)  # Cuenta
-        worksheet.set_column('C:C', 10)  # Tipo
-        worksheet.set_column('D:G', 15)  # Montos
-        
-        workbook.close()
-        buffer.seek(0)
-        
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="balanza_comprobacion_{data["fecha_corte"]}.xlsx"'
-        return response
+    get_empresa = ReporteViewSet.get_empresa
     
-    def _generar_csv_balanza(self, data):
-        """Genera CSV de balanza de comprobación"""
-        import csv
-        from io import StringIO
+    def get_queryset(self):
+        """Trabajos de la empresa actual"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return ReporteJob.objects.none()
+        return ReporteJob.objects.filter(empresa=empresa, activo=True).select_related('empresa')
+    
+    def create(self, request):
+        """Solicita la generación de un reporte"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return Response({'error': 'No se pudo determinar la empresa'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
         
-        buffer = StringIO()
-        writer = csv.writer(buffer)
+        serializer = ReporteJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Headers
-        writer.writerow(['Código', 'Cuenta', 'Tipo', 'Cargos', 'Abonos', 'Saldo Deudor', 'Saldo Acreedor'])
+        trabajo, creado = solicitar_reporte(
+            empresa,
+            request.user,
+            serializer.validated_data['reporte'],
+            serializer.validated_data['formato'],
+            serializer.validated_data['parametros']
+        )
         
-        # Datos
-        for cuenta in data['cuentas']:
-            writer.writerow([
-                cuenta['cuenta_codigo'],
-                cuenta['cuenta_nombre'],
-                cuenta['tipo'],
-                float(cuenta['cargos']),
-                float(cuenta['abonos']),
-                float(cuenta['saldo_deudor']),
-                float(cuenta['saldo_acreedor'])
-            ])
-        
-        # Totales
-        writer.writerow([
-            '',
-            'TOTALES',
-            '',
-            float(data['totales']['total_deudor']),
-            float(data['totales']['total_acreedor']),
-            float(data['totales']['total_deudor']),
-            float(data['totales']['total_acreedor'])
-        ])
-        
-        buffer.seek(0)
-        response = HttpResponse(buffer.getvalue(), content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="balanza_comprobacion_{data["fecha_corte"]}.csv"'
-        return response
+        data = ReporteJobSerializer(trabajo, context={'request': request}).data
+        data['reutilizado'] = not creado
+        return Response(data, status=status.HTTP_202_ACCEPTED if creado else status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Descarga el archivo generado por el trabajo"""
+        trabajo = self.get_object()
+        if trabajo.estado != 'COMPLETADO' or not trabajo.archivo:
+            return Response({'error': 'El reporte aún no está disponible', 'estado': trabajo.estado}, 
+                          status=status.HTTP_409_CONFLICT)
+        
+        return FileResponse(
+            trabajo.archivo.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(trabajo.archivo.name)
+        )
 
 
 @api_view(['GET'])
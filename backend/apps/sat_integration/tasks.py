@@ -8,7 +8,12 @@ from celery import shared_task, current_task
 from django.core.files.base import ContentFile
 from django.db import transaction
 from .models import CFDIDownloadJob, CFDI, SATCredentials, CFDIStatusLog
+from apps.core.metricas import (
+    contar_cfdi_procesado, contar_error_parseo_cfdi,
+    observar_espera_cola_cfdi, observar_procesamiento_cfdi
+)
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,7 @@ def process_massive_download(self, job_id):
         job.estado = 'PROCESANDO'
         job.fecha_inicio_proceso = django_timezone.now()
         job.save()
+        observar_espera_cola_cfdi((job.fecha_inicio_proceso - job.fecha_creacion).total_seconds())
         
         # Actualizar el estado de la tarea
         self.update_state(
@@ -114,7 +120,6 @@ def process_massive_download(self, job_id):
             )
             
             # Esperar 30 segundos antes del siguiente intento
-            import time
             time.sleep(30)
         
         if attempts >= max_attempts:
@@ -143,6 +148,7 @@ def process_massive_download(self, job_id):
         total_archivos = len(descarga_result.get('archivos', []))
         job.total_cfdi = total_archivos
         job.save()
+        inicio_procesamiento = time.perf_counter()
         
         for archivo_path in descarga_result.get('archivos', []):
             try:
@@ -153,6 +159,7 @@ def process_massive_download(self, job_id):
                             # Procesar CFDI individual
                             xml_content = zip_file.read(filename)
                             _process_cfdi_xml(xml_content, job)
+                            contar_cfdi_procesado()
                             archivos_procesados += 1
                             job.procesados = archivos_procesados
                             job.save()
@@ -168,6 +175,8 @@ def process_massive_download(self, job_id):
                 logger.error(f"Error procesando archivo {archivo_path}: {str(e)}")
                 continue
         
+        observar_procesamiento_cfdi(time.perf_counter() - inicio_procesamiento)
+        
         # Guardar archivo de descarga comprimido
         with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
             with zipfile.ZipFile(temp_file, 'w') as zip_file:
@@ -254,6 +263,7 @@ def _process_cfdi_xml(xml_content, job):
         
         if uuid_element is None:
             logger.warning("No se encontró TimbreFiscalDigital en el XML")
+            contar_error_parseo_cfdi()
             return
         
         uuid_cfdi = uuid_element.get('UUID')
@@ -326,6 +336,7 @@ def _process_cfdi_xml(xml_content, job):
         
     except Exception as e:
         logger.error(f"Error procesando CFDI XML: {str(e)}")
+        contar_error_parseo_cfdi()
         
 
 @shared_task(bind=True)
@@ -259,45 +259,58 @@ class CFDIViewSet(viewsets.ReadOnlyModelViewSet):
         Resumen de CFDIs por estado, tipo, etc.
         """
         queryset = self.get_queryset()
+        empresa_rfc = getattr(self.request.empresa, 'rfc', '')
+        
+        # Todos los conteos y montos en una sola consulta agregada
+        from django.db.models import Count, Sum
+        conteos = {
+            f'estado_{estado}': Count('id', filter=Q(estado_sat=estado))
+            for estado, _nombre in CFDI.ESTADO_CHOICES
+        }
+        conteos.update({
+            f'tipo_{tipo}': Count('id', filter=Q(tipo_comprobante=tipo))
+            for tipo, _nombre in CFDI.TIPO_CHOICES
+        })
+        resumen = queryset.aggregate(
+            total_cfdi=Count('id'),
+            emitidos=Count('id', filter=Q(rfc_emisor=empresa_rfc)),
+            recibidos=Count('id', filter=Q(rfc_receptor=empresa_rfc)),
+            validados=Count('id', filter=Q(validado_sat=True)),
+            pendientes_validacion=Count('id', filter=Q(validado_sat=False)),
+            total_subtotal=Sum('subtotal'),
+            total_iva=Sum('iva'),
+            total_general=Sum('total'),
+            **conteos
+        )
         
         # Resumen por estado SAT
-        estados = {}
-        for estado, nombre in CFDI.ESTADO_CHOICES:
-            estados[estado] = {
-                'nombre': nombre,
-                'count': queryset.filter(estado_sat=estado).count()
-            }
+        estados = {
+            estado: {'nombre': nombre, 'count': resumen[f'estado_{estado}']}
+            for estado, nombre in CFDI.ESTADO_CHOICES
+        }
         
         # Resumen por tipo de comprobante
-        tipos = {}
-        for tipo, nombre in CFDI.TIPO_CHOICES:
-            tipos[tipo] = {
-                'nombre': nombre,
-                'count': queryset.filter(tipo_comprobante=tipo).count()
-            }
+        tipos = {
+            tipo: {'nombre': nombre, 'count': resumen[f'tipo_{tipo}']}
+            for tipo, nombre in CFDI.TIPO_CHOICES
+        }
         
         # Montos totales
-        from django.db.models import Sum
-        montos = queryset.aggregate(
-            total_subtotal=Sum('subtotal'),
-            total_iva=Sum('iva'),
-            total_general=Sum('total')
-        )
-        
-        # CFDIs emitidos vs recibidos
-        empresa_rfc = getattr(self.request.empresa, 'rfc', '')
-        emitidos = queryset.filter(rfc_emisor=empresa_rfc).count()
-        recibidos = queryset.filter(rfc_receptor=empresa_rfc).count()
+        montos = {
+            'total_subtotal': resumen['total_subtotal'],
+            'total_iva': resumen['total_iva'],
+            'total_general': resumen['total_general'],
+        }
         
         return Response({
-            'total_cfdi': queryset.count(),
+            'total_cfdi': resumen['total_cfdi'],
             'estados': estados,
             'tipos_comprobante': tipos,
             'montos': montos,
-            'emitidos': emitidos,
-            'recibidos': recibidos,
-            'validados': queryset.filter(validado_sat=True).count(),
-            'pendientes_validacion': queryset.filter(validado_sat=False).count()
+            'emitidos': resumen['emitidos'],
+            'recibidos': resumen['recibidos'],
+            'validados': resumen['validados'],
+            'pendientes_validacion': resumen['pendientes_validacion']
         })
     
     @action(detail=True, methods=['get'])
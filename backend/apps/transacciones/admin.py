@@ -1,5 +1,8 @@
 from django.contrib import admin
+from apps.empresas.models import Empresa
 from .models import TransaccionContable, MovimientoContable
+from .polizas import agregar_movimientos
+from .transiciones import transicion_masiva
 
 
 class MovimientoContableInline(admin.TabularInline):
@@ -67,41 +70,76 @@ class TransaccionContableAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('empresa')
     
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.creado_por = request.user
+        else:
+            obj.modificado_por = request.user
+        super().save_model(request, obj, form, change)
+        
+    def save_formset(self, request, form, formset, change):
+        """
+        Los movimientos nuevos se insertan en lote con el servicio de pólizas;
+        los editados y eliminados se guardan sin recalcular totales y los
+        totales se recalculan una sola vez al final
+        """
+        if formset.model is not MovimientoContable:
+            return super().save_formset(request, form, formset, change)
+            
+        transaccion = form.instance
+        movimientos = formset.save(commit=False)
+        for movimiento in formset.deleted_objects:
+            movimiento.delete(recalcular_totales=False)
+            
+        nuevos = []
+        for movimiento in movimientos:
+            if movimiento.pk is None:
+                nuevos.append({
+                    'cuenta_id': movimiento.cuenta_id,
+                    'concepto': movimiento.concepto,
+                    'debe': movimiento.debe,
+                    'haber': movimiento.haber,
+                })
+            else:
+                movimiento.modificado_por = request.user
+                movimiento.save(recalcular_totales=False)
+                
+        if nuevos:
+            agregar_movimientos(transaccion, nuevos, request.user)
+        elif formset.deleted_objects or movimientos:
+            transaccion.calcular_totales()
+            if transaccion.estado == 'CONTABILIZADA':
+                Empresa.incrementar_version_contable(transaccion.empresa_id)
+    
     actions = ['validar_transacciones', 'contabilizar_transacciones']
     
-    def validar_transacciones(self, request, queryset):
-        validadas = 0
-        errores = []
+    def _transicion_masiva(self, request, queryset, accion, verbo):
+        """Aplica la acción por empresa a las seleccionadas que estén en el estado de origen"""
+        por_empresa = {}
+        for transaccion_id, empresa_id in queryset.values_list('id', 'empresa_id'):
+            por_empresa.setdefault(empresa_id, []).append(transaccion_id)
         
-        for transaccion in queryset.filter(estado='BORRADOR'):
-            try:
-                transaccion.validar()
-                validadas += 1
-            except Exception as e:
-                errores.append(f'{transaccion.folio}: {str(e)}')
+        exitosas = 0
+        errores = []
+        for empresa in Empresa.objects.filter(id__in=por_empresa):
+            resultado = transicion_masiva(
+                empresa, accion, filtros={'id__in': por_empresa[empresa.id]}, usuario=request.user
+            )
+            exitosas += len(resultado['exitosas'])
+            errores.extend(f"{falla['folio']}: {falla['error']}" for falla in resultado['fallidas'])
                 
-        if validadas:
-            self.message_user(request, f'{validadas} transacciones validadas correctamente.')
+        if exitosas:
+            self.message_user(request, f'{exitosas} transacciones {verbo} correctamente.')
         if errores:
             self.message_user(request, f'Errores: {"; ".join(errores)}', level='ERROR')
+    
+    def validar_transacciones(self, request, queryset):
+        self._transicion_masiva(request, queryset, 'validar', 'validadas')
             
     validar_transacciones.short_description = 'Validar transacciones seleccionadas'
     
     def contabilizar_transacciones(self, request, queryset):
-        contabilizadas = 0
-        errores = []
-        
-        for transaccion in queryset.filter(estado='VALIDADA'):
-            try:
-                transaccion.contabilizar()
-                contabilizadas += 1
-            except Exception as e:
-                errores.append(f'{transaccion.folio}: {str(e)}')
-                
-        if contabilizadas:
-            self.message_user(request, f'{contabilizadas} transacciones contabilizadas correctamente.')
-        if errores:
-            self.message_user(request, f'Errores: {"; ".join(errores)}', level='ERROR')
+        self._transicion_masiva(request, queryset, 'contabilizar', 'contabilizadas')
             
     contabilizar_transacciones.short_description = 'Contabilizar transacciones seleccionadas'
 
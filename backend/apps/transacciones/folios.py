@@ -0,0 +1,84 @@
+"""
+Asignación de folios por empresa y tipo de transacción
+Cada secuencia es una fila de SecuenciaFolio que se incrementa con UPDATE:
+el UPDATE bloquea la fila, así que dos usuarios nunca obtienen el mismo
+número y las importaciones reservan un bloque de N folios con un solo
+incremento. Un folio reservado en una transacción que después se revierte
+se pierde (como en una secuencia de la base de datos).
+Los tipos predeterminados (DIARIO, INGRESO...) producen folios numéricos sin
+prefijo, por lo que comparten una sola secuencia numérica por empresa; cada
+tipo personalizado tiene la suya con su prefijo y sufijo. Un tipo
+personalizado sin prefijo ni sufijo también produce folios numéricos, así que
+usa la secuencia compartida para no repetir números de los predeterminados
+"""
+from django.db import transaction
+from django.db.models import BigIntegerField, F, Max
+from django.db.models.functions import Cast
+from .models import TipoTransaccion, TransaccionContable, SecuenciaFolio
+
+# Secuencia compartida por los tipos predeterminados
+SECUENCIA_NUMERICA = '#'
+
+
+def _clave(tipo, tipo_personalizado):
+    if tipo_personalizado is None or not (tipo_personalizado.prefijo or tipo_personalizado.sufijo):
+        return SECUENCIA_NUMERICA
+    return tipo_personalizado.codigo
+
+
+def _numero_inicial(empresa_id, clave, tipo_personalizado):
+    """Último número ya usado antes de existir la secuencia"""
+    ultimo_tipo = tipo_personalizado.ultimo_folio if tipo_personalizado is not None else 0
+    if clave != SECUENCIA_NUMERICA:
+        return ultimo_tipo
+    ultimo = TransaccionContable.objects.filter(
+        empresa_id=empresa_id,
+        folio__regex=r'^[0-9]{1,18}$'
+    ).annotate(
+        numero=Cast('folio', BigIntegerField())
+    ).aggregate(ultimo=Max('numero'))['ultimo']
+    return max(ultimo or 0, ultimo_tipo)
+
+
+def reservar_numeros(empresa_id, tipo, cantidad=1, tipo_personalizado=None):
+    """
+    Reserva cantidad números consecutivos de la secuencia y devuelve su range
+    La fila de la secuencia queda bloqueada hasta el fin de la transacción
+    que la incluya, así que conviene llamarla justo antes de insertar
+    """
+    if cantidad < 1:
+        raise ValueError('La cantidad de folios debe ser al menos 1')
+
+    clave = _clave(tipo, tipo_personalizado)
+    secuencia = SecuenciaFolio.objects.filter(empresa_id=empresa_id, tipo=clave)
+    with transaction.atomic():
+        if not secuencia.update(ultimo=F('ultimo') + cantidad):
+            # Primera vez: se crea a partir de los folios existentes; si otro
+            # proceso la crea al mismo tiempo, get_or_create toma la suya
+            SecuenciaFolio.objects.get_or_create(
+                empresa_id=empresa_id,
+                tipo=clave,
+                defaults={'ultimo': _numero_inicial(empresa_id, clave, tipo_personalizado)}
+            )
+            secuencia.update(ultimo=F('ultimo') + cantidad)
+        ultimo = secuencia.values_list('ultimo', flat=True).get()
+
+        if tipo_personalizado is not None:
+            # Se conserva el último folio del tipo para mostrarlo en el admin
+            TipoTransaccion.objects.filter(pk=tipo_personalizado.pk).update(ultimo_folio=ultimo)
+            tipo_personalizado.ultimo_folio = ultimo
+
+    return range(ultimo - cantidad + 1, ultimo + 1)
+
+
+def reservar_folios(empresa_id, tipo, cantidad=1, tipo_personalizado=None):
+    """Reserva un bloque de folios consecutivos y los devuelve ya formateados"""
+    numeros = reservar_numeros(empresa_id, tipo, cantidad, tipo_personalizado)
+    if tipo_personalizado is not None:
+        return [tipo_personalizado.formatear_folio(numero) for numero in numeros]
+    return [str(numero) for numero in numeros]
+
+
+def siguiente_folio(empresa_id, tipo, tipo_personalizado=None):
+    """Siguiente folio del tipo"""
+    return reservar_folios(empresa_id, tipo, 1, tipo_personalizado)[0]
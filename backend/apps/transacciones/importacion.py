@@ -0,0 +1,485 @@
+"""
+Importación de pólizas desde Excel o CSV (ver GUIA-IMPORTACION-EXCEL.md)
+El libro de Excel trae dos hojas, Transacciones y Movimientos, y se lee con
+openpyxl en modo de solo lectura fila por fila. El CSV trae una fila por
+movimiento con los datos de su póliza repetidos.
+Cuentas, centros de costo y proyectos se resuelven contra mapas código → id
+cargados con una consulta cada uno; cada póliza se valida completa (filas y
+balance) y las válidas se insertan con bulk_create en lotes, cada lote en su
+propia transacción
+"""
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from apps.catalogo_cuentas.models import CuentaContable
+from .models import (
+    TransaccionContable, MovimientoContable, ImportacionJob, ErrorImportacion
+)
+from .polizas import CentroCosto, Proyecto, ESTADOS_PROYECTO_CAPTURA
+from .folios import reservar_folios
+
+HOJA_TRANSACCIONES = 'Transacciones'
+HOJA_MOVIMIENTOS = 'Movimientos'
+
+COLUMNAS_TRANSACCIONES = ['Folio', 'Fecha', 'Concepto', 'Tipo', 'Estado']
+REQUERIDAS_TRANSACCIONES = ['Folio', 'Fecha', 'Concepto', 'Tipo']
+COLUMNAS_MOVIMIENTOS = [
+    'Folio_Transaccion', 'Codigo_Cuenta', 'Concepto_Movimiento',
+    'Debe', 'Haber', 'Codigo_Centro', 'Codigo_Proyecto'
+]
+REQUERIDAS_MOVIMIENTOS = ['Folio_Transaccion', 'Codigo_Cuenta', 'Debe', 'Haber']
+
+# Las pólizas contabilizadas se cargan como VALIDADA y se contabilizan después
+ESTADOS_IMPORTABLES = ['BORRADOR', 'VALIDADA']
+TIPOS = [valor for valor, _nombre in TransaccionContable.TIPO_CHOICES]
+
+# Pólizas por transacción de inserción
+TAMANO_LOTE = 500
+
+# Errores guardados por importación; el total se cuenta completo
+MAXIMO_ERRORES = 5000
+
+EXTENSIONES = ('.xlsx', '.csv')
+
+
+class ErrorEstructura(Exception):
+    """El archivo no tiene las hojas o columnas esperadas"""
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(texto)
+
+
+def _importe(valor):
+    texto = _texto(valor)
+    if not texto:
+        return Decimal('0.00')
+    return Decimal(texto).quantize(Decimal('0.01'))
+
+
+def _indices(encabezados, columnas, requeridas, hoja):
+    encabezados = [_texto(valor) for valor in encabezados]
+    faltantes = [columna for columna in requeridas if columna not in encabezados]
+    if faltantes:
+        raise ErrorEstructura(f"Faltan columnas en la hoja '{hoja}': {', '.join(faltantes)}")
+    return {columna: encabezados.index(columna) for columna in columnas if columna in encabezados}
+
+
+def _filas(filas, indices):
+    """(número de fila, datos por columna) saltando filas vacías; la fila 1 es el encabezado"""
+    for numero, valores in enumerate(filas, start=2):
+        if not valores or all(_texto(valor) == '' for valor in valores):
+            continue
+        yield numero, {
+            columna: valores[indice] if indice < len(valores) else None
+            for columna, indice in indices.items()
+        }
+
+
+class LectorExcel:
+    """Libro con las hojas Transacciones y Movimientos, leído en modo de solo lectura"""
+
+    def __init__(self, archivo):
+        import openpyxl
+
+        self.libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+        self.indices = {}
+        for hoja, columnas, requeridas in (
+            (HOJA_TRANSACCIONES, COLUMNAS_TRANSACCIONES, REQUERIDAS_TRANSACCIONES),
+            (HOJA_MOVIMIENTOS, COLUMNAS_MOVIMIENTOS, REQUERIDAS_MOVIMIENTOS),
+        ):
+            if hoja not in self.libro.sheetnames:
+                self.cerrar()
+                raise ErrorEstructura(f"Falta la hoja '{hoja}'")
+            encabezados = next(self.libro[hoja].iter_rows(max_row=1, values_only=True), ())
+            try:
+                self.indices[hoja] = _indices(encabezados, columnas, requeridas, hoja)
+            except ErrorEstructura:
+                self.cerrar()
+                raise
+
+    def _hoja(self, hoja):
+        return _filas(self.libro[hoja].iter_rows(min_row=2, values_only=True), self.indices[hoja])
+
+    def transacciones(self):
+        return self._hoja(HOJA_TRANSACCIONES)
+
+    def movimientos(self):
+        return self._hoja(HOJA_MOVIMIENTOS)
+
+    def cerrar(self):
+        self.libro.close()
+
+
+class LectorCSV:
+    """
+    CSV con una fila por movimiento: columnas de la póliza (Folio, Fecha,
+    Concepto, Tipo, Estado) seguidas de las del movimiento sin Folio_Transaccion.
+    Se recorre dos veces, una por hoja lógica
+    """
+    COLUMNAS = COLUMNAS_TRANSACCIONES + COLUMNAS_MOVIMIENTOS[1:]
+    REQUERIDAS = REQUERIDAS_TRANSACCIONES + REQUERIDAS_MOVIMIENTOS[1:]
+
+    def __init__(self, abrir):
+        self.abrir = abrir
+        with self._lector() as (filas, _archivo):
+            self.indices = _indices(next(filas, []), self.COLUMNAS, self.REQUERIDAS, 'CSV')
+
+    class _Abierto:
+        def __init__(self, abrir):
+            self.archivo = abrir()
+
+        def __enter__(self):
+            texto = io.TextIOWrapper(self.archivo, encoding='utf-8-sig', newline='')
+            return csv.reader(texto), self.archivo
+
+        def __exit__(self, *exc):
+            self.archivo.close()
+
+    def _lector(self):
+        return self._Abierto(self.abrir)
+
+    def transacciones(self):
+        vistos = set()
+        with self._lector() as (filas, _archivo):
+            next(filas, None)
+            for numero, datos in _filas(filas, self.indices):
+                folio = _texto(datos['Folio'])
+                if folio in vistos:
+                    continue
+                vistos.add(folio)
+                yield numero, datos
+
+    def movimientos(self):
+        with self._lector() as (filas, _archivo):
+            next(filas, None)
+            for numero, datos in _filas(filas, self.indices):
+                datos['Folio_Transaccion'] = datos['Folio']
+                yield numero, datos
+
+    def cerrar(self):
+        pass
+
+
+def abrir_lector(trabajo):
+    """Lector según la extensión del archivo del trabajo"""
+    nombre = trabajo.archivo.name.lower()
+    if nombre.endswith('.csv'):
+        return LectorCSV(lambda: trabajo.archivo.open('rb'))
+    return LectorExcel(trabajo.archivo.open('rb'))
+
+
+class RegistroErrores:
+    """Acumula los errores de filas; guarda hasta MAXIMO_ERRORES y cuenta todos"""
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+        self.errores = []
+        self.total = 0
+
+    def agregar(self, hoja, fila, folio, mensaje):
+        self.total += 1
+        if len(self.errores) < MAXIMO_ERRORES:
+            self.errores.append(ErrorImportacion(
+                importacion=self.trabajo,
+                hoja=hoja,
+                fila=fila,
+                folio=folio[:100],
+                mensaje=mensaje[:500]
+            ))
+
+    def guardar(self):
+        ErrorImportacion.objects.bulk_create(self.errores, batch_size=1000)
+
+
+def _avance(trabajo, progreso):
+    trabajo.progreso = progreso
+    trabajo.save(update_fields=['progreso'])
+
+
+def _leer_transacciones(lector, existentes, errores, asignar_folios=False):
+    """
+    Pólizas por folio con sus datos validados; las inválidas quedan marcadas
+    Con asignar_folios el folio del archivo solo relaciona las dos hojas
+    """
+    polizas = {}
+    for fila, datos in lector.transacciones():
+        folio = _texto(datos.get('Folio'))
+
+        def error(mensaje):
+            errores.agregar(HOJA_TRANSACCIONES, fila, folio, mensaje)
+
+        if not folio:
+            error('El folio es requerido')
+            continue
+        if folio in polizas:
+            error('El folio está repetido en el archivo')
+            polizas[folio]['valida'] = False
+            continue
+
+        poliza = {
+            'fila': fila,
+            'folio': folio,
+            'concepto': _texto(datos.get('Concepto')),
+            'tipo': _texto(datos.get('Tipo')).upper(),
+            'estado': _texto(datos.get('Estado')).upper() or 'BORRADOR',
+            'fecha': None,
+            'movimientos': [],
+            'debe': Decimal('0.00'),
+            'haber': Decimal('0.00'),
+            'valida': True,
+        }
+        polizas[folio] = poliza
+
+        if len(folio) > 20 and not asignar_folios:
+            error('El folio no puede tener más de 20 caracteres')
+            poliza['valida'] = False
+        elif folio in existentes:
+            error('Ya existe una transacción con este folio')
+            poliza['valida'] = False
+        try:
+            poliza['fecha'] = _fecha(datos.get('Fecha'))
+        except (TypeError, ValueError):
+            error('Fecha inválida (use AAAA-MM-DD o DD/MM/AAAA)')
+            poliza['valida'] = False
+        if not poliza['concepto']:
+            error('El concepto es requerido')
+            poliza['valida'] = False
+        elif len(poliza['concepto']) > 500:
+            error('El concepto no puede tener más de 500 caracteres')
+            poliza['valida'] = False
+        if poliza['tipo'] not in TIPOS:
+            error(f"Tipo '{poliza['tipo']}' inválido; use {', '.join(TIPOS)}")
+            poliza['valida'] = False
+        if poliza['estado'] not in ESTADOS_IMPORTABLES:
+            error(f"Estado '{poliza['estado']}' inválido; use {', '.join(ESTADOS_IMPORTABLES)}")
+            poliza['valida'] = False
+    return polizas
+
+
+def _leer_movimientos(lector, empresa_id, polizas, errores):
+    """Agrega a cada póliza sus movimientos validados contra los catálogos en memoria"""
+    cuentas = {
+        codigo: (id_cuenta, afectable)
+        for id_cuenta, codigo, afectable in CuentaContable.objects.filter(
+            empresa_id=empresa_id, activo=True
+        ).values_list('id', 'codigo', 'afectable')
+    }
+    centros = {
+        codigo: (id_centro, permite)
+        for id_centro, codigo, permite in CentroCosto.objects.filter(
+            empresa_id=empresa_id, activo=True
+        ).values_list('id', 'codigo', 'permite_movimientos')
+    }
+    proyectos = {
+        codigo: (id_proyecto, estado)
+        for id_proyecto, codigo, estado in Proyecto.objects.filter(
+            empresa_id=empresa_id, activo=True
+        ).values_list('id', 'codigo', 'estado')
+    }
+
+    total = 0
+    for fila, datos in lector.movimientos():
+        total += 1
+        folio = _texto(datos.get('Folio_Transaccion'))
+        errores_fila = []
+
+        poliza = polizas.get(folio)
+        if poliza is None:
+            errores_fila.append(f"La póliza '{folio}' no está en la hoja {HOJA_TRANSACCIONES}")
+
+        try:
+            debe = _importe(datos.get('Debe'))
+            haber = _importe(datos.get('Haber'))
+        except (InvalidOperation, ValueError):
+            errores_fila.append('Importe inválido en Debe o Haber')
+            debe = haber = Decimal('0.00')
+        else:
+            if debe < 0 or haber < 0:
+                errores_fila.append('Los importes no pueden ser negativos')
+            elif debe > 0 and haber > 0:
+                errores_fila.append('Un movimiento no puede tener tanto debe como haber')
+            elif debe == 0 and haber == 0:
+                errores_fila.append('Un movimiento debe tener importe en debe o haber')
+
+        codigo = _texto(datos.get('Codigo_Cuenta'))
+        cuenta_id, afectable = cuentas.get(codigo, (None, False))
+        if cuenta_id is None:
+            errores_fila.append(f"La cuenta '{codigo}' no existe o está inactiva")
+        elif not afectable:
+            errores_fila.append(f"La cuenta '{codigo}' no es afectable")
+
+        centro_id = None
+        codigo_centro = _texto(datos.get('Codigo_Centro'))
+        if codigo_centro:
+            centro_id, permite = centros.get(codigo_centro, (None, False))
+            if centro_id is None:
+                errores_fila.append(f"El centro de costo '{codigo_centro}' no existe o está inactivo")
+            elif not permite:
+                errores_fila.append(f"El centro de costo '{codigo_centro}' no permite movimientos directos")
+
+        proyecto_id = None
+        codigo_proyecto = _texto(datos.get('Codigo_Proyecto'))
+        if codigo_proyecto:
+            proyecto_id, estado = proyectos.get(codigo_proyecto, (None, None))
+            if proyecto_id is None:
+                errores_fila.append(f"El proyecto '{codigo_proyecto}' no existe o está inactivo")
+            elif estado not in ESTADOS_PROYECTO_CAPTURA:
+                errores_fila.append(f"El proyecto '{codigo_proyecto}' no está activo ni en planificación")
+
+        concepto = _texto(datos.get('Concepto_Movimiento'))[:500]
+
+        for mensaje in errores_fila:
+            errores.agregar(HOJA_MOVIMIENTOS, fila, folio, mensaje)
+        if poliza is None:
+            continue
+        if errores_fila:
+            poliza['valida'] = False
+            continue
+        poliza['movimientos'].append((cuenta_id, concepto, debe, haber, centro_id, proyecto_id))
+        poliza['debe'] += debe
+        poliza['haber'] += haber
+    return total
+
+
+def _validar_balances(polizas, errores):
+    for poliza in polizas.values():
+        if not poliza['valida']:
+            continue
+        mensaje = None
+        if len(poliza['movimientos']) < 2:
+            mensaje = 'Una transacción debe tener al menos 2 movimientos'
+        elif poliza['debe'] != poliza['haber']:
+            mensaje = f"La transacción no está balanceada. Debe: {poliza['debe']}, Haber: {poliza['haber']}"
+        if mensaje:
+            errores.agregar(HOJA_TRANSACCIONES, poliza['fila'], poliza['folio'], mensaje)
+            poliza['valida'] = False
+
+
+def _insertar_lote(trabajo, lote):
+    """Inserta un lote de pólizas válidas con sus movimientos; regresa los movimientos creados"""
+    with transaction.atomic():
+        if trabajo.asignar_folios:
+            # Un bloque de folios por lote; los tipos importables comparten la secuencia numérica
+            folios = reservar_folios(trabajo.empresa_id, lote[0]['tipo'], len(lote))
+        else:
+            folios = [poliza['folio'] for poliza in lote]
+        transacciones = TransaccionContable.objects.bulk_create([
+            TransaccionContable(
+                empresa_id=trabajo.empresa_id,
+                folio=folio,
+                fecha=poliza['fecha'],
+                concepto=poliza['concepto'],
+                tipo=poliza['tipo'],
+                estado=poliza['estado'],
+                total_debe=poliza['debe'],
+                total_haber=poliza['haber'],
+                creado_por_id=trabajo.creado_por_id
+            )
+            for poliza, folio in zip(lote, folios)
+        ])
+        movimientos = [
+            MovimientoContable(
+                transaccion_id=transaccion.id,
+                empresa_id=transaccion.empresa_id,
+                fecha=transaccion.fecha,
+                estado=transaccion.estado,
+                cuenta_id=cuenta_id,
+                concepto=concepto,
+                debe=debe,
+                haber=haber,
+                centro_costo_id=centro_id,
+                proyecto_id=proyecto_id,
+                creado_por_id=trabajo.creado_por_id
+            )
+            for transaccion, poliza in zip(transacciones, lote)
+            for cuenta_id, concepto, debe, haber, centro_id, proyecto_id in poliza['movimientos']
+        ]
+        MovimientoContable.objects.bulk_create(movimientos, batch_size=1000)
+    return len(movimientos)
+
+
+def ejecutar_importacion(trabajo):
+    """
+    Valida el archivo del trabajo y, si no es simulación, importa las pólizas
+    válidas; deja en el trabajo los conteos y en ErrorImportacion los errores
+    """
+    lector = abrir_lector(trabajo)
+    errores = RegistroErrores(trabajo)
+    try:
+        existentes = set()
+        if not trabajo.asignar_folios:
+            existentes = set(
+                TransaccionContable.objects.filter(empresa_id=trabajo.empresa_id).values_list('folio', flat=True)
+            )
+        polizas = _leer_transacciones(lector, existentes, errores, trabajo.asignar_folios)
+        trabajo.total_transacciones = len(polizas)
+        _avance(trabajo, 20)
+
+        trabajo.total_movimientos = _leer_movimientos(lector, trabajo.empresa_id, polizas, errores)
+        _avance(trabajo, 50)
+    finally:
+        lector.cerrar()
+
+    _validar_balances(polizas, errores)
+    validas = [poliza for poliza in polizas.values() if poliza['valida']]
+    trabajo.transacciones_validas = len(validas)
+
+    if not trabajo.simulacion:
+        for inicio in range(0, len(validas), TAMANO_LOTE):
+            lote = validas[inicio:inicio + TAMANO_LOTE]
+            try:
+                trabajo.movimientos_importados += _insertar_lote(trabajo, lote)
+                trabajo.transacciones_importadas += len(lote)
+            except IntegrityError:
+                # Otro proceso creó alguno de los folios mientras se importaba
+                for poliza in lote:
+                    errores.agregar(
+                        HOJA_TRANSACCIONES, poliza['fila'], poliza['folio'],
+                        'No se pudo importar el lote de la póliza: folio duplicado'
+                    )
+            trabajo.progreso = 50 + 50 * (inicio + len(lote)) // len(validas)
+            trabajo.save(update_fields=['progreso', 'transacciones_importadas', 'movimientos_importados'])
+
+    errores.guardar()
+    trabajo.total_errores = errores.total
+    trabajo.save(update_fields=[
+        'total_transacciones', 'total_movimientos', 'transacciones_validas',
+        'transacciones_importadas', 'movimientos_importados', 'total_errores'
+    ])
+
+
+def solicitar_importacion(empresa, usuario, archivo, simulacion=False, asignar_folios=False):
+    """Crea el trabajo de importación y encola su tarea al confirmar la transacción"""
+    trabajo = ImportacionJob.objects.create(
+        empresa=empresa,
+        archivo=archivo,
+        simulacion=simulacion,
+        asignar_folios=asignar_folios,
+        creado_por=usuario
+    )
+
+    from .tasks import importar_transacciones
+    transaction.on_commit(lambda: importar_transacciones.delay(trabajo.id))
+
+    return trabajo
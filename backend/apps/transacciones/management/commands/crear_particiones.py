@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.transacciones.particiones import (
+    ANIOS_ADELANTE, asegurar_particiones, listar_particiones, tabla_particionada
+)
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones por año de los movimientos contables (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--anios-adelante',
+            type=int,
+            default=ANIOS_ADELANTE,
+            help='Años posteriores al actual que se dejan particionados'
+        )
+        parser.add_argument(
+            '--desde',
+            type=int,
+            help='Año inicial (por defecto el actual)'
+        )
+        parser.add_argument(
+            '--listar',
+            action='store_true',
+            help='Muestra las particiones existentes'
+        )
+
+    def handle(self, *args, **options):
+        if options['anios_adelante'] < 0:
+            raise CommandError('--anios-adelante no puede ser negativo')
+
+        if not tabla_particionada(connection):
+            self.stdout.write(self.style.WARNING(
+                'La tabla de movimientos no está particionada (requiere PostgreSQL y la migración 0008)'
+            ))
+            return
+
+        creadas = asegurar_particiones(
+            connection,
+            anios_adelante=options['anios_adelante'],
+            desde=options['desde']
+        )
+        if creadas:
+            self.stdout.write(self.style.SUCCESS(f"Particiones creadas: {', '.join(creadas)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('Las particiones ya existen'))
+
+        if options['listar']:
+            for nombre, limites in listar_particiones(connection):
+                self.stdout.write(f'  {nombre}: {limites}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.empresas.models import Empresa
+from apps.transacciones.saldos import reconstruir_saldos_periodo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero los saldos por periodo (cuenta × año × mes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            help='ID de la empresa a reconstruir (por defecto todas)'
+        )
+
+    def handle(self, *args, **options):
+        empresa = None
+        if options['empresa']:
+            try:
+                empresa = Empresa.objects.get(id=options['empresa'])
+            except Empresa.DoesNotExist:
+                raise CommandError(f"No existe la empresa {options['empresa']}")
+
+        creados = reconstruir_saldos_periodo(empresa)
+
+        alcance = empresa.nombre if empresa else 'todas las empresas'
+        self.stdout.write(self.style.SUCCESS(
+            f'Saldos por periodo reconstruidos para {alcance}: {creados} registros'
+        ))
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:07
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models.functions import ExtractYear, ExtractMonth
+import django.db.models.deletion
+
+
+def poblar_saldos_periodo(apps, schema_editor):
+    """Carga inicial de saldos por periodo a partir de los movimientos contabilizados"""
+    MovimientoContable = apps.get_model('transacciones', 'MovimientoContable')
+    SaldoPeriodo = apps.get_model('transacciones', 'SaldoPeriodo')
+
+    totales = MovimientoContable.objects.filter(
+        transaccion__estado='CONTABILIZADA',
+        activo=True
+    ).values(
+        'transaccion__empresa_id',
+        'cuenta_id',
+        anio=ExtractYear('transaccion__fecha'),
+        mes=ExtractMonth('transaccion__fecha'),
+    ).annotate(
+        cargos=models.Sum('debe'),
+        abonos=models.Sum('haber'),
+        cantidad=models.Count('id')
+    ).order_by()
+
+    SaldoPeriodo.objects.bulk_create(
+        (
+            SaldoPeriodo(
+                empresa_id=total['transaccion__empresa_id'],
+                cuenta_id=total['cuenta_id'],
+                anio=total['anio'],
+                mes=total['mes'],
+                cargos=total['cargos'],
+                abonos=total['abonos'],
+                num_movimientos=total['cantidad']
+            )
+            for total in totales.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_auto_20250824_1016'),
+        ('catalogo_cuentas', '0001_initial'),
+        ('transacciones', '0003_movimientocontable_centro_costo_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoPeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('mes', models.PositiveSmallIntegerField(verbose_name='Mes')),
+                ('cargos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18, verbose_name='Cargos')),
+                ('abonos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18, verbose_name='Abonos')),
+                ('num_movimientos', models.IntegerField(default=0, verbose_name='Número de movimientos')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_periodo', to='catalogo_cuentas.cuentacontable', verbose_name='Cuenta Contable')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_periodo', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Saldo por Periodo',
+                'verbose_name_plural': 'Saldos por Periodo',
+                'ordering': ['anio', 'mes'],
+                'indexes': [models.Index(fields=['empresa', 'anio', 'mes'], name='transaccion_empresa_0d1776_idx')],
+                'unique_together': {('cuenta', 'anio', 'mes')},
+            },
+        ),
+        migrations.RunPython(poblar_saldos_periodo, migrations.RunPython.noop),
+    ]
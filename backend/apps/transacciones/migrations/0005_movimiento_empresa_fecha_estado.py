@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0004_empresa_version_contable'),
+        ('transacciones', '0004_saldoperiodo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimientocontable',
+            name='empresa',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_contables', to='empresas.empresa'),
+        ),
+        migrations.AddField(
+            model_name='movimientocontable',
+            name='estado',
+            field=models.CharField(choices=[('BORRADOR', 'Borrador'), ('VALIDADA', 'Validada'), ('CONTABILIZADA', 'Contabilizada'), ('CANCELADA', 'Cancelada')], default='BORRADOR', editable=False, max_length=15, verbose_name='Estado'),
+        ),
+        migrations.AddField(
+            model_name='movimientocontable',
+            name='fecha',
+            field=models.DateField(editable=False, null=True, verbose_name='Fecha'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_datos_transaccion(apps, schema_editor):
+    """Copia empresa, fecha y estado de cada transacción a sus movimientos existentes"""
+    TransaccionContable = apps.get_model('transacciones', 'TransaccionContable')
+    MovimientoContable = apps.get_model('transacciones', 'MovimientoContable')
+
+    transaccion = TransaccionContable.objects.filter(pk=OuterRef('transaccion_id'))
+    MovimientoContable.objects.update(
+        empresa_id=Subquery(transaccion.values('empresa_id')[:1]),
+        fecha=Subquery(transaccion.values('fecha')[:1]),
+        estado=Subquery(transaccion.values('estado')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacciones', '0005_movimiento_empresa_fecha_estado'),
+    ]
+
+    operations = [
+        migrations.RunPython(copiar_datos_transaccion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0004_empresa_version_contable'),
+        ('transacciones', '0006_poblar_movimiento_empresa_fecha_estado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimientocontable',
+            name='empresa',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_contables', to='empresas.empresa'),
+        ),
+        migrations.AlterField(
+            model_name='movimientocontable',
+            name='fecha',
+            field=models.DateField(editable=False, verbose_name='Fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocontable',
+            index=models.Index(condition=models.Q(('activo', True), ('estado', 'CONTABILIZADA')), fields=['empresa', 'cuenta', 'fecha'], include=('debe', 'haber'), name='mov_contab_emp_cta_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocontable',
+            index=models.Index(condition=models.Q(('activo', True), ('estado', 'CONTABILIZADA')), fields=['empresa', 'fecha'], name='mov_contab_emp_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccioncontable',
+            index=models.Index(fields=['empresa', 'estado', 'fecha'], name='trans_contab_emp_edo_fecha'),
+        ),
+    ]
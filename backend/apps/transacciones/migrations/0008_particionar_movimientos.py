@@ -0,0 +1,22 @@
+from django.db import migrations
+from apps.transacciones.particiones import desparticionar_movimientos, particionar_movimientos
+
+
+def particionar(apps, schema_editor):
+    """En PostgreSQL convierte la tabla de movimientos en particionada por año"""
+    particionar_movimientos(schema_editor.connection)
+
+
+def desparticionar(apps, schema_editor):
+    desparticionar_movimientos(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacciones', '0007_movimiento_indices_reportes'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
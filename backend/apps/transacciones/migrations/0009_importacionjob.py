@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0004_empresa_version_contable'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transacciones', '0008_particionar_movimientos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última modificación')),
+                ('activo', models.BooleanField(default=True, help_text='Soft delete: False indica registro eliminado', verbose_name='Activo')),
+                ('version', models.IntegerField(default=1, verbose_name='Versión del registro')),
+                ('archivo', models.FileField(upload_to='importaciones/%Y/%m/', verbose_name='Archivo')),
+                ('simulacion', models.BooleanField(default=False, help_text='Solo validar y reportar errores, sin importar', verbose_name='Simulación')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('task_id', models.CharField(blank=True, max_length=100, verbose_name='ID de tarea')),
+                ('total_transacciones', models.IntegerField(default=0, verbose_name='Transacciones leídas')),
+                ('total_movimientos', models.IntegerField(default=0, verbose_name='Movimientos leídos')),
+                ('transacciones_validas', models.IntegerField(default=0, verbose_name='Transacciones válidas')),
+                ('transacciones_importadas', models.IntegerField(default=0, verbose_name='Transacciones importadas')),
+                ('movimientos_importados', models.IntegerField(default=0, verbose_name='Movimientos importados')),
+                ('total_errores', models.IntegerField(default=0, verbose_name='Errores encontrados')),
+                ('mensaje_error', models.TextField(blank=True, verbose_name='Mensaje de error')),
+                ('fecha_inicio_proceso', models.DateTimeField(blank=True, null=True, verbose_name='Inicio del proceso')),
+                ('fecha_fin_proceso', models.DateTimeField(blank=True, null=True, verbose_name='Fin del proceso')),
+                ('creado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_creados', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importaciones_transacciones', to='empresas.empresa')),
+                ('modificado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_modificados', to=settings.AUTH_USER_MODEL, verbose_name='Modificado por')),
+            ],
+            options={
+                'verbose_name': 'Importación de Transacciones',
+                'verbose_name_plural': 'Importaciones de Transacciones',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ErrorImportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hoja', models.CharField(max_length=20, verbose_name='Hoja')),
+                ('fila', models.PositiveIntegerField(blank=True, null=True, verbose_name='Fila')),
+                ('folio', models.CharField(blank=True, max_length=100, verbose_name='Folio')),
+                ('mensaje', models.CharField(max_length=500, verbose_name='Mensaje')),
+                ('importacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='errores', to='transacciones.importacionjob')),
+            ],
+            options={
+                'verbose_name': 'Error de Importación',
+                'verbose_name_plural': 'Errores de Importación',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0004_empresa_version_contable'),
+        ('transacciones', '0009_importacionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacionjob',
+            name='asignar_folios',
+            field=models.BooleanField(default=False, help_text='Asignar los folios de la secuencia; el folio del archivo solo relaciona las hojas', verbose_name='Asignar folios'),
+        ),
+        migrations.CreateModel(
+            name='SecuenciaFolio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(help_text='Tipo predeterminado o código del tipo personalizado', max_length=20, verbose_name='Tipo')),
+                ('ultimo', models.PositiveIntegerField(default=0, verbose_name='Último número asignado')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='secuencias_folio', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Folios',
+                'verbose_name_plural': 'Secuencias de Folios',
+                'unique_together': {('empresa', 'tipo')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacciones', '0010_secuenciafolio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaccioncontable',
+            index=models.Index(fields=['empresa', '-fecha', '-folio', '-id'], name='trans_contab_emp_fecha_folio'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Sum, Count, F, Q
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from decimal import Decimal
@@ -88,13 +89,61 @@ class TipoTransaccion(BaseModel):
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
         
+    def formatear_folio(self, numero):
+        """Folio con prefijo, número rellenado con ceros y sufijo"""
+        return f"{self.prefijo}{str(numero).zfill(self.longitud_numero)}{self.sufijo}"
+        
     def generar_folio(self):
-        """Genera el siguiente folio para este tipo"""
-        self.ultimo_folio += 1
-        numero = str(self.ultimo_folio).zfill(self.longitud_numero)
-        folio = f"{self.prefijo}{numero}{self.sufijo}"
-        self.save(update_fields=['ultimo_folio'])
-        return folio
+        """Genera el siguiente folio para este tipo (secuencia con bloqueo de fila)"""
+        from .folios import siguiente_folio
+        return siguiente_folio(self.empresa_id, self.codigo, tipo_personalizado=self)
+
+
+class SecuenciaFolio(models.Model):
+    """
+    Contador de folios por empresa y tipo de transacción
+    Se incrementa con UPDATE, que bloquea la fila hasta el fin de la
+    transacción; ver apps.transacciones.folios
+    """
+    empresa = models.ForeignKey(
+        Empresa,
+        on_delete=models.CASCADE,
+        related_name='secuencias_folio'
+    )
+    tipo = models.CharField(
+        max_length=20,
+        verbose_name='Tipo',
+        help_text='Tipo predeterminado o código del tipo personalizado'
+    )
+    ultimo = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Último número asignado'
+    )
+    
+    class Meta:
+        unique_together = ['empresa', 'tipo']
+        verbose_name = 'Secuencia de Folios'
+        verbose_name_plural = 'Secuencias de Folios'
+        
+    def __str__(self):
+        return f"{self.tipo}: {self.ultimo}"
+
+
+# Campos de la transacción copiados a sus movimientos para filtrar sin JOIN
+CAMPOS_COPIADOS_MOVIMIENTOS = {'empresa', 'empresa_id', 'fecha', 'estado'}
+
+
+def invalidar_indice_al_confirmar(empresa_id, fecha):
+    """Invalida el índice de saldos acumulados desde fecha al confirmar la transacción"""
+    def invalidar():
+        from .saldos import invalidar_indice_saldos
+        invalidar_indice_saldos(empresa_id, fecha)
+    
+    transaction.on_commit(invalidar)
+
+
+# Campos del movimiento que determinan su aporte a SaldoPeriodo
+CAMPOS_SALDO_MOVIMIENTO = ('cuenta_id', 'fecha', 'estado', 'activo', 'debe', 'haber')
 
 
 class TransaccionContable(BaseModel):
@@ -185,10 +234,47 @@ class TransaccionContable(BaseModel):
         verbose_name = 'Transacción Contable'
         verbose_name_plural = 'Transacciones Contables'
         ordering = ['-fecha', '-folio']
+        indexes = [
+            models.Index(fields=['empresa', 'estado', 'fecha'], name='trans_contab_emp_edo_fecha'),
+            # Orden del listado y de su paginación por cursor
+            models.Index(fields=['empresa', '-fecha', '-folio', '-id'], name='trans_contab_emp_fecha_folio'),
+        ]
         
     def __str__(self):
         return f"{self.folio} - {self.concepto[:50]}"
         
+    def save(self, *args, **kwargs):
+        """
+        Guardar; la edición de una transacción contabilizada cambia la versión contable
+        Los cambios de empresa, fecha o estado (ediciones y validar, contabilizar,
+        cancelar) se copian a sus movimientos
+        """
+        nueva = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        fecha_anterior = None
+        if not nueva and self.estado == 'CONTABILIZADA' and (update_fields is None or 'fecha' in update_fields):
+            anterior = TransaccionContable.objects.filter(pk=self.pk).values('fecha', 'estado').first()
+            if anterior and anterior['estado'] == 'CONTABILIZADA':
+                fecha_anterior = anterior['fecha']
+        self.fecha = models.DateField().to_python(self.fecha)
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not nueva and (update_fields is None or CAMPOS_COPIADOS_MOVIMIENTOS.intersection(update_fields)):
+                self.movimientos.update(empresa_id=self.empresa_id, fecha=self.fecha, estado=self.estado)
+            if fecha_anterior is not None and fecha_anterior != self.fecha:
+                self._mover_saldos(fecha_anterior)
+        if self.estado == 'CONTABILIZADA' and update_fields is None:
+            Empresa.incrementar_version_contable(self.empresa_id)
+        
+    def _mover_saldos(self, fecha_anterior):
+        """Pasa los saldos de una transacción contabilizada del periodo anterior al de su nueva fecha"""
+        if (fecha_anterior.year, fecha_anterior.month) != (self.fecha.year, self.fecha.month):
+            SaldoPeriodo.aplicar_transaccion(self, signo=-1, fecha=fecha_anterior)
+            SaldoPeriodo.aplicar_transaccion(self)
+        Empresa.incrementar_version_contable(self.empresa_id)
+        invalidar_indice_al_confirmar(self.empresa_id, min(fecha_anterior, self.fecha))
+        
     def clean(self):
         """Validaciones del modelo"""
         # Solo permitir cancelación si está contabilizada
@@ -200,9 +286,9 @@ class TransaccionContable(BaseModel):
                     
     def calcular_totales(self):
         """Calcula y actualiza los totales debe/haber"""
-        movimientos = self.movimientos.all()
-        self.total_debe = sum(m.debe for m in movimientos)
-        self.total_haber = sum(m.haber for m in movimientos)
+        totales = self.movimientos.aggregate(debe=Sum('debe'), haber=Sum('haber'))
+        self.total_debe = totales['debe'] or Decimal('0.00')
+        self.total_haber = totales['haber'] or Decimal('0.00')
         self.save(update_fields=['total_debe', 'total_haber'])
         
     def esta_balanceada(self):
@@ -226,21 +312,34 @@ class TransaccionContable(BaseModel):
         self.save(update_fields=['estado'])
         
     def contabilizar(self):
-        """Contabiliza la transacción"""
+        """Contabiliza la transacción y actualiza los saldos por periodo"""
         if self.estado != 'VALIDADA':
             raise ValidationError('Solo se pueden contabilizar transacciones validadas')
             
-        self.estado = 'CONTABILIZADA'
-        self.fecha_contabilizacion = timezone.now()
-        self.save(update_fields=['estado', 'fecha_contabilizacion'])
+        with transaction.atomic():
+            self.estado = 'CONTABILIZADA'
+            self.fecha_contabilizacion = timezone.now()
+            self.save(update_fields=['estado', 'fecha_contabilizacion'])
+            SaldoPeriodo.aplicar_transaccion(self)
+            Empresa.incrementar_version_contable(self.empresa_id)
+            transaction.on_commit(self._invalidar_indice_saldos)
         
     def cancelar(self):
-        """Cancela la transacción"""
+        """Cancela la transacción y revierte sus saldos por periodo"""
         if self.estado != 'CONTABILIZADA':
             raise ValidationError('Solo se pueden cancelar transacciones contabilizadas')
             
-        self.estado = 'CANCELADA'
-        self.save(update_fields=['estado'])
+        with transaction.atomic():
+            self.estado = 'CANCELADA'
+            self.save(update_fields=['estado'])
+            SaldoPeriodo.aplicar_transaccion(self, signo=-1)
+            Empresa.incrementar_version_contable(self.empresa_id)
+            transaction.on_commit(self._invalidar_indice_saldos)
+        
+    def _invalidar_indice_saldos(self):
+        """Invalida el índice de saldos acumulados si la transacción tiene fecha pasada"""
+        from .saldos import invalidar_indice_saldos
+        invalidar_indice_saldos(self.empresa_id, self.fecha)
 
 
 class MovimientoContable(BaseModel):
@@ -298,10 +397,46 @@ class MovimientoContable(BaseModel):
         verbose_name='Proyecto'
     )
     
+    # Copia de empresa, fecha y estado de la transacción para que los reportes
+    # filtren sin JOIN; se sincronizan al guardar el movimiento o la transacción
+    empresa = models.ForeignKey(
+        Empresa,
+        on_delete=models.CASCADE,
+        related_name='movimientos_contables',
+        db_index=False,
+        editable=False
+    )
+    fecha = models.DateField(
+        editable=False,
+        verbose_name='Fecha'
+    )
+    estado = models.CharField(
+        max_length=15,
+        choices=TransaccionContable.ESTADO_CHOICES,
+        default='BORRADOR',
+        editable=False,
+        verbose_name='Estado'
+    )
+    
     class Meta:
         verbose_name = 'Movimiento Contable'
         verbose_name_plural = 'Movimientos Contables'
         ordering = ['id']
+        indexes = [
+            # Saldos y libro mayor: movimientos contabilizados por cuenta y fecha
+            models.Index(
+                fields=['empresa', 'cuenta', 'fecha'],
+                include=['debe', 'haber'],
+                condition=Q(activo=True, estado='CONTABILIZADA'),
+                name='mov_contab_emp_cta_fecha'
+            ),
+            # Rangos de fechas de toda la empresa (series mensuales, libro diario)
+            models.Index(
+                fields=['empresa', 'fecha'],
+                condition=Q(activo=True, estado='CONTABILIZADA'),
+                name='mov_contab_emp_fecha'
+            ),
+        ]
         
     def __str__(self):
         importe = self.debe if self.debe > 0 else self.haber
@@ -352,17 +487,83 @@ class MovimientoContable(BaseModel):
             if self.proyecto.estado not in ['ACTIVO', 'PLANIFICACION']:
                 raise ValidationError('Solo se pueden asignar movimientos a proyectos activos o en planificación')
             
-    def save(self, *args, **kwargs):
-        """Guardar y recalcular totales de la transacción"""
-        super().save(*args, **kwargs)
+    def copiar_transaccion(self):
+        """Copia empresa, fecha y estado de la transacción al movimiento"""
+        self.empresa_id = self.transaccion.empresa_id
+        self.fecha = self.transaccion.fecha
+        self.estado = self.transaccion.estado
+        
+    def _registro_guardado(self):
+        """Valores guardados que afectan los saldos por periodo (None si aún no existe)"""
+        if self._state.adding or self.pk is None:
+            return None
+        return MovimientoContable.objects.filter(pk=self.pk).values(*CAMPOS_SALDO_MOVIMIENTO).first()
+        
+    def _ajustar_saldos(self, antes, despues):
+        """
+        Pasa a SaldoPeriodo la diferencia entre el aporte anterior y el nuevo
+        del movimiento (solo cuentan los movimientos contabilizados y activos)
+        """
+        totales = {}
+        fechas = []
+        for registro, signo in ((antes, -1), (despues, 1)):
+            if not registro or registro['estado'] != 'CONTABILIZADA' or not registro['activo']:
+                continue
+            fecha = models.DateField().to_python(registro['fecha'])
+            fechas.append(fecha)
+            llave = (registro['cuenta_id'], fecha.year, fecha.month)
+            cargos, abonos, cantidad = totales.get(llave, (Decimal('0.00'), Decimal('0.00'), 0))
+            totales[llave] = (
+                cargos + signo * registro['debe'],
+                abonos + signo * registro['haber'],
+                cantidad + signo
+            )
+        totales = {llave: total for llave, total in totales.items() if any(total)}
+        if not totales:
+            return
+        SaldoPeriodo.aplicar_totales(self.empresa_id, totales)
+        invalidar_indice_al_confirmar(self.empresa_id, min(fechas))
+        
+    def save(self, *args, recalcular_totales=True, **kwargs):
+        """
+        Guardar y recalcular totales de la transacción
+        Al guardar varios movimientos, recalcular_totales=False deja el
+        recálculo para el final (ver apps.transacciones.polizas). Si el
+        movimiento está contabilizado, sus saldos por periodo se ajustan
+        """
+        self.copiar_transaccion()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'empresa', 'fecha', 'estado'}
+        with transaction.atomic():
+            antes = self._registro_guardado()
+            super().save(*args, **kwargs)
+            self._ajustar_saldos(antes, {campo: getattr(self, campo) for campo in CAMPOS_SALDO_MOVIMIENTO})
+        if not recalcular_totales:
+            return
         # Recalcular totales de la transacción padre
         self.transaccion.calcular_totales()
+        if self.transaccion.estado == 'CONTABILIZADA':
+            Empresa.incrementar_version_contable(self.transaccion.empresa_id)
         
-    def delete(self, *args, **kwargs):
-        """Eliminar y recalcular totales de la transacción"""
+    def delete(self, *args, recalcular_totales=True, **kwargs):
+        """
+        Eliminar y recalcular totales de la transacción
+        El borrado es lógico y pasa por save(), que ajusta los saldos
+        """
         transaccion = self.transaccion
-        super().delete(*args, **kwargs)
-        transaccion.calcular_totales()
+        resultado = super().delete(*args, **kwargs)
+        if recalcular_totales:
+            transaccion.calcular_totales()
+            if transaccion.estado == 'CONTABILIZADA':
+                Empresa.incrementar_version_contable(transaccion.empresa_id)
+        return resultado
+        
+    def hard_delete(self):
+        """Eliminación física; descuenta el movimiento de los saldos si estaba contabilizado"""
+        with transaction.atomic():
+            antes = self._registro_guardado()
+            super().hard_delete()
+            self._ajustar_saldos(antes, None)
         
     def get_importe(self):
         """Obtiene el importe del movimiento"""
@@ -370,4 +571,256 @@ class MovimientoContable(BaseModel):
         
     def get_naturaleza(self):
         """Obtiene la naturaleza del movimiento"""
-        return 'DEBE' if self.debe > 0 else 'HABER' 
\ No newline at end of file
+        return 'DEBE' if self.debe > 0 else 'HABER' 
+
+
+class SaldoPeriodo(models.Model):
+    """
+    Saldos materializados por cuenta y periodo mensual
+    Se actualiza al contabilizar/cancelar transacciones y se reconstruye con
+    el comando reconstruir_saldos
+    """
+    empresa = models.ForeignKey(
+        Empresa,
+        on_delete=models.CASCADE,
+        related_name='saldos_periodo'
+    )
+    cuenta = models.ForeignKey(
+        CuentaContable,
+        on_delete=models.CASCADE,
+        related_name='saldos_periodo',
+        verbose_name='Cuenta Contable'
+    )
+    anio = models.PositiveSmallIntegerField(
+        verbose_name='Año'
+    )
+    mes = models.PositiveSmallIntegerField(
+        verbose_name='Mes'
+    )
+    
+    # Acumulados del periodo (solo transacciones contabilizadas)
+    cargos = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Cargos'
+    )
+    abonos = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Abonos'
+    )
+    num_movimientos = models.IntegerField(
+        default=0,
+        verbose_name='Número de movimientos'
+    )
+    
+    class Meta:
+        unique_together = ['cuenta', 'anio', 'mes']
+        verbose_name = 'Saldo por Periodo'
+        verbose_name_plural = 'Saldos por Periodo'
+        ordering = ['anio', 'mes']
+        indexes = [
+            models.Index(fields=['empresa', 'anio', 'mes']),
+        ]
+        
+    def __str__(self):
+        return f"{self.cuenta.codigo} {self.anio}-{self.mes:02d}"
+        
+    @classmethod
+    def aplicar_transaccion(cls, transaccion, signo=1, fecha=None):
+        """
+        Suma (signo=1) o resta (signo=-1) los movimientos de una transacción
+        en el periodo de su fecha (o del de fecha, si se indica)
+        """
+        fecha = fecha or transaccion.fecha
+        totales = transaccion.movimientos.filter(activo=True).values('cuenta_id').annotate(
+            cargos=Sum('debe'),
+            abonos=Sum('haber'),
+            cantidad=Count('id')
+        ).order_by('cuenta_id')
+        
+        for total in totales:
+            saldo, _ = cls.objects.select_for_update().get_or_create(
+                cuenta_id=total['cuenta_id'],
+                anio=fecha.year,
+                mes=fecha.month,
+                defaults={'empresa_id': transaccion.empresa_id}
+            )
+            cls.objects.filter(pk=saldo.pk).update(
+                cargos=F('cargos') + signo * total['cargos'],
+                abonos=F('abonos') + signo * total['abonos'],
+                num_movimientos=F('num_movimientos') + signo * total['cantidad']
+            )
+
+    @classmethod
+    def aplicar_totales(cls, empresa_id, totales, signo=1):
+        """
+        Suma o resta de una vez los totales de muchas transacciones
+        totales es {(cuenta_id, anio, mes): (cargos, abonos, cantidad)}; crea los
+        periodos que falten y actualiza los saldos bloqueados con un bulk_update
+        """
+        if not totales:
+            return
+        cls.objects.bulk_create(
+            [
+                cls(empresa_id=empresa_id, cuenta_id=cuenta_id, anio=anio, mes=mes)
+                for cuenta_id, anio, mes in totales
+            ],
+            ignore_conflicts=True
+        )
+        saldos = cls.objects.select_for_update().filter(
+            cuenta_id__in={cuenta_id for cuenta_id, _anio, _mes in totales},
+            anio__in={anio for _cuenta_id, anio, _mes in totales},
+            mes__in={mes for _cuenta_id, _anio, mes in totales}
+        )
+        actualizados = []
+        for saldo in saldos:
+            total = totales.get((saldo.cuenta_id, saldo.anio, saldo.mes))
+            if total is None:
+                continue
+            cargos, abonos, cantidad = total
+            saldo.cargos += signo * cargos
+            saldo.abonos += signo * abonos
+            saldo.num_movimientos += signo * cantidad
+            actualizados.append(saldo)
+        cls.objects.bulk_update(actualizados, ['cargos', 'abonos', 'num_movimientos'], batch_size=500)
+
+
+class ImportacionJob(BaseModel):
+    """
+    Trabajos de importación de pólizas desde Excel o CSV
+    Con simulacion solo se validan las filas y se reportan los errores sin
+    escribir; sin ella se importan las pólizas válidas en lotes
+    """
+    
+    STATUS_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+    
+    empresa = models.ForeignKey(
+        Empresa,
+        on_delete=models.CASCADE,
+        related_name='importaciones_transacciones'
+    )
+    archivo = models.FileField(
+        upload_to='importaciones/%Y/%m/',
+        verbose_name='Archivo'
+    )
+    simulacion = models.BooleanField(
+        default=False,
+        verbose_name='Simulación',
+        help_text='Solo validar y reportar errores, sin importar'
+    )
+    asignar_folios = models.BooleanField(
+        default=False,
+        verbose_name='Asignar folios',
+        help_text='Asignar los folios de la secuencia; el folio del archivo solo relaciona las hojas'
+    )
+    
+    # Estado del trabajo
+    estado = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDIENTE',
+        verbose_name='Estado'
+    )
+    progreso = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Progreso (%)'
+    )
+    task_id = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='ID de tarea'
+    )
+    
+    # Resultados
+    total_transacciones = models.IntegerField(
+        default=0,
+        verbose_name='Transacciones leídas'
+    )
+    total_movimientos = models.IntegerField(
+        default=0,
+        verbose_name='Movimientos leídos'
+    )
+    transacciones_validas = models.IntegerField(
+        default=0,
+        verbose_name='Transacciones válidas'
+    )
+    transacciones_importadas = models.IntegerField(
+        default=0,
+        verbose_name='Transacciones importadas'
+    )
+    movimientos_importados = models.IntegerField(
+        default=0,
+        verbose_name='Movimientos importados'
+    )
+    total_errores = models.IntegerField(
+        default=0,
+        verbose_name='Errores encontrados'
+    )
+    mensaje_error = models.TextField(
+        blank=True,
+        verbose_name='Mensaje de error'
+    )
+    
+    # Fechas de proceso
+    fecha_inicio_proceso = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Inicio del proceso'
+    )
+    fecha_fin_proceso = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fin del proceso'
+    )
+    
+    class Meta:
+        verbose_name = 'Importación de Transacciones'
+        verbose_name_plural = 'Importaciones de Transacciones'
+        ordering = ['-fecha_creacion']
+        
+    def __str__(self):
+        modo = 'simulación' if self.simulacion else 'importación'
+        return f"{self.archivo.name} ({modo}) - {self.empresa.nombre} ({self.estado})"
+
+
+class ErrorImportacion(models.Model):
+    """Error de una fila de un archivo de importación"""
+    importacion = models.ForeignKey(
+        ImportacionJob,
+        on_delete=models.CASCADE,
+        related_name='errores'
+    )
+    hoja = models.CharField(
+        max_length=20,
+        verbose_name='Hoja'
+    )
+    fila = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Fila'
+    )
+    folio = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Folio'
+    )
+    mensaje = models.CharField(
+        max_length=500,
+        verbose_name='Mensaje'
+    )
+    
+    class Meta:
+        verbose_name = 'Error de Importación'
+        verbose_name_plural = 'Errores de Importación'
+        ordering = ['id']
+        
+    def __str__(self):
+        return f"{self.hoja} fila {self.fila}: {self.mensaje}"
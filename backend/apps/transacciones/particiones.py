@@ -0,0 +1,222 @@
+"""
+Particionado por año de los movimientos contables (solo PostgreSQL)
+La tabla de movimientos se particiona por rango de fecha, una partición por
+año más una DEFAULT para las fechas sin partición propia. Los reportes filtran
+por la fecha copiada en el movimiento, así que Postgres descarta las
+particiones fuera del periodo consultado.
+El comando crear_particiones (programado también en Celery beat) crea las
+particiones de los años siguientes y mueve a su partición los años que hayan
+caído en la DEFAULT
+"""
+from datetime import date
+from django.db import transaction
+from django.utils import timezone
+
+TABLA_MOVIMIENTOS = 'transacciones_movimientocontable'
+COLUMNA_PARTICION = 'fecha'
+
+# Años futuros que se dejan particionados por adelantado
+ANIOS_ADELANTE = 1
+
+
+def soporta_particiones(connection):
+    return connection.vendor == 'postgresql'
+
+
+def tabla_particionada(connection, tabla=TABLA_MOVIMIENTOS):
+    """True si la tabla existe y está particionada"""
+    if not soporta_particiones(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [tabla])
+        return cursor.fetchone() is not None
+
+
+def nombre_particion(anio, tabla=TABLA_MOVIMIENTOS):
+    return f'{tabla}_{anio}'
+
+
+def nombre_particion_default(tabla=TABLA_MOVIMIENTOS):
+    return f'{tabla}_default'
+
+
+def _rango(anio):
+    anio = int(anio)
+    return f"FROM ('{anio}-01-01') TO ('{anio + 1}-01-01')"
+
+
+def _existe(cursor, nombre):
+    cursor.execute('SELECT to_regclass(%s)', [nombre])
+    return cursor.fetchone()[0] is not None
+
+
+def _indices_y_llaves(cursor, tabla):
+    """Definiciones de los índices (salvo la llave primaria) y de las llaves foráneas"""
+    cursor.execute(
+        'SELECT pg_get_indexdef(indexrelid) FROM pg_index '
+        'WHERE indrelid = %s::regclass AND NOT indisprimary',
+        [tabla]
+    )
+    indices = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [tabla]
+    )
+    return indices, cursor.fetchall()
+
+
+def _reconstruir_tabla(connection, tabla, particionar):
+    """
+    Recrea la tabla particionada por año (o de vuelta como tabla simple)
+    copiando sus filas; conserva índices, llaves foráneas y la secuencia del id
+    """
+    q = connection.ops.quote_name
+    anterior = f'{tabla}_anterior'
+    secuencia = f'{tabla}_id_seq'
+    secuencia_nueva = f'{secuencia}_nueva'
+
+    with connection.cursor() as cursor:
+        indices, llaves = _indices_y_llaves(cursor, tabla)
+        cursor.execute(f'ALTER TABLE {q(tabla)} RENAME TO {q(anterior)}')
+
+        particion = f' PARTITION BY RANGE ({q(COLUMNA_PARTICION)})' if particionar else ''
+        cursor.execute(
+            f'CREATE TABLE {q(tabla)} '
+            f'(LIKE {q(anterior)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){particion}'
+        )
+        # La secuencia (o identity) del id pertenece a la tabla anterior y se
+        # elimina con ella; el id pasa a una secuencia nueva con el mismo nombre
+        cursor.execute(f'CREATE SEQUENCE {q(secuencia_nueva)}')
+        cursor.execute(
+            f"ALTER TABLE {q(tabla)} ALTER COLUMN id SET DEFAULT nextval('{secuencia_nueva}'::regclass)"
+        )
+
+        if particionar:
+            # Una partición por cada año con movimientos y por los años por venir
+            actual = timezone.localdate().year
+            cursor.execute(
+                f'SELECT DISTINCT EXTRACT(YEAR FROM {q(COLUMNA_PARTICION)})::int FROM {q(anterior)}'
+            )
+            anios = {fila[0] for fila in cursor.fetchall()}
+            anios.update(range(actual, actual + ANIOS_ADELANTE + 1))
+            for anio in sorted(anios):
+                cursor.execute(
+                    f'CREATE TABLE {q(nombre_particion(anio, tabla))} '
+                    f'PARTITION OF {q(tabla)} FOR VALUES {_rango(anio)}'
+                )
+            cursor.execute(
+                f'CREATE TABLE {q(nombre_particion_default(tabla))} PARTITION OF {q(tabla)} DEFAULT'
+            )
+
+        cursor.execute(f'INSERT INTO {q(tabla)} SELECT * FROM {q(anterior)}')
+        cursor.execute(f'DROP TABLE {q(anterior)}')
+
+        cursor.execute(f'ALTER SEQUENCE {q(secuencia_nueva)} RENAME TO {q(secuencia)}')
+        cursor.execute(f'ALTER SEQUENCE {q(secuencia)} OWNED BY {q(tabla)}.id')
+        cursor.execute(
+            f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM {q(tabla)}',
+            [secuencia]
+        )
+
+        # En una tabla particionada la llave primaria debe incluir la columna de partición
+        llave = f'id, {q(COLUMNA_PARTICION)}' if particionar else 'id'
+        cursor.execute(f'ALTER TABLE {q(tabla)} ADD CONSTRAINT {q(tabla + "_pkey")} PRIMARY KEY ({llave})')
+        # Los índices se crean después de copiar las filas; en la tabla
+        # particionada se propagan a cada partición
+        for definicion in indices:
+            cursor.execute(definicion.replace(' ON ONLY ', ' ON '))
+        for nombre, definicion in llaves:
+            cursor.execute(f'ALTER TABLE {q(tabla)} ADD CONSTRAINT {q(nombre)} {definicion}')
+        cursor.execute(f'ANALYZE {q(tabla)}')
+
+
+def particionar_movimientos(connection):
+    """Convierte la tabla de movimientos en particionada por año; False si no aplica"""
+    if not soporta_particiones(connection) or tabla_particionada(connection):
+        return False
+    _reconstruir_tabla(connection, TABLA_MOVIMIENTOS, particionar=True)
+    return True
+
+
+def desparticionar_movimientos(connection):
+    """Regresa los movimientos a una tabla sin particiones; False si no aplica"""
+    if not tabla_particionada(connection):
+        return False
+    _reconstruir_tabla(connection, TABLA_MOVIMIENTOS, particionar=False)
+    return True
+
+
+def crear_particion(connection, anio, tabla=TABLA_MOVIMIENTOS):
+    """
+    Crea la partición del año si no existe; las filas de ese año que estén en
+    la partición DEFAULT pasan a la nueva. True si la creó
+    """
+    q = connection.ops.quote_name
+    particion = nombre_particion(anio, tabla)
+    default = nombre_particion_default(tabla)
+    columna = q(COLUMNA_PARTICION)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if _existe(cursor, particion):
+            return False
+        if not _existe(cursor, default):
+            cursor.execute(
+                f'CREATE TABLE {q(particion)} PARTITION OF {q(tabla)} FOR VALUES {_rango(anio)}'
+            )
+            return True
+
+        # Con filas del año en la DEFAULT no se puede crear la partición
+        # directamente: se llena como tabla suelta y luego se adjunta
+        cursor.execute(
+            f'CREATE TABLE {q(particion)} (LIKE {q(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH movidos AS ('
+            f'DELETE FROM {q(default)} WHERE {columna} >= %s AND {columna} < %s RETURNING *'
+            f') INSERT INTO {q(particion)} SELECT * FROM movidos',
+            [date(anio, 1, 1), date(anio + 1, 1, 1)]
+        )
+        cursor.execute(f'ALTER TABLE {q(tabla)} ATTACH PARTITION {q(particion)} FOR VALUES {_rango(anio)}')
+    return True
+
+
+def asegurar_particiones(connection, anios_adelante=ANIOS_ADELANTE, desde=None, tabla=TABLA_MOVIMIENTOS):
+    """
+    Crea las particiones del año actual (o desde el año indicado) hasta
+    anios_adelante y las de los años con filas en la partición DEFAULT.
+    Devuelve los nombres de las particiones creadas
+    """
+    if not tabla_particionada(connection, tabla):
+        return []
+
+    actual = timezone.localdate().year
+    anios = set(range(desde or actual, actual + anios_adelante + 1))
+    default = nombre_particion_default(tabla)
+    with connection.cursor() as cursor:
+        if _existe(cursor, default):
+            cursor.execute(
+                f'SELECT DISTINCT EXTRACT(YEAR FROM {connection.ops.quote_name(COLUMNA_PARTICION)})::int '
+                f'FROM {connection.ops.quote_name(default)}'
+            )
+            anios.update(fila[0] for fila in cursor.fetchall())
+
+    return [
+        nombre_particion(anio, tabla)
+        for anio in sorted(anios)
+        if crear_particion(connection, anio, tabla)
+    ]
+
+
+def listar_particiones(connection, tabla=TABLA_MOVIMIENTOS):
+    """(nombre, límites) de las particiones de la tabla"""
+    if not tabla_particionada(connection, tabla):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+            [tabla]
+        )
+        return cursor.fetchall()
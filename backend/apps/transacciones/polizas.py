@@ -0,0 +1,166 @@
+"""
+Captura de pólizas con todos sus movimientos en una sola pasada
+Las líneas se validan en memoria, cuentas, centros de costo y proyectos se
+resuelven con una consulta cada uno, los movimientos se insertan con
+bulk_create y los totales se calculan una sola vez. Lo usan el API, la
+vista de captura y el admin
+"""
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from apps.catalogo_cuentas.models import CuentaContable
+from apps.empresas.models import Empresa
+from .models import TransaccionContable, MovimientoContable, SaldoPeriodo, invalidar_indice_al_confirmar
+
+CentroCosto = MovimientoContable._meta.get_field('centro_costo').related_model
+Proyecto = MovimientoContable._meta.get_field('proyecto').related_model
+
+ESTADOS_PROYECTO_CAPTURA = ['ACTIVO', 'PLANIFICACION']
+
+
+def _id(valor):
+    """Id de una instancia, número o texto; None si viene vacío"""
+    if valor in (None, ''):
+        return None
+    if hasattr(valor, 'pk'):
+        return valor.pk
+    return int(valor)
+
+
+def _importe(valor):
+    if valor in (None, ''):
+        return Decimal('0.00')
+    return Decimal(str(valor))
+
+
+def preparar_movimientos(empresa_id, movimientos):
+    """
+    Valida las líneas de una póliza y resuelve sus relaciones
+    Cada línea es un dict con cuenta_id, debe, haber y opcionalmente concepto,
+    centro_costo_id y proyecto_id (ids o instancias). Devuelve los datos listos
+    para crear los movimientos o lanza ValidationError con los errores de
+    todas las líneas
+    """
+    errores = []
+    lineas = []
+    for numero, datos in enumerate(movimientos, start=1):
+        try:
+            linea = {
+                'cuenta_id': _id(datos.get('cuenta_id')),
+                'centro_costo_id': _id(datos.get('centro_costo_id')),
+                'proyecto_id': _id(datos.get('proyecto_id')),
+                'debe': _importe(datos.get('debe')),
+                'haber': _importe(datos.get('haber')),
+                'concepto': datos.get('concepto') or '',
+            }
+        except (InvalidOperation, TypeError, ValueError):
+            errores.append(f'Movimiento {numero}: datos inválidos')
+            continue
+        lineas.append((numero, linea))
+
+    def resolver(modelo, campo):
+        ids = {linea[campo] for _numero, linea in lineas if linea[campo] is not None}
+        if not ids:
+            return {}
+        return modelo.objects.filter(empresa_id=empresa_id, activo=True).in_bulk(ids)
+
+    cuentas = resolver(CuentaContable, 'cuenta_id')
+    centros = resolver(CentroCosto, 'centro_costo_id')
+    proyectos = resolver(Proyecto, 'proyecto_id')
+
+    preparados = []
+    for numero, linea in lineas:
+        errores_linea = []
+        debe, haber = linea['debe'], linea['haber']
+        if debe < 0 or haber < 0:
+            errores_linea.append('Los importes no pueden ser negativos')
+        elif debe > 0 and haber > 0:
+            errores_linea.append('Un movimiento no puede tener tanto debe como haber')
+        elif debe == 0 and haber == 0:
+            errores_linea.append('Un movimiento debe tener importe en debe o haber')
+
+        cuenta = cuentas.get(linea['cuenta_id'])
+        if cuenta is None:
+            errores_linea.append('La cuenta no existe o está inactiva')
+        elif not cuenta.afectable:
+            errores_linea.append(f'La cuenta {cuenta.codigo} - {cuenta.nombre} no es afectable')
+
+        centro_costo = None
+        if linea['centro_costo_id'] is not None:
+            centro_costo = centros.get(linea['centro_costo_id'])
+            if centro_costo is None:
+                errores_linea.append('El centro de costo no existe o está inactivo')
+            elif not centro_costo.permite_movimientos:
+                errores_linea.append('El centro de costo seleccionado no permite movimientos directos')
+
+        proyecto = None
+        if linea['proyecto_id'] is not None:
+            proyecto = proyectos.get(linea['proyecto_id'])
+            if proyecto is None:
+                errores_linea.append('El proyecto no existe o está inactivo')
+            elif proyecto.estado not in ESTADOS_PROYECTO_CAPTURA:
+                errores_linea.append('Solo se pueden asignar movimientos a proyectos activos o en planificación')
+
+        if errores_linea:
+            errores.extend(f'Movimiento {numero}: {error}' for error in errores_linea)
+            continue
+        preparados.append({
+            'cuenta': cuenta,
+            'centro_costo': centro_costo,
+            'proyecto': proyecto,
+            'concepto': linea['concepto'],
+            'debe': debe,
+            'haber': haber,
+        })
+
+    if errores:
+        raise ValidationError(errores)
+    return preparados
+
+
+def _insertar_movimientos(transaccion, lineas, usuario):
+    movimientos = []
+    for linea in lineas:
+        movimiento = MovimientoContable(transaccion=transaccion, creado_por=usuario, **linea)
+        movimiento.copiar_transaccion()
+        movimientos.append(movimiento)
+    return MovimientoContable.objects.bulk_create(movimientos, batch_size=500)
+
+
+def crear_poliza(empresa, usuario, movimientos, **datos):
+    """
+    Crea la transacción (folio, fecha, tipo, concepto... en datos) con sus
+    movimientos y los totales ya calculados
+    """
+    lineas = preparar_movimientos(empresa.id, movimientos)
+    with transaction.atomic():
+        transaccion = TransaccionContable.objects.create(
+            empresa=empresa,
+            creado_por=usuario,
+            total_debe=sum((linea['debe'] for linea in lineas), Decimal('0.00')),
+            total_haber=sum((linea['haber'] for linea in lineas), Decimal('0.00')),
+            **datos
+        )
+        _insertar_movimientos(transaccion, lineas, usuario)
+    return transaccion
+
+
+def agregar_movimientos(transaccion, movimientos, usuario):
+    """Agrega movimientos a una transacción existente y recalcula sus totales una vez"""
+    lineas = preparar_movimientos(transaccion.empresa_id, movimientos)
+    if not lineas:
+        return []
+    with transaction.atomic():
+        creados = _insertar_movimientos(transaccion, lineas, usuario)
+        transaccion.calcular_totales()
+        if transaccion.estado == 'CONTABILIZADA':
+            # bulk_create no pasa por save(): los saldos del periodo se suman aquí
+            totales = {}
+            for linea in lineas:
+                llave = (linea['cuenta'].id, transaccion.fecha.year, transaccion.fecha.month)
+                cargos, abonos, cantidad = totales.get(llave, (Decimal('0.00'), Decimal('0.00'), 0))
+                totales[llave] = (cargos + linea['debe'], abonos + linea['haber'], cantidad + 1)
+            SaldoPeriodo.aplicar_totales(transaccion.empresa_id, totales)
+            Empresa.incrementar_version_contable(transaccion.empresa_id)
+            invalidar_indice_al_confirmar(transaccion.empresa_id, transaccion.fecha)
+    return creados
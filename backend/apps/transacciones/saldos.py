@@ -0,0 +1,633 @@
+"""
+Cálculo de saldos por cuenta
+Los rangos se resuelven con SaldoPeriodo (meses completos) más los fragmentos
+de mes desde los movimientos. Los saldos a una fecha usan IndiceSaldos, una
+serie diaria acumulada por cuenta guardada completa en caché por empresa.
+Costo del índice: cualquier contabilización, cancelación o edición de un
+movimiento contabilizado con fecha anterior a hoy cambia la generación
+(invalidar_indice_saldos), y la siguiente consulta a una fecha lo reconstruye
+con una consulta agrupada sobre toda la historia de movimientos; incluso la
+consulta de una sola cuenta lee el índice completo del caché. No se arma desde
+SaldoPeriodo porque éste es mensual y el índice necesita cortes por día.
+Con capturas frecuentes en fechas pasadas conviene consultar por rango
+(calcular_saldos con fecha_inicio), que no depende del índice
+"""
+import time
+from array import array
+from bisect import bisect_right
+from calendar import monthrange
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from django.db.models.functions import (
+    ExtractYear, ExtractMonth, TruncMonth, TruncQuarter, TruncYear
+)
+from apps.catalogo_cuentas.models import CuentaContable
+from .models import MovimientoContable, SaldoPeriodo
+
+
+CERO = Decimal('0.00')
+
+# Vigencia del índice de saldos en caché (se reconstruye al menos una vez al día)
+INDICE_SALDOS_TIMEOUT = 60 * 60 * 24
+
+# Agrupaciones de periodo para reportes comparativos: (función de truncado, meses por periodo)
+AGRUPACIONES_PERIODO = {
+    'mensual': (TruncMonth, 1),
+    'trimestral': (TruncQuarter, 3),
+    'anual': (TruncYear, 12),
+}
+
+CAMPOS_CUENTA = [
+    'cuenta_id',
+    'cuenta__codigo',
+    'cuenta__nombre',
+    'cuenta__tipo',
+    'cuenta__naturaleza',
+    'cuenta__activo',
+]
+
+
+def movimientos_contabilizados(empresa, fecha_inicio=None, fecha_fin=None):
+    """Movimientos activos de transacciones contabilizadas de la empresa"""
+    movimientos = MovimientoContable.objects.filter(
+        empresa=empresa,
+        estado='CONTABILIZADA',
+        activo=True
+    )
+
+    if fecha_inicio:
+        movimientos = movimientos.filter(fecha__gte=fecha_inicio)
+    if fecha_fin:
+        movimientos = movimientos.filter(fecha__lte=fecha_fin)
+
+    return movimientos
+
+
+def calcular_saldo(naturaleza, cargos, abonos):
+    """Saldo de una cuenta según su naturaleza"""
+    if naturaleza == 'DEUDORA':
+        return cargos - abonos
+    return abonos - cargos
+
+
+def _inicio_mes(anio, mes):
+    return date(anio, mes, 1)
+
+
+def _fin_mes(anio, mes):
+    return date(anio, mes, monthrange(anio, mes)[1])
+
+
+def _mes_siguiente(anio, mes):
+    return (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+
+
+def _mes_anterior(anio, mes):
+    return (anio - 1, 12) if mes == 1 else (anio, mes - 1)
+
+
+def _dividir_rango(fecha_inicio, fecha_fin):
+    """
+    Divide un rango de fechas en meses completos (se leen de SaldoPeriodo) y
+    fragmentos de mes en los extremos (se leen de MovimientoContable)
+    Regresa (meses, fragmentos); meses es None si el rango no contiene meses
+    completos, o (primer_mes, ultimo_mes) donde None en un extremo es sin límite
+    """
+    primer_mes = None
+    if fecha_inicio:
+        primer_mes = (fecha_inicio.year, fecha_inicio.month)
+        if fecha_inicio.day != 1:
+            primer_mes = _mes_siguiente(*primer_mes)
+
+    ultimo_mes = None
+    if fecha_fin:
+        ultimo_mes = (fecha_fin.year, fecha_fin.month)
+        if fecha_fin != _fin_mes(*ultimo_mes):
+            ultimo_mes = _mes_anterior(*ultimo_mes)
+
+    if primer_mes and ultimo_mes and primer_mes > ultimo_mes:
+        # El rango no contiene ningún mes completo
+        return None, [(fecha_inicio, fecha_fin)]
+
+    fragmentos = []
+    if primer_mes and fecha_inicio < _inicio_mes(*primer_mes):
+        fragmentos.append((fecha_inicio, _inicio_mes(*primer_mes) - timedelta(days=1)))
+    if ultimo_mes and fecha_fin > _fin_mes(*ultimo_mes):
+        fragmentos.append((_fin_mes(*ultimo_mes) + timedelta(days=1), fecha_fin))
+
+    return (primer_mes, ultimo_mes), fragmentos
+
+
+def _filtrar_cuentas(queryset, tipos=None, cuentas=None, solo_cuentas_activas=False):
+    if tipos:
+        queryset = queryset.filter(cuenta__tipo__in=tipos)
+    if cuentas is not None:
+        queryset = queryset.filter(cuenta__in=cuentas)
+    if solo_cuentas_activas:
+        queryset = queryset.filter(cuenta__activo=True)
+    return queryset
+
+
+def calcular_saldos(empresa, fecha_fin=None, fecha_inicio=None, tipos=None,
+                    cuentas=None, solo_cuentas_activas=False):
+    """
+    Calcula cargos, abonos y saldo por cuenta
+    Los saldos a una fecha (sin fecha_inicio) se resuelven con el índice de
+    saldos acumulados. En rangos, los meses completos se leen de SaldoPeriodo
+    (filas cuenta × periodo) y sólo los fragmentos de mes en los extremos se
+    agregan desde los movimientos.
+    Regresa una lista de diccionarios ordenada por código de cuenta
+    """
+    if fecha_inicio is None and fecha_fin is not None:
+        return calcular_saldos_al(
+            empresa, fecha_fin, tipos=tipos, cuentas=cuentas,
+            solo_cuentas_activas=solo_cuentas_activas
+        )
+
+    meses, fragmentos = _dividir_rango(fecha_inicio, fecha_fin)
+    filtros_cuenta = {
+        'tipos': tipos,
+        'cuentas': cuentas,
+        'solo_cuentas_activas': solo_cuentas_activas,
+    }
+
+    consultas = []
+
+    if meses:
+        primer_mes, ultimo_mes = meses
+        periodos = SaldoPeriodo.objects.filter(empresa=empresa)
+        if primer_mes:
+            periodos = periodos.filter(
+                Q(anio__gt=primer_mes[0]) | Q(anio=primer_mes[0], mes__gte=primer_mes[1])
+            )
+        if ultimo_mes:
+            periodos = periodos.filter(
+                Q(anio__lt=ultimo_mes[0]) | Q(anio=ultimo_mes[0], mes__lte=ultimo_mes[1])
+            )
+        consultas.append(
+            _filtrar_cuentas(periodos, **filtros_cuenta).values(*CAMPOS_CUENTA).annotate(
+                cargos_total=Sum('cargos'),
+                abonos_total=Sum('abonos')
+            ).order_by()
+        )
+
+    if fragmentos:
+        rango = Q()
+        for inicio, fin in fragmentos:
+            condicion = Q()
+            if inicio:
+                condicion &= Q(fecha__gte=inicio)
+            if fin:
+                condicion &= Q(fecha__lte=fin)
+            rango |= condicion
+        movimientos = movimientos_contabilizados(empresa).filter(rango)
+        consultas.append(
+            _filtrar_cuentas(movimientos, **filtros_cuenta).values(*CAMPOS_CUENTA).annotate(
+                cargos_total=Sum('debe'),
+                abonos_total=Sum('haber')
+            ).order_by()
+        )
+
+    acumulado = {}
+    for consulta in consultas:
+        for fila in consulta:
+            cuenta = acumulado.setdefault(fila['cuenta_id'], {
+                'cuenta_id': fila['cuenta_id'],
+                'codigo': fila['cuenta__codigo'],
+                'nombre': fila['cuenta__nombre'],
+                'tipo': fila['cuenta__tipo'],
+                'naturaleza': fila['cuenta__naturaleza'],
+                'activa': fila['cuenta__activo'],
+                'cargos': CERO,
+                'abonos': CERO,
+            })
+            cuenta['cargos'] += fila['cargos_total'] or CERO
+            cuenta['abonos'] += fila['abonos_total'] or CERO
+
+    saldos = []
+    for cuenta in sorted(acumulado.values(), key=lambda c: c['codigo']):
+        cuenta['saldo'] = calcular_saldo(cuenta['naturaleza'], cuenta['cargos'], cuenta['abonos'])
+        saldos.append(cuenta)
+
+    return saldos
+
+
+def reconstruir_saldos_periodo(empresa=None):
+    """
+    Reconstruye desde cero la tabla SaldoPeriodo a partir de los movimientos
+    contabilizados. Regresa el número de registros creados
+    """
+    movimientos = MovimientoContable.objects.filter(
+        estado='CONTABILIZADA',
+        activo=True
+    )
+    saldos = SaldoPeriodo.objects.all()
+    if empresa:
+        movimientos = movimientos.filter(empresa=empresa)
+        saldos = saldos.filter(empresa=empresa)
+
+    totales = movimientos.values(
+        'empresa_id',
+        'cuenta_id',
+        anio=ExtractYear('fecha'),
+        mes=ExtractMonth('fecha'),
+    ).annotate(
+        cargos=Sum('debe'),
+        abonos=Sum('haber'),
+        cantidad=Count('id')
+    ).order_by()
+
+    with transaction.atomic():
+        saldos.delete()
+        creados = SaldoPeriodo.objects.bulk_create(
+            [
+                SaldoPeriodo(
+                    empresa_id=total['empresa_id'],
+                    cuenta_id=total['cuenta_id'],
+                    anio=total['anio'],
+                    mes=total['mes'],
+                    cargos=total['cargos'],
+                    abonos=total['abonos'],
+                    num_movimientos=total['cantidad']
+                )
+                for total in totales.iterator()
+            ],
+            batch_size=1000
+        )
+
+    return len(creados)
+
+
+def _a_centavos(importe):
+    return int((importe or CERO) * 100)
+
+
+def _a_pesos(centavos):
+    return Decimal(centavos).scaleb(-2)
+
+
+class IndiceSaldos:
+    """
+    Índice de saldos acumulados diarios por cuenta
+    Para cada cuenta guarda una serie ordenada por fecha con los cargos y abonos
+    acumulados (en centavos) de los días anteriores a `corte`. El acumulado a
+    cualquier fecha se obtiene con una búsqueda binaria sobre la serie.
+    """
+
+    def __init__(self, corte, series):
+        self.corte = corte
+        self.series = series
+
+    @classmethod
+    def construir(cls, empresa, corte):
+        """Construye el índice con una consulta agrupada por cuenta y día"""
+        filas = movimientos_contabilizados(
+            empresa, fecha_fin=corte - timedelta(days=1)
+        ).values('cuenta_id', 'fecha').annotate(
+            cargos=Sum('debe'),
+            abonos=Sum('haber')
+        ).order_by('cuenta_id', 'fecha')
+
+        series = {}
+        for fila in filas.iterator():
+            fechas, cargos, abonos = series.setdefault(
+                fila['cuenta_id'], (array('l'), array('q'), array('q'))
+            )
+            fechas.append(fila['fecha'].toordinal())
+            cargos.append((cargos[-1] if cargos else 0) + _a_centavos(fila['cargos']))
+            abonos.append((abonos[-1] if abonos else 0) + _a_centavos(fila['abonos']))
+
+        return cls(corte, series)
+
+    def sumas_al(self, cuenta_id, fecha):
+        """Cargos y abonos acumulados de la cuenta hasta la fecha (inclusive), o None"""
+        serie = self.series.get(cuenta_id)
+        if not serie:
+            return None
+
+        fechas, cargos, abonos = serie
+        posicion = bisect_right(fechas, fecha.toordinal())
+        if posicion == 0:
+            return None
+        return _a_pesos(cargos[posicion - 1]), _a_pesos(abonos[posicion - 1])
+
+
+def _clavegeneracion_saldos(empresa_id):
+    return f'indice_saldos:{empresa_id}:generacion'
+
+
+def generacion_saldos(empresa_id):
+    """
+    Generación vigente de los saldos históricos de la empresa
+    Cambia cada vez que se contabiliza o cancela una transacción con fecha
+    pasada; sirve para versionar en caché datos derivados de días cerrados.
+    Se inicializa con la hora actual para no reutilizar generaciones anteriores
+    si la clave se pierde del caché
+    """
+    clave = _clavegeneracion_saldos(empresa_id)
+    generacion = cache.get(clave)
+    if generacion is None:
+        cache.add(clave, int(time.time() * 1000), None)
+        generacion = cache.get(clave)
+    return generacion
+
+
+def obtener_indice_saldos(empresa):
+    """Obtiene el índice de saldos de la empresa desde caché o lo construye"""
+    generacion = generacion_saldos(empresa.id)
+    clave = f'indice_saldos:{empresa.id}:{generacion}'
+
+    indice = cache.get(clave)
+    if indice is None:
+        indice = IndiceSaldos.construir(empresa, date.today())
+        cache.set(clave, indice, INDICE_SALDOS_TIMEOUT)
+    return indice
+
+
+def invalidar_indice_saldos(empresa_id, fecha):
+    """
+    Invalida el índice cuando se contabiliza o cancela una transacción con
+    fecha pasada. Las transacciones de hoy en adelante no están indexadas
+    (se suman al consultar), por lo que no requieren invalidación
+    """
+    if fecha >= date.today():
+        return
+
+    generacion_saldos(empresa_id)
+    try:
+        cache.incr(_clavegeneracion_saldos(empresa_id))
+    except ValueError:
+        # La clave expiró entre la lectura y el incremento
+        cache.add(_clavegeneracion_saldos(empresa_id), int(time.time() * 1000), None)
+
+
+def calcular_saldos_al(empresa, fecha, tipos=None, cuentas=None, solo_cuentas_activas=False):
+    """
+    Saldos por cuenta a una fecha usando el índice de saldos acumulados
+    Cuesta una búsqueda binaria por cuenta, más una consulta agrupada para los
+    días posteriores al corte del índice
+    """
+    indice = obtener_indice_saldos(empresa)
+
+    catalogo = CuentaContable.objects.filter(empresa=empresa)
+    if tipos:
+        catalogo = catalogo.filter(tipo__in=tipos)
+    if cuentas is not None:
+        catalogo = catalogo.filter(id__in=cuentas)
+    if solo_cuentas_activas:
+        catalogo = catalogo.filter(activo=True)
+
+    recientes = {}
+    if fecha >= indice.corte:
+        recientes = {
+            fila['cuenta_id']: fila
+            for fila in movimientos_contabilizados(
+                empresa, fecha_inicio=indice.corte, fecha_fin=fecha
+            ).values('cuenta_id').annotate(
+                cargos=Sum('debe'),
+                abonos=Sum('haber')
+            ).order_by()
+        }
+
+    saldos = []
+    for cuenta in catalogo.values('id', 'codigo', 'nombre', 'tipo', 'naturaleza', 'activo').order_by('codigo'):
+        sumas = indice.sumas_al(cuenta['id'], fecha)
+        reciente = recientes.get(cuenta['id'])
+        if sumas is None and reciente is None:
+            continue
+
+        cargos, abonos = sumas or (CERO, CERO)
+        if reciente:
+            cargos += reciente['cargos'] or CERO
+            abonos += reciente['abonos'] or CERO
+
+        saldos.append({
+            'cuenta_id': cuenta['id'],
+            'codigo': cuenta['codigo'],
+            'nombre': cuenta['nombre'],
+            'tipo': cuenta['tipo'],
+            'naturaleza': cuenta['naturaleza'],
+            'activa': cuenta['activo'],
+            'cargos': cargos,
+            'abonos': abonos,
+            'saldo': calcular_saldo(cuenta['naturaleza'], cargos, abonos),
+        })
+
+    return saldos
+
+
+def mapa_ancestros(catalogo):
+    """
+    Calcula para cada cuenta la lista de sus ancestros (padre, abuelo, ...)
+    `catalogo` es un diccionario cuenta_id -> fila con 'cuenta_padre_id'
+    """
+    ancestros = {}
+
+    for cuenta_id in catalogo:
+        ruta = []
+        actual = cuenta_id
+        while actual not in ancestros:
+            padre = catalogo[actual]['cuenta_padre_id']
+            if padre not in catalogo or padre in ruta or padre == cuenta_id:
+                ancestros[actual] = []
+                break
+            ruta.append(actual)
+            actual = padre
+        # Completar la ruta desde el ancestro ya resuelto hacia abajo
+        for descendiente in reversed(ruta):
+            padre = catalogo[descendiente]['cuenta_padre_id']
+            ancestros[descendiente] = [padre] + ancestros[padre]
+
+    return ancestros
+
+
+def acumular_por_nivel(empresa, saldos, nivel=None):
+    """
+    Acumula los saldos de las cuentas hacia sus cuentas padre del catálogo
+    Lee el catálogo en una consulta y recorre los saldos una sola vez.
+    Regresa las cuentas hasta `nivel` (todas si es None) con sus subtotales,
+    ordenadas por código
+    """
+    catalogo = {
+        cuenta['id']: cuenta
+        for cuenta in CuentaContable.objects.filter(empresa=empresa).values(
+            'id', 'codigo', 'nombre', 'tipo', 'naturaleza', 'activo', 'nivel', 'cuenta_padre_id'
+        )
+    }
+    ancestros = mapa_ancestros(catalogo)
+
+    acumulados = {}
+    subtotales = set()
+    for saldo in saldos:
+        for cuenta_id in [saldo['cuenta_id']] + ancestros.get(saldo['cuenta_id'], []):
+            cargos, abonos = acumulados.get(cuenta_id, (CERO, CERO))
+            acumulados[cuenta_id] = (cargos + saldo['cargos'], abonos + saldo['abonos'])
+        subtotales.update(ancestros.get(saldo['cuenta_id'], []))
+
+    resultado = []
+    for cuenta_id, (cargos, abonos) in acumulados.items():
+        cuenta = catalogo[cuenta_id]
+        if nivel is not None and cuenta['nivel'] > nivel:
+            continue
+
+        resultado.append({
+            'cuenta_id': cuenta_id,
+            'codigo': cuenta['codigo'],
+            'nombre': cuenta['nombre'],
+            'tipo': cuenta['tipo'],
+            'naturaleza': cuenta['naturaleza'],
+            'activa': cuenta['activo'],
+            'nivel': cuenta['nivel'],
+            'es_subtotal': cuenta_id in subtotales,
+            'cargos': cargos,
+            'abonos': abonos,
+            'saldo': calcular_saldo(cuenta['naturaleza'], cargos, abonos),
+        })
+
+    resultado.sort(key=lambda fila: fila['codigo'])
+    return resultado
+
+
+def periodos_rango(fecha_inicio, fecha_fin, agrupacion):
+    """
+    Lista los periodos (mensuales, trimestrales o anuales) que cubren el rango
+    Cada periodo es un diccionario con su inicio (sin recortar, como lo regresa
+    el truncado en la base de datos), etiqueta y fechas recortadas al rango
+    """
+    _, meses = AGRUPACIONES_PERIODO[agrupacion]
+    mes_inicial = (fecha_inicio.month - 1) // meses * meses + 1
+    anio, mes = fecha_inicio.year, mes_inicial
+
+    periodos = []
+    while _inicio_mes(anio, mes) <= fecha_fin:
+        inicio = _inicio_mes(anio, mes)
+        if agrupacion == 'mensual':
+            etiqueta = inicio.strftime('%Y-%m')
+        elif agrupacion == 'trimestral':
+            etiqueta = f'{anio}-T{(mes - 1) // 3 + 1}'
+        else:
+            etiqueta = str(anio)
+
+        for _ in range(meses - 1):
+            anio, mes = _mes_siguiente(anio, mes)
+        fin = _fin_mes(anio, mes)
+        anio, mes = _mes_siguiente(anio, mes)
+
+        periodos.append({
+            'inicio': inicio,
+            'etiqueta': etiqueta,
+            'fecha_inicio': max(inicio, fecha_inicio),
+            'fecha_fin': min(fin, fecha_fin),
+        })
+
+    return periodos
+
+
+def calcular_saldos_por_periodo(empresa, fecha_inicio, fecha_fin, agrupacion='mensual', tipos=None):
+    """
+    Cargos y abonos por cuenta y periodo en una sola consulta agrupada
+    Regresa (periodos, cuentas); cada cuenta trae la lista `periodos` con un
+    diccionario de cargos y abonos por columna, en el orden de `periodos`
+    """
+    truncar, _ = AGRUPACIONES_PERIODO[agrupacion]
+    periodos = periodos_rango(fecha_inicio, fecha_fin, agrupacion)
+    columnas = {periodo['inicio']: posicion for posicion, periodo in enumerate(periodos)}
+
+    filas = _filtrar_cuentas(
+        movimientos_contabilizados(empresa, fecha_inicio, fecha_fin), tipos=tipos
+    ).annotate(
+        periodo=truncar('fecha')
+    ).values('periodo', *CAMPOS_CUENTA).annotate(
+        cargos=Sum('debe'),
+        abonos=Sum('haber')
+    ).order_by('cuenta__codigo', 'periodo')
+
+    cuentas = {}
+    for fila in filas:
+        cuenta = cuentas.get(fila['cuenta_id'])
+        if cuenta is None:
+            cuenta = cuentas[fila['cuenta_id']] = {
+                'cuenta_id': fila['cuenta_id'],
+                'codigo': fila['cuenta__codigo'],
+                'nombre': fila['cuenta__nombre'],
+                'tipo': fila['cuenta__tipo'],
+                'naturaleza': fila['cuenta__naturaleza'],
+                'activa': fila['cuenta__activo'],
+                'periodos': [{'cargos': CERO, 'abonos': CERO} for _ in periodos],
+            }
+        columna = cuenta['periodos'][columnas[fila['periodo']]]
+        columna['cargos'] += fila['cargos'] or CERO
+        columna['abonos'] += fila['abonos'] or CERO
+
+    return periodos, list(cuentas.values())
+
+
+def serie_ingresos_gastos(empresa, meses, centro_costo=None, proyecto=None):
+    """
+    Ingresos y gastos (costos + gastos) por mes de los últimos `meses` meses
+    Los meses cerrados se guardan en caché sin expiración, versionados con la
+    generación de saldos; sólo el mes en curso y los meses faltantes se
+    calculan, con una consulta agrupada por mes
+    """
+    hoy = date.today()
+    anio, mes = hoy.year, hoy.month
+    periodos = [(anio, mes)]
+    for _ in range(meses - 1):
+        anio, mes = _mes_anterior(anio, mes)
+        periodos.append((anio, mes))
+    periodos.reverse()
+
+    generacion = generacion_saldos(empresa.id)
+    claves = {
+        periodo: (f'serie_ingresos_gastos:{empresa.id}:{generacion}:'
+                  f'{centro_costo or "-"}:{proyecto or "-"}:{periodo[0]}-{periodo[1]:02d}')
+        for periodo in periodos
+    }
+    cerrados = periodos[:-1]
+    en_cache = cache.get_many([claves[periodo] for periodo in cerrados])
+
+    valores = {
+        periodo: en_cache[claves[periodo]]
+        for periodo in cerrados if claves[periodo] in en_cache
+    }
+    pendientes = [periodo for periodo in periodos if periodo not in valores]
+
+    # Una sola consulta agrupada desde el primer mes pendiente hasta hoy
+    movimientos = movimientos_contabilizados(
+        empresa, fecha_inicio=_inicio_mes(*pendientes[0]), fecha_fin=hoy
+    ).filter(cuenta__tipo__in=['INGRESO', 'COSTO', 'GASTO'])
+    if centro_costo:
+        movimientos = movimientos.filter(centro_costo_id=centro_costo)
+    if proyecto:
+        movimientos = movimientos.filter(proyecto_id=proyecto)
+
+    calculados = {periodo: (CERO, CERO) for periodo in pendientes}
+    for fila in movimientos.annotate(
+        mes=TruncMonth('fecha')
+    ).values('mes', 'cuenta__tipo').annotate(
+        cargos=Sum('debe'),
+        abonos=Sum('haber')
+    ).order_by():
+        periodo = (fila['mes'].year, fila['mes'].month)
+        if periodo not in calculados:
+            continue
+        ingresos, gastos = calculados[periodo]
+        if fila['cuenta__tipo'] == 'INGRESO':
+            ingresos += (fila['abonos'] or CERO) - (fila['cargos'] or CERO)
+        else:
+            gastos += (fila['cargos'] or CERO) - (fila['abonos'] or CERO)
+        calculados[periodo] = (ingresos, gastos)
+
+    cache.set_many(
+        {claves[periodo]: calculados[periodo] for periodo in pendientes if periodo in cerrados},
+        None
+    )
+    valores.update(calculados)
+
+    return [
+        {'mes': _inicio_mes(*periodo), 'ingresos': valores[periodo][0], 'gastos': valores[periodo][1]}
+        for periodo in periodos
+    ]
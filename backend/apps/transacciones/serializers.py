@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from decimal import Decimal
-from .models import TransaccionContable, MovimientoContable
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch, prefetch_related_objects
+from .models import TransaccionContable, MovimientoContable, ImportacionJob, ErrorImportacion
+from .polizas import crear_poliza
+from .importacion import EXTENSIONES
+from .transiciones import ACCIONES
 
 
 class MovimientoContableSerializer(serializers.ModelSerializer):
@@ -41,6 +46,16 @@ class MovimientoContableSerializer(serializers.ModelSerializer):
         return data
 
 
+class MovimientoPolizaSerializer(MovimientoContableSerializer):
+    """
+    Línea de captura de una póliza: cuenta, centro de costo y proyecto llegan
+    por id y el servicio de pólizas los resuelve en lote
+    """
+    cuenta = serializers.IntegerField(source='cuenta_id')
+    centro_costo = serializers.IntegerField(source='centro_costo_id', required=False, allow_null=True)
+    proyecto = serializers.IntegerField(source='proyecto_id', required=False, allow_null=True)
+
+
 class TransaccionContableSerializer(serializers.ModelSerializer):
     """Serializer básico para transacciones contables"""
     movimientos = MovimientoContableSerializer(many=True, read_only=True)
@@ -60,6 +75,9 @@ class TransaccionContableSerializer(serializers.ModelSerializer):
         ]
         
     def get_total_movimientos(self, obj):
+        # El ViewSet anota num_movimientos para no contar por cada fila
+        if hasattr(obj, 'num_movimientos'):
+            return obj.num_movimientos
         return obj.movimientos.count()
         
     def validate_folio(self, value):
@@ -86,7 +104,7 @@ class TransaccionContableSerializer(serializers.ModelSerializer):
 
 class TransaccionContableCreateSerializer(serializers.ModelSerializer):
     """Serializer para crear transacciones con movimientos"""
-    movimientos = MovimientoContableSerializer(many=True)
+    movimientos = MovimientoPolizaSerializer(many=True)
     
     class Meta:
         model = TransaccionContable
@@ -114,27 +132,16 @@ class TransaccionContableCreateSerializer(serializers.ModelSerializer):
         if not empresa:
             raise serializers.ValidationError("No se pudo determinar la empresa")
             
-        # Crear la transacción
-        transaccion = TransaccionContable.objects.create(
-            empresa=empresa,
-            **validated_data
-        )
-        # Asignar creado_por después de la creación
-        transaccion.creado_por = request.user
-        transaccion.save()
-        
-        # Crear los movimientos
-        for movimiento_data in movimientos_data:
-            movimiento = MovimientoContable.objects.create(
-                transaccion=transaccion,
-                **movimiento_data
-            )
-            movimiento.creado_por = request.user
-            movimiento.save()
-            
-        # Recalcular totales
-        transaccion.calcular_totales()
+        try:
+            transaccion = crear_poliza(empresa, request.user, movimientos_data, **validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'movimientos': e.messages})
         
+        # Cargar los movimientos con sus relaciones para la respuesta
+        prefetch_related_objects([transaccion], Prefetch(
+            'movimientos',
+            queryset=MovimientoContable.objects.select_related('cuenta', 'centro_costo', 'proyecto')
+        ))
         return transaccion
         
     def validate(self, data):
@@ -171,4 +178,73 @@ class TransaccionContableListSerializer(serializers.ModelSerializer):
         ]
         
     def get_total_movimientos(self, obj):
-        return obj.movimientos.count()
\ No newline at end of file
+        # El ViewSet anota num_movimientos para no contar por cada fila
+        if hasattr(obj, 'num_movimientos'):
+            return obj.num_movimientos
+        return obj.movimientos.count()
+
+
+class ImportacionJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer para trabajos de importación de pólizas
+    """
+    empresa_nombre = serializers.CharField(source='empresa.nombre', read_only=True)
+
+    class Meta:
+        model = ImportacionJob
+        fields = [
+            'id', 'empresa', 'empresa_nombre', 'simulacion', 'asignar_folios', 'estado', 'progreso',
+            'total_transacciones', 'total_movimientos', 'transacciones_validas',
+            'transacciones_importadas', 'movimientos_importados', 'total_errores',
+            'mensaje_error', 'fecha_inicio_proceso', 'fecha_fin_proceso', 'fecha_creacion'
+        ]
+        read_only_fields = fields
+
+
+class ImportacionJobCreateSerializer(serializers.Serializer):
+    """
+    Serializer para solicitar una importación (Excel o CSV)
+    """
+    archivo = serializers.FileField()
+    simulacion = serializers.BooleanField(default=False)
+    asignar_folios = serializers.BooleanField(default=False)
+
+    def validate_archivo(self, value):
+        if not value.name.lower().endswith(EXTENSIONES):
+            raise serializers.ValidationError(
+                f"Formato no soportado; use {' o '.join(EXTENSIONES)}"
+            )
+        return value
+
+
+class ErrorImportacionSerializer(serializers.ModelSerializer):
+    """Error de una fila del archivo importado"""
+
+    class Meta:
+        model = ErrorImportacion
+        fields = ['id', 'hoja', 'fila', 'folio', 'mensaje']
+
+
+class TransicionMasivaSerializer(serializers.Serializer):
+    """
+    Serializer para cambiar de estado muchas transacciones a la vez
+    Se indican los ids o al menos un filtro (fechas y tipo)
+    """
+    accion = serializers.ChoiceField(choices=list(ACCIONES))
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    fecha_desde = serializers.DateField(required=False)
+    fecha_hasta = serializers.DateField(required=False)
+    tipo = serializers.ChoiceField(choices=TransaccionContable.TIPO_CHOICES, required=False)
+
+    def validate(self, data):
+        filtros = {}
+        if 'fecha_desde' in data:
+            filtros['fecha__gte'] = data['fecha_desde']
+        if 'fecha_hasta' in data:
+            filtros['fecha__lte'] = data['fecha_hasta']
+        if 'tipo' in data:
+            filtros['tipo'] = data['tipo']
+        if 'ids' not in data and not filtros:
+            raise serializers.ValidationError('Indique los ids o al menos un filtro')
+        data['filtros'] = filtros
+        return data
@@ -0,0 +1,70 @@
+from celery import shared_task
+from django.db import connection
+from .particiones import asegurar_particiones
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def crear_particiones_movimientos():
+    """
+    Crea por adelantado las particiones por año de los movimientos
+    Programada en Celery beat (CELERY_BEAT_SCHEDULE)
+    """
+    creadas = asegurar_particiones(connection)
+    if creadas:
+        logger.info(f"Particiones de movimientos creadas: {', '.join(creadas)}")
+    return {'status': 'success', 'creadas': creadas}
+
+
+@shared_task(bind=True)
+def importar_transacciones(self, job_id):
+    """
+    Valida e importa (o solo valida, en simulación) el archivo de un trabajo de importación
+    """
+    from django.utils import timezone as django_timezone
+    from .importacion import ejecutar_importacion
+    from .models import ImportacionJob
+
+    try:
+        job = ImportacionJob.objects.get(id=job_id)
+    except ImportacionJob.DoesNotExist:
+        logger.error(f"Trabajo de importación no encontrado (job_id: {job_id})")
+        return {'status': 'error', 'message': 'Trabajo no encontrado'}
+
+    try:
+        job.estado = 'PROCESANDO'
+        job.progreso = 5
+        job.task_id = self.request.id or ''
+        job.fecha_inicio_proceso = django_timezone.now()
+        job.save(update_fields=['estado', 'progreso', 'task_id', 'fecha_inicio_proceso'])
+
+        ejecutar_importacion(job)
+
+        job.estado = 'COMPLETADO'
+        job.progreso = 100
+        job.fecha_fin_proceso = django_timezone.now()
+        job.save(update_fields=['estado', 'progreso', 'fecha_fin_proceso'])
+
+        logger.info(
+            f"Importación {job_id} terminada: {job.transacciones_importadas} transacciones importadas, "
+            f"{job.total_errores} errores"
+        )
+
+        return {
+            'status': 'success',
+            'job_id': job_id,
+            'transacciones_importadas': job.transacciones_importadas,
+            'errores': job.total_errores
+        }
+
+    except Exception as e:
+        job.estado = 'ERROR'
+        job.mensaje_error = str(e)
+        job.fecha_fin_proceso = django_timezone.now()
+        job.save(update_fields=['estado', 'mensaje_error', 'fecha_fin_proceso'])
+
+        logger.error(f"Error importando transacciones (job_id: {job_id}): {str(e)}")
+
+        return {'status': 'error', 'message': str(e)}
@@ -0,0 +1,140 @@
+import threading
+import time
+from datetime import date
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, connections
+from apps.empresas.models import Empresa
+from apps.transacciones.models import TipoTransaccion, TransaccionContable, SecuenciaFolio
+from apps.transacciones.folios import reservar_folios, siguiente_folio
+
+User = get_user_model()
+
+POSTGRES = connection.vendor == 'postgresql'
+
+
+class SecuenciaFolioTest(TestCase):
+    """Tests para la asignación de folios por secuencia"""
+
+    def setUp(self):
+        """Configuración inicial para las pruebas"""
+        self.user = User.objects.create_user(username='contador', password='testpass123')
+        self.empresa = Empresa.objects.create(
+            nombre='Empresa Prueba',
+            rfc='EPR010101AAA',
+            creado_por=self.user
+        )
+
+    def _transaccion(self, folio, tipo='DIARIO'):
+        return TransaccionContable.objects.create(
+            empresa=self.empresa,
+            folio=folio,
+            fecha=date(2024, 3, 1),
+            concepto='Póliza',
+            tipo=tipo,
+            creado_por=self.user
+        )
+
+    def test_tipos_predeterminados(self):
+        """Test que la secuencia continúe los folios numéricos y la compartan los tipos predeterminados"""
+        self._transaccion('9')
+        self._transaccion('12', tipo='INGRESO')
+        self._transaccion('EXP-001')
+
+        self.assertEqual(siguiente_folio(self.empresa.id, 'DIARIO'), '13')
+        self.assertEqual(siguiente_folio(self.empresa.id, 'EGRESO'), '14')
+        self.assertEqual(reservar_folios(self.empresa.id, 'DIARIO', 3), ['15', '16', '17'])
+        self.assertEqual(SecuenciaFolio.objects.get(empresa=self.empresa).ultimo, 17)
+
+    def test_tipo_personalizado(self):
+        """Test que el tipo personalizado use su prefijo y conserve su último folio"""
+        tipo = TipoTransaccion.objects.create(
+            empresa=self.empresa,
+            codigo='NOM',
+            nombre='Nómina',
+            prefijo='NOM-',
+            longitud_numero=3,
+            ultimo_folio=7,
+            creado_por=self.user
+        )
+
+        self.assertEqual(tipo.generar_folio(), 'NOM-008')
+        self.assertEqual(reservar_folios(self.empresa.id, 'NOM', 2, tipo), ['NOM-009', 'NOM-010'])
+        tipo.refresh_from_db()
+        self.assertEqual(tipo.ultimo_folio, 10)
+        self.assertEqual(siguiente_folio(self.empresa.id, 'DIARIO'), '1')
+
+    def test_tipo_personalizado_sin_prefijo(self):
+        """Test que un tipo sin prefijo ni sufijo comparta la secuencia numérica de los predeterminados"""
+        self._transaccion('5')
+        tipo = TipoTransaccion.objects.create(
+            empresa=self.empresa,
+            codigo='AJU',
+            nombre='Ajustes',
+            longitud_numero=1,
+            ultimo_folio=3,
+            creado_por=self.user
+        )
+
+        self.assertEqual(tipo.generar_folio(), '6')
+        self.assertEqual(siguiente_folio(self.empresa.id, 'DIARIO'), '7')
+        self.assertEqual(tipo.generar_folio(), '8')
+        self.assertEqual(SecuenciaFolio.objects.get(empresa=self.empresa).tipo, '#')
+
+
+def _con_reintentos(funcion, *args):
+    """
+    SQLite en memoria (caché compartida) responde 'table is locked' en lugar
+    de esperar al escritor; se reintenta. PostgreSQL espera el bloqueo de fila
+    """
+    while True:
+        try:
+            return funcion(*args)
+        except OperationalError as e:
+            if POSTGRES or 'locked' not in str(e):
+                raise
+            time.sleep(0.001)
+
+
+class FoliosConcurrentesTest(TransactionTestCase):
+    """Tests de asignación de folios desde muchos hilos a la vez"""
+
+    HILOS = 16
+    FOLIOS_POR_HILO = 25
+
+    def test_sin_folios_repetidos(self):
+        """Test que folios sueltos y bloques reservados en paralelo no se repitan ni dejen huecos"""
+        user = User.objects.create_user(username='contador', password='testpass123')
+        empresa = Empresa.objects.create(nombre='Empresa Prueba', rfc='EPR010101AAA', creado_por=user)
+
+        barrera = threading.Barrier(self.HILOS)
+        asignados = []
+        errores = []
+        candado = threading.Lock()
+
+        def trabajar(numero):
+            try:
+                barrera.wait()
+                if numero % 2:
+                    folios = _con_reintentos(reservar_folios, empresa.id, 'DIARIO', self.FOLIOS_POR_HILO)
+                else:
+                    folios = [
+                        _con_reintentos(siguiente_folio, empresa.id, 'DIARIO')
+                        for _ in range(self.FOLIOS_POR_HILO)
+                    ]
+                with candado:
+                    asignados.extend(folios)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=trabajar, args=(numero,)) for numero in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        total = self.HILOS * self.FOLIOS_POR_HILO
+        self.assertEqual(sorted(asignados, key=int), [str(numero) for numero in range(1, total + 1)])
@@ -0,0 +1,192 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+import openpyxl
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from apps.transacciones.models import TransaccionContable, MovimientoContable, ImportacionJob
+from apps.transacciones.tasks import importar_transacciones
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class ImportacionTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para la importación de pólizas desde Excel y CSV"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        # Ejecutar la tarea en el mismo proceso en lugar de enviarla al broker
+        patcher = mock.patch(
+            'apps.transacciones.tasks.importar_transacciones.delay',
+            side_effect=lambda job_id: importar_transacciones.apply(args=[job_id])
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _libro(self, transacciones, movimientos):
+        libro = openpyxl.Workbook()
+        hoja = libro.active
+        hoja.title = 'Transacciones'
+        hoja.append(['Folio', 'Fecha', 'Concepto', 'Tipo', 'Estado'])
+        for fila in transacciones:
+            hoja.append(fila)
+        hoja = libro.create_sheet('Movimientos')
+        hoja.append([
+            'Folio_Transaccion', 'Codigo_Cuenta', 'Concepto_Movimiento',
+            'Debe', 'Haber', 'Codigo_Centro', 'Codigo_Proyecto'
+        ])
+        for fila in movimientos:
+            hoja.append(fila)
+        salida = io.BytesIO()
+        libro.save(salida)
+        return SimpleUploadedFile('polizas.xlsx', salida.getvalue(), content_type=XLSX)
+
+    def _libro_mixto(self):
+        """Una póliza válida, una desbalanceada y una con cuenta inexistente"""
+        return self._libro(
+            [
+                ['ING-001', date(2024, 1, 15), 'Venta de contado', 'INGRESO', 'BORRADOR'],
+                ['ING-002', '16/01/2024', 'Venta desbalanceada', 'INGRESO', None],
+                ['DIA-001', '2024-01-17', 'Cuenta inexistente', 'DIARIO', 'VALIDADA'],
+            ],
+            [
+                ['ING-001', '1.1', 'Cobro', 1160, 0],
+                ['ING-001', '4.1', 'Venta', 0, 1160],
+                ['ING-002', '1.1', 'Cobro', 500, 0],
+                ['ING-002', '4.1', 'Venta', 0, 400],
+                ['DIA-001', '9.9', 'Cargo', 100, 0],
+                ['DIA-001', '4.1', 'Abono', 0, 100],
+            ]
+        )
+
+    def _importar(self, archivo, simulacion=False, asignar_folios=False):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/transacciones/importaciones/',
+                {'archivo': archivo, 'simulacion': simulacion, 'asignar_folios': asignar_folios},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 202)
+        return ImportacionJob.objects.get(id=response.data['id'])
+
+    def test_simulacion_no_escribe(self):
+        """Test que la simulación reporte los errores por fila sin crear pólizas"""
+        trabajo = self._importar(self._libro_mixto(), simulacion=True)
+
+        self.assertEqual(trabajo.estado, 'COMPLETADO')
+        self.assertEqual(trabajo.total_transacciones, 3)
+        self.assertEqual(trabajo.total_movimientos, 6)
+        self.assertEqual(trabajo.transacciones_validas, 1)
+        self.assertEqual(trabajo.transacciones_importadas, 0)
+        self.assertEqual(trabajo.total_errores, 2)
+        self.assertFalse(TransaccionContable.objects.exists())
+
+        response = self.client.get(f'/api/transacciones/importaciones/{trabajo.id}/errores/')
+        self.assertEqual(response.status_code, 200)
+        errores = {error['folio']: error for error in response.data['results']}
+        self.assertEqual(errores['ING-002']['hoja'], 'Transacciones')
+        self.assertIn('no está balanceada', errores['ING-002']['mensaje'])
+        self.assertEqual(errores['DIA-001']['hoja'], 'Movimientos')
+        self.assertEqual(errores['DIA-001']['fila'], 6)
+
+        response = self.client.get(
+            f'/api/transacciones/importaciones/{trabajo.id}/errores/', {'hoja': 'Movimientos'}
+        )
+        self.assertEqual(response.data['count'], 1)
+
+    def test_importa_polizas_validas(self):
+        """Test que se importen las pólizas válidas con totales y datos copiados a los movimientos"""
+        trabajo = self._importar(self._libro_mixto())
+
+        self.assertEqual(trabajo.estado, 'COMPLETADO')
+        self.assertEqual(trabajo.progreso, 100)
+        self.assertEqual(trabajo.transacciones_importadas, 1)
+        self.assertEqual(trabajo.movimientos_importados, 2)
+
+        transaccion = TransaccionContable.objects.get()
+        self.assertEqual(transaccion.folio, 'ING-001')
+        self.assertEqual(transaccion.tipo, 'INGRESO')
+        self.assertEqual(transaccion.total_debe, Decimal('1160.00'))
+        self.assertEqual(transaccion.total_haber, Decimal('1160.00'))
+        self.assertEqual(transaccion.creado_por, self.user)
+        self.assertFalse(MovimientoContable.objects.exclude(
+            empresa=self.empresa, fecha=date(2024, 1, 15), estado='BORRADOR'
+        ).exists())
+
+        # Un folio ya existente se reporta y no se duplica
+        trabajo = self._importar(self._libro_mixto())
+        self.assertEqual(trabajo.transacciones_importadas, 0)
+        self.assertTrue(trabajo.errores.filter(folio='ING-001', mensaje__contains='Ya existe').exists())
+        self.assertEqual(TransaccionContable.objects.count(), 1)
+
+    def test_asignar_folios(self):
+        """Test que con asignar_folios el folio del archivo solo relacione las hojas"""
+        self._importar(self._libro_mixto())
+        libro = self._libro(
+            [
+                ['ING-001', date(2024, 1, 20), 'Otra venta', 'INGRESO', None],
+                ['ING-002', date(2024, 1, 21), 'Otra venta', 'INGRESO', None],
+            ],
+            [
+                ['ING-001', '1.1', 'Cobro', 10, 0],
+                ['ING-001', '4.1', 'Venta', 0, 10],
+                ['ING-002', '1.1', 'Cobro', 20, 0],
+                ['ING-002', '4.1', 'Venta', 0, 20],
+            ]
+        )
+
+        trabajo = self._importar(libro, asignar_folios=True)
+
+        self.assertEqual(trabajo.transacciones_importadas, 2)
+        self.assertEqual(
+            list(TransaccionContable.objects.filter(fecha__gte=date(2024, 1, 20)).order_by('fecha').values_list(
+                'folio', 'total_debe'
+            )),
+            [('1', Decimal('10.00')), ('2', Decimal('20.00'))]
+        )
+
+    def test_importa_csv(self):
+        """Test que el CSV con una fila por movimiento se importe igual que el libro"""
+        contenido = (
+            'Folio,Fecha,Concepto,Tipo,Estado,Codigo_Cuenta,Concepto_Movimiento,Debe,Haber,Codigo_Centro,Codigo_Proyecto\n'
+            'EGR-001,2024-02-01,Pago,EGRESO,,4.1,Cargo,250.50,0,,\n'
+            'EGR-001,2024-02-01,Pago,EGRESO,,1.1,Abono,0,250.50,,\n'
+        ).encode('utf-8-sig')
+        trabajo = self._importar(SimpleUploadedFile('polizas.csv', contenido, content_type='text/csv'))
+
+        self.assertEqual(trabajo.estado, 'COMPLETADO')
+        self.assertEqual(trabajo.total_errores, 0)
+        transaccion = TransaccionContable.objects.get(folio='EGR-001')
+        self.assertEqual(transaccion.movimientos.count(), 2)
+        self.assertEqual(transaccion.total_debe, Decimal('250.50'))
+
+    def test_estructura_invalida(self):
+        """Test que un libro sin la hoja de movimientos termine en error y un formato ajeno se rechace"""
+        libro = openpyxl.Workbook()
+        libro.active.title = 'Transacciones'
+        libro.active.append(['Folio', 'Fecha', 'Concepto', 'Tipo'])
+        salida = io.BytesIO()
+        libro.save(salida)
+
+        trabajo = self._importar(SimpleUploadedFile('polizas.xlsx', salida.getvalue(), content_type=XLSX))
+        self.assertEqual(trabajo.estado, 'ERROR')
+        self.assertIn('Movimientos', trabajo.mensaje_error)
+
+        response = self.client.post(
+            '/api/transacciones/importaciones/',
+            {'archivo': SimpleUploadedFile('polizas.txt', b'x')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
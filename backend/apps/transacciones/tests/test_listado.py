@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.transacciones.models import TransaccionContable, MovimientoContable
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+URL = '/api/transacciones/transacciones/'
+
+
+class ListadoTransaccionesTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para el listado de transacciones y su paginación por cursor"""
+
+    def _polizas(self, cantidad, fechas=3):
+        for numero in range(cantidad):
+            self.folio += 1
+            transaccion = TransaccionContable.objects.create(
+                empresa=self.empresa,
+                folio=f'{self.folio:04d}',
+                fecha=date(2024, 3, 1) + timedelta(days=numero % fechas),
+                concepto='Venta',
+                creado_por=self.user
+            )
+            MovimientoContable.objects.bulk_create([
+                MovimientoContable(transaccion=transaccion, empresa=self.empresa, fecha=transaccion.fecha,
+                                   cuenta=self.banco, debe=Decimal('10.00'), creado_por=self.user),
+                MovimientoContable(transaccion=transaccion, empresa=self.empresa, fecha=transaccion.fecha,
+                                   cuenta=self.ventas, haber=Decimal('10.00'), creado_por=self.user),
+            ])
+
+    def test_conteo_de_movimientos_sin_consultas_por_fila(self):
+        """Test que el listado cuente los movimientos en SQL con las mismas consultas para 2 o 15 filas"""
+        self._polizas(2)
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(URL)
+
+        self._polizas(13)
+        with CaptureQueriesContext(connection) as muchas:
+            response = self.client.get(URL)
+
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertEqual({fila['total_movimientos'] for fila in response.data['results']}, {2})
+
+    def test_paginacion_cursor(self):
+        """Test que el cursor recorra todas las transacciones en orden (-fecha, -folio, -id) sin repetir"""
+        self._polizas(11)
+        esperado = list(TransaccionContable.objects.order_by('-fecha', '-folio', '-id').values_list('id', flat=True))
+
+        recorrido = []
+        url = f'{URL}?paginacion=cursor&page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            recorrido.extend(fila['id'] for fila in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(recorrido, esperado)
+
+        response = self.client.get(URL, {'paginacion': 'cursor', 'cursor': 'no-es-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_alterado(self):
+        """Test que un cursor bien codificado con valores inválidos regrese 404 y no 500"""
+        self._polizas(3)
+        for valores in (['abc', 'F1', 'x'], ['2024-03-01', 'F1', 'x'], ['2024-03-01', 'F1', [1]]):
+            cursor = base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+            response = self.client.get(URL, {'paginacion': 'cursor', 'cursor': cursor})
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,103 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import skipIf, skipUnless
+from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from apps.transacciones.models import MovimientoContable
+from apps.transacciones.particiones import (
+    asegurar_particiones, desparticionar_movimientos, listar_particiones,
+    nombre_particion, nombre_particion_default, particionar_movimientos
+)
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+POSTGRES = connection.vendor == 'postgresql'
+
+
+class ParticionesMovimientosTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para el particionado por año de los movimientos"""
+
+    def _venta(self, folio, fecha, importe=Decimal('100.00')):
+        return self.crear_poliza(
+            self.banco, self.ventas, importe, fecha=fecha, folio=folio, concepto='Venta', contabilizar=False
+        )
+
+    def _filas(self, tabla):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(tabla)}')
+            return cursor.fetchone()[0]
+
+    @skipIf(POSTGRES, 'sin particiones solo fuera de PostgreSQL')
+    def test_sin_postgres(self):
+        """Test que fuera de PostgreSQL el comando y la tarea no hagan nada"""
+        self.assertFalse(particionar_movimientos(connection))
+        self.assertEqual(asegurar_particiones(connection), [])
+
+        salida = StringIO()
+        call_command('crear_particiones', stdout=salida)
+        self.assertIn('no está particionada', salida.getvalue())
+
+    @skipUnless(POSTGRES, 'requiere PostgreSQL (TEST_POSTGRES=1)')
+    def test_particionar_y_podar(self):
+        """Test que la conversión conserve los movimientos y los filtros por fecha poden particiones"""
+        actual = timezone.localdate().year
+        self._venta('1', date(2023, 5, 10))
+        self._venta('2', date(actual, 1, 15))
+        ultimo_id = MovimientoContable.objects.order_by('-id').first().id
+
+        self.assertTrue(particionar_movimientos(connection))
+        self.assertFalse(particionar_movimientos(connection))
+
+        nombres = [nombre for nombre, _limites in listar_particiones(connection)]
+        for particion in (nombre_particion(2023), nombre_particion(actual),
+                          nombre_particion(actual + 1), nombre_particion_default()):
+            self.assertIn(particion, nombres)
+        self.assertEqual(self._filas(nombre_particion(2023)), 2)
+        self.assertEqual(MovimientoContable.objects.count(), 4)
+
+        # El id sigue su secuencia después de la conversión
+        nueva = self._venta('3', date(2023, 6, 1))
+        self.assertGreater(nueva.movimientos.first().id, ultimo_id)
+
+        plan = MovimientoContable.objects.filter(
+            empresa=self.empresa,
+            fecha__gte=date(2023, 1, 1),
+            fecha__lte=date(2023, 12, 31)
+        ).explain()
+        self.assertIn(nombre_particion(2023), plan)
+        self.assertNotIn(nombre_particion(actual), plan)
+        self.assertNotIn(nombre_particion_default(), plan)
+
+        # Cambiar la fecha de la transacción mueve sus movimientos de partición
+        nueva.fecha = date(actual, 2, 1)
+        nueva.save()
+        self.assertEqual(self._filas(nombre_particion(2023)), 2)
+        self.assertEqual(self._filas(nombre_particion(actual)), 4)
+
+        self.assertTrue(desparticionar_movimientos(connection))
+        self.assertEqual(listar_particiones(connection), [])
+        self.assertEqual(MovimientoContable.objects.count(), 6)
+
+    @skipUnless(POSTGRES, 'requiere PostgreSQL (TEST_POSTGRES=1)')
+    def test_crear_particiones_desde_default(self):
+        """Test que el comando cree los años siguientes y saque de la DEFAULT sus filas"""
+        actual = timezone.localdate().year
+        particionar_movimientos(connection)
+
+        lejano = actual + 5
+        self._venta('1', date(lejano, 3, 1))
+        self.assertEqual(self._filas(nombre_particion_default()), 2)
+
+        salida = StringIO()
+        call_command('crear_particiones', '--anios-adelante', '2', stdout=salida)
+        self.assertIn(nombre_particion(actual + 2), salida.getvalue())
+        self.assertIn(nombre_particion(lejano), salida.getvalue())
+
+        self.assertEqual(self._filas(nombre_particion_default()), 0)
+        self.assertEqual(self._filas(nombre_particion(lejano)), 2)
+        self.assertEqual(MovimientoContable.objects.filter(fecha__year=lejano).count(), 2)
+
+        # Sin años nuevos el comando no crea nada
+        self.assertEqual(asegurar_particiones(connection, anios_adelante=2), [])
@@ -0,0 +1,161 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.empresas.models import Empresa
+from apps.transacciones.models import TransaccionContable, MovimientoContable
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+User = get_user_model()
+
+
+def consultas_sin_inserciones(contexto):
+    # SQLite divide bulk_create en lotes por su límite de parámetros
+    return [
+        consulta['sql'].split(' ')[0] for consulta in contexto.captured_queries
+        if not consulta['sql'].startswith('INSERT INTO "transacciones_movimientocontable"')
+    ]
+
+
+class CapturaPolizasTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para la captura de pólizas en lote (API, vista de captura y admin)"""
+
+    def _poliza(self, folio, pares):
+        movimientos = []
+        for _ in range(pares):
+            movimientos.append({'cuenta': self.banco.id, 'debe': '10.00', 'haber': '0.00'})
+            movimientos.append({'cuenta': self.ventas.id, 'debe': '0.00', 'haber': '10.00'})
+        return self.client.post('/api/transacciones/transacciones/', {
+            'folio': folio,
+            'fecha': '2024-06-15',
+            'tipo': 'INGRESO',
+            'concepto': 'Ventas del día',
+            'movimientos': movimientos
+        }, format='json')
+
+    def test_crear_poliza_api(self):
+        """Test que el API cree la póliza con totales y movimientos en un número fijo de consultas"""
+        with CaptureQueriesContext(connection) as chica:
+            response = self._poliza('1', pares=2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['movimientos']), 4)
+        self.assertEqual(response.data['movimientos'][0]['cuenta_codigo'], '1.1')
+
+        transaccion = TransaccionContable.objects.get(empresa=self.empresa, folio='1')
+        self.assertEqual(transaccion.creado_por, self.user)
+        self.assertEqual(transaccion.total_debe, Decimal('20.00'))
+        self.assertEqual(transaccion.total_haber, Decimal('20.00'))
+        self.assertEqual(
+            set(transaccion.movimientos.values_list('empresa_id', 'fecha', 'estado', 'creado_por_id')),
+            {(self.empresa.id, date(2024, 6, 15), 'BORRADOR', self.user.id)}
+        )
+
+        with CaptureQueriesContext(connection) as grande:
+            response = self._poliza('2', pares=100)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(MovimientoContable.objects.filter(transaccion__folio='2').count(), 200)
+        self.assertEqual(consultas_sin_inserciones(grande), consultas_sin_inserciones(chica))
+
+        # La póliza capturada sigue el flujo normal
+        transaccion = TransaccionContable.objects.get(empresa=self.empresa, folio='2')
+        transaccion.validar()
+        self.assertEqual(transaccion.estado, 'VALIDADA')
+
+    def test_errores_por_linea(self):
+        """Test que se rechacen cuentas ajenas o no afectables indicando el movimiento"""
+        otra = Empresa.objects.create(nombre='Otra', rfc='OTR010101AAA', creado_por=self.user)
+        ajena = self.crear_cuenta('1.1', 'BANCOS', 'ACTIVO', 'DEUDORA', empresa=otra)
+        titulo = self.crear_cuenta('4', 'INGRESOS', 'INGRESO', 'ACREEDORA', afectable=False)
+
+        response = self.client.post('/api/transacciones/transacciones/', {
+            'folio': '1',
+            'fecha': '2024-06-15',
+            'tipo': 'DIARIO',
+            'concepto': 'Póliza con errores',
+            'movimientos': [
+                {'cuenta': self.banco.id, 'debe': '10.00', 'haber': '0.00'},
+                {'cuenta': ajena.id, 'debe': '0.00', 'haber': '5.00'},
+                {'cuenta': titulo.id, 'debe': '0.00', 'haber': '5.00'},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        errores = response.data['movimientos']
+        self.assertTrue(any(error.startswith('Movimiento 2:') for error in errores))
+        self.assertTrue(any(error.startswith('Movimiento 3:') and 'no es afectable' in error for error in errores))
+        self.assertFalse(TransaccionContable.objects.filter(empresa=self.empresa).exists())
+
+    def test_vista_captura(self):
+        """Test que el formulario HTML cree la póliza con el servicio"""
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+        response = self.client.post('/transacciones/crear/', {
+            'concepto': 'Venta de contado',
+            'tipo': 'INGRESO',
+            'fecha': '2024-06-15',
+            'cuenta_debe[]': [self.banco.id],
+            'monto_debe[]': ['250.00'],
+            'concepto_debe[]': ['Cobro'],
+            'centro_costo_debe[]': [''],
+            'proyecto_debe[]': [''],
+            'cuenta_haber[]': [self.ventas.id],
+            'monto_haber[]': ['250.00'],
+            'concepto_haber[]': ['Venta'],
+            'centro_costo_haber[]': [''],
+            'proyecto_haber[]': [''],
+        })
+        self.assertEqual(response.status_code, 302)
+
+        transaccion = TransaccionContable.objects.get(empresa=self.empresa)
+        self.assertEqual(transaccion.total_debe, Decimal('250.00'))
+        self.assertEqual(
+            list(transaccion.movimientos.values_list('cuenta_id', 'debe', 'haber', 'concepto')),
+            [
+                (self.banco.id, Decimal('250.00'), Decimal('0.00'), 'Cobro'),
+                (self.ventas.id, Decimal('0.00'), Decimal('250.00'), 'Venta'),
+            ]
+        )
+
+    def test_admin_inline(self):
+        """Test que el admin inserte los movimientos del inline y calcule totales"""
+        admin = User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.force_login(admin)
+
+        formulario = {
+            'empresa': self.empresa.id,
+            'folio': 'A-1',
+            'fecha': '2024-06-15',
+            'tipo': 'DIARIO',
+            'concepto': 'Captura desde admin',
+            'estado': 'BORRADOR',
+            'movimientos-TOTAL_FORMS': '3',
+            'movimientos-INITIAL_FORMS': '0',
+            'movimientos-MIN_NUM_FORMS': '0',
+            'movimientos-MAX_NUM_FORMS': '1000',
+        }
+        lineas = [
+            (self.banco.id, '100.00', '0.00'),
+            (self.banco.id, '50.00', '0.00'),
+            (self.ventas.id, '0.00', '150.00'),
+        ]
+        for i, (cuenta, debe, haber) in enumerate(lineas):
+            formulario.update({
+                f'movimientos-{i}-cuenta': cuenta,
+                f'movimientos-{i}-concepto': '',
+                f'movimientos-{i}-debe': debe,
+                f'movimientos-{i}-haber': haber,
+            })
+
+        response = self.client.post('/admin/transacciones/transaccioncontable/add/', formulario)
+        self.assertEqual(response.status_code, 302)
+
+        transaccion = TransaccionContable.objects.get(empresa=self.empresa, folio='A-1')
+        self.assertEqual(transaccion.creado_por, admin)
+        self.assertEqual(transaccion.movimientos.count(), 3)
+        self.assertEqual(transaccion.total_debe, Decimal('150.00'))
+        self.assertEqual(transaccion.total_haber, Decimal('150.00'))
@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase
+from apps.transacciones.models import MovimientoContable, SaldoPeriodo
+from apps.transacciones.saldos import (
+    calcular_saldos, obtener_indice_saldos, reconstruir_saldos_periodo
+)
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+
+class SaldoPeriodoTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para los saldos materializados por periodo"""
+
+    def _venta(self, folio, fecha, importe):
+        return self.crear_poliza(self.banco, self.ventas, importe, fecha=fecha, folio=folio, concepto='Venta')
+
+    def test_contabilizar_y_cancelar(self):
+        """Test que contabilizar sume y cancelar reste en el periodo de la transacción"""
+        transaccion = self._venta('1', date(2024, 3, 10), Decimal('150.00'))
+        self._venta('2', date(2024, 3, 20), Decimal('50.00'))
+
+        saldo = SaldoPeriodo.objects.get(cuenta=self.banco, anio=2024, mes=3)
+        self.assertEqual(saldo.cargos, Decimal('200.00'))
+        self.assertEqual(saldo.num_movimientos, 2)
+
+        transaccion.cancelar()
+
+        saldo.refresh_from_db()
+        self.assertEqual(saldo.cargos, Decimal('50.00'))
+        self.assertEqual(saldo.num_movimientos, 1)
+
+    def test_editar_y_eliminar_movimientos_contabilizados(self):
+        """Test que editar o eliminar movimientos contabilizados ajuste los saldos del periodo"""
+        transaccion = self._venta('1', date(2024, 3, 10), Decimal('100.00'))
+        cargo = transaccion.movimientos.get(cuenta=self.banco)
+        abono = transaccion.movimientos.get(cuenta=self.ventas)
+
+        cargo.debe = Decimal('250.00')
+        cargo.save()
+        abono.haber = Decimal('250.00')
+        abono.save()
+
+        saldos = calcular_saldos(self.empresa, fecha_inicio=date(2024, 3, 1), fecha_fin=date(2024, 3, 31))
+        self.assertEqual({saldo['codigo']: saldo['saldo'] for saldo in saldos}['1.1'], Decimal('250.00'))
+
+        abono.cuenta = self.crear_cuenta('4.2', 'OTROS INGRESOS', 'INGRESO', 'ACREEDORA')
+        abono.save()
+        cargo.delete()
+        self._venta('2', date(2024, 3, 15), Decimal('40.00')).movimientos.get(cuenta=self.banco).hard_delete()
+
+        incremental = list(SaldoPeriodo.objects.order_by('cuenta__codigo', 'anio', 'mes').values_list(
+            'cuenta_id', 'cargos', 'abonos', 'num_movimientos'
+        ))
+        reconstruir_saldos_periodo(self.empresa)
+        reconstruido = list(SaldoPeriodo.objects.order_by('cuenta__codigo', 'anio', 'mes').values_list(
+            'cuenta_id', 'cargos', 'abonos', 'num_movimientos'
+        ))
+        self.assertEqual(
+            [fila for fila in incremental if any(fila[1:])],
+            reconstruido
+        )
+
+    def test_movimientos_copian_transaccion(self):
+        """Test que empresa, fecha y estado de los movimientos sigan a la transacción"""
+        transaccion = self._venta('1', date(2024, 3, 10), Decimal('150.00'))
+
+        def estados():
+            return set(MovimientoContable.objects.filter(transaccion=transaccion).values_list(
+                'empresa_id', 'fecha', 'estado'
+            ))
+
+        self.assertEqual(estados(), {(self.empresa.id, date(2024, 3, 10), 'CONTABILIZADA')})
+
+        transaccion.fecha = date(2024, 3, 12)
+        transaccion.save()
+        self.assertEqual(estados(), {(self.empresa.id, date(2024, 3, 12), 'CONTABILIZADA')})
+
+        transaccion.cancelar()
+        self.assertEqual(estados(), {(self.empresa.id, date(2024, 3, 12), 'CANCELADA')})
+
+    def test_cambio_de_fecha_contabilizada(self):
+        """Test que cambiar la fecha de una transacción contabilizada mueva sus saldos de periodo"""
+        transaccion = self._venta('1', date(2024, 3, 10), Decimal('100.00'))
+
+        def saldo_banco(fecha):
+            saldos = calcular_saldos(self.empresa, fecha_fin=fecha, cuentas=[self.banco.id])
+            return saldos[0]['saldo'] if saldos else Decimal('0.00')
+
+        self.assertEqual(saldo_banco(date(2024, 4, 30)), Decimal('100.00'))
+
+        transaccion.fecha = date(2024, 5, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            transaccion.save()
+
+        self.assertEqual(SaldoPeriodo.objects.get(cuenta=self.banco, anio=2024, mes=3).cargos, Decimal('0.00'))
+        self.assertEqual(SaldoPeriodo.objects.get(cuenta=self.banco, anio=2024, mes=5).cargos, Decimal('100.00'))
+        self.assertEqual(saldo_banco(date(2024, 4, 30)), Decimal('0.00'))
+        self.assertEqual(saldo_banco(date(2024, 5, 31)), Decimal('100.00'))
+
+    def test_editar_movimiento_invalida_indice(self):
+        """Test que editar o eliminar un movimiento contabilizado invalide los saldos acumulados"""
+        transaccion = self._venta('1', date(2024, 3, 10), Decimal('100.00'))
+        cargo = transaccion.movimientos.get(cuenta=self.banco)
+
+        def saldo_banco():
+            saldos = calcular_saldos(self.empresa, fecha_fin=date(2024, 4, 30), cuentas=[self.banco.id])
+            return saldos[0]['saldo'] if saldos else Decimal('0.00')
+
+        self.assertEqual(saldo_banco(), Decimal('100.00'))
+
+        cargo.debe = Decimal('250.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            cargo.save()
+        self.assertEqual(saldo_banco(), Decimal('250.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cargo.delete()
+        self.assertEqual(saldo_banco(), Decimal('0.00'))
+
+    def test_saldos_combinan_periodos_y_fragmentos(self):
+        """Test que los saldos con cortes a mitad de mes coincidan con los movimientos"""
+        self._venta('1', date(2024, 1, 31), Decimal('100.00'))
+        self._venta('2', date(2024, 2, 10), Decimal('20.00'))
+        self._venta('3', date(2024, 2, 25), Decimal('5.00'))
+        self._venta('4', date(2024, 4, 1), Decimal('7.00'))
+
+        def saldo_banco(**rango):
+            saldos = calcular_saldos(self.empresa, cuentas=[self.banco.id], **rango)
+            return saldos[0]['saldo'] if saldos else Decimal('0.00')
+
+        self.assertEqual(saldo_banco(fecha_fin=date(2024, 2, 15)), Decimal('120.00'))
+        self.assertEqual(saldo_banco(fecha_fin=date(2024, 3, 31)), Decimal('125.00'))
+        self.assertEqual(
+            saldo_banco(fecha_inicio=date(2024, 1, 31), fecha_fin=date(2024, 2, 24)),
+            Decimal('120.00')
+        )
+        self.assertEqual(saldo_banco(fecha_inicio=date(2024, 2, 11)), Decimal('12.00'))
+        self.assertEqual(saldo_banco(), Decimal('132.00'))
+
+    def test_reconstruir(self):
+        """Test que la reconstrucción produzca los mismos saldos que el mantenimiento incremental"""
+        self._venta('1', date(2024, 1, 5), Decimal('100.00'))
+        self._venta('2', date(2024, 2, 5), Decimal('30.00'))
+        incremental = list(SaldoPeriodo.objects.order_by('cuenta__codigo', 'anio', 'mes').values_list(
+            'cuenta_id', 'anio', 'mes', 'cargos', 'abonos', 'num_movimientos'
+        ))
+
+        creados = reconstruir_saldos_periodo(self.empresa)
+
+        reconstruido = list(SaldoPeriodo.objects.order_by('cuenta__codigo', 'anio', 'mes').values_list(
+            'cuenta_id', 'anio', 'mes', 'cargos', 'abonos', 'num_movimientos'
+        ))
+        self.assertEqual(creados, 4)
+        self.assertEqual(incremental, reconstruido)
+
+    def test_indice_saldos_al(self):
+        """Test que el índice acumulado resuelva saldos a fecha y se invalide con fechas pasadas"""
+        transaccion = self._venta('1', date(2024, 1, 10), Decimal('100.00'))
+        self._venta('2', date(2024, 1, 20), Decimal('40.00'))
+        self._venta('3', date.today(), Decimal('3.00'))
+
+        def saldo_banco(fecha):
+            saldos = calcular_saldos(self.empresa, fecha_fin=fecha, cuentas=[self.banco.id])
+            return saldos[0]['saldo'] if saldos else Decimal('0.00')
+
+        self.assertEqual(saldo_banco(date(2024, 1, 9)), Decimal('0.00'))
+        self.assertEqual(saldo_banco(date(2024, 1, 10)), Decimal('100.00'))
+        self.assertEqual(saldo_banco(date(2024, 6, 30)), Decimal('140.00'))
+        self.assertEqual(saldo_banco(date.today()), Decimal('143.00'))
+
+        # Las transacciones de hoy no están indexadas y no invalidan el índice
+        self._venta('4', date.today(), Decimal('7.00'))
+        with self.assertNumQueries(0):
+            obtener_indice_saldos(self.empresa)
+        self.assertEqual(saldo_banco(date.today() + timedelta(days=1)), Decimal('150.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transaccion.cancelar()
+        self.assertEqual(saldo_banco(date(2024, 6, 30)), Decimal('40.00'))
@@ -0,0 +1,105 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.empresas.models import Empresa
+from apps.transacciones.models import TransaccionContable, SaldoPeriodo
+from apps.transacciones.saldos import reconstruir_saldos_periodo
+from apps.core.tests.mixins import ContabilidadPruebaMixin
+
+URL = '/api/transacciones/transacciones/bulk-transition/'
+
+
+class TransicionMasivaTest(ContabilidadPruebaMixin, TestCase):
+    """Tests para validar, contabilizar y cancelar transacciones en bloque"""
+
+    def _borrador(self, debe, haber=None, fecha=date(2024, 3, 10)):
+        """Póliza en borrador con totales sin calcular, como al capturarla por partes"""
+        return self.crear_poliza(
+            self.banco, self.ventas, debe, fecha=fecha, concepto='Venta', contabilizar=False, importe_abono=haber
+        )
+
+    def _transicion(self, **datos):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(URL, datos, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_validar_reporta_fallas_por_id(self):
+        """Test que se validen las correctas y se reporte cada id desbalanceado, ajeno o en otro estado"""
+        correcta = self._borrador(Decimal('100.00'))
+        desbalanceada = self._borrador(Decimal('100.00'), Decimal('90.00'))
+        validada = self._borrador(Decimal('10.00'))
+        validada.validar()
+
+        data = self._transicion(
+            accion='validar', ids=[correcta.id, desbalanceada.id, validada.id, 999999]
+        )
+
+        self.assertEqual(data['exitosas'], [correcta.id])
+        fallidas = {falla['id']: falla['error'] for falla in data['fallidas']}
+        self.assertIn('no está balanceada', fallidas[desbalanceada.id])
+        self.assertIn('en borrador', fallidas[validada.id])
+        self.assertEqual(fallidas[999999], 'Transacción no encontrada')
+
+        correcta.refresh_from_db()
+        desbalanceada.refresh_from_db()
+        self.assertEqual(correcta.estado, 'VALIDADA')
+        self.assertEqual(correcta.total_debe, Decimal('100.00'))
+        self.assertEqual(correcta.modificado_por, self.user)
+        self.assertEqual(desbalanceada.estado, 'BORRADOR')
+        self.assertEqual(desbalanceada.total_haber, Decimal('90.00'))
+        self.assertFalse(correcta.movimientos.exclude(estado='VALIDADA').exists())
+
+    def test_contabilizar_por_filtro_sin_consultas_por_fila(self):
+        """Test que contabilizar por filtro use las mismas consultas para 2 que para 20 pólizas"""
+        for _ in range(2):
+            self._borrador(Decimal('10.00'), fecha=date(2024, 1, 15)).validar()
+        with CaptureQueriesContext(connection) as pocas:
+            self._transicion(accion='contabilizar', fecha_desde='2024-01-01', fecha_hasta='2024-01-31')
+
+        for _ in range(20):
+            self._borrador(Decimal('10.00'), fecha=date(2024, 2, 15)).validar()
+        with CaptureQueriesContext(connection) as muchas:
+            data = self._transicion(accion='contabilizar', fecha_desde='2024-02-01', fecha_hasta='2024-02-29')
+
+        self.assertEqual(data['total_exitosas'], 20)
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertFalse(TransaccionContable.objects.exclude(estado='CONTABILIZADA').exists())
+
+        saldo = SaldoPeriodo.objects.get(cuenta=self.banco, anio=2024, mes=2)
+        self.assertEqual(saldo.cargos, Decimal('200.00'))
+        self.assertEqual(saldo.num_movimientos, 20)
+
+    def test_cancelar_revierte_saldos(self):
+        """Test que los saldos en bloque coincidan con la reconstrucción y cancelar los revierta"""
+        ids = []
+        for fecha in (date(2024, 3, 1), date(2024, 3, 20), date(2024, 4, 5)):
+            transaccion = self._borrador(Decimal('25.00'), fecha=fecha)
+            ids.append(transaccion.id)
+        self._transicion(accion='validar', ids=ids)
+        self._transicion(accion='contabilizar', ids=ids)
+
+        def saldos():
+            return list(SaldoPeriodo.objects.order_by('cuenta__codigo', 'anio', 'mes').values_list(
+                'cuenta_id', 'anio', 'mes', 'cargos', 'abonos', 'num_movimientos'
+            ))
+
+        en_bloque = saldos()
+        reconstruir_saldos_periodo(self.empresa)
+        self.assertEqual(en_bloque, saldos())
+
+        version = Empresa.objects.get(pk=self.empresa.pk).version_contable
+        data = self._transicion(accion='cancelar', ids=ids[:2])
+        self.assertEqual(len(data['exitosas']), 2)
+        self.assertEqual(Empresa.objects.get(pk=self.empresa.pk).version_contable, version + 1)
+
+        marzo = SaldoPeriodo.objects.get(cuenta=self.banco, anio=2024, mes=3)
+        self.assertEqual(marzo.cargos, Decimal('0.00'))
+        self.assertEqual(marzo.num_movimientos, 0)
+
+    def test_requiere_ids_o_filtro(self):
+        """Test que sin ids ni filtros la petición se rechace"""
+        response = self.client.post(URL, {'accion': 'validar'}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,165 @@
+"""
+Cambios de estado masivos (validar, contabilizar, cancelar)
+Las reglas de balance y mínimo de movimientos se revisan con una consulta
+agrupada por lote, el cambio de estado se aplica con UPDATE sobre el lote y
+los saldos por periodo se suman o restan una sola vez para todo el conjunto.
+Devuelve las fallas por transacción en lugar de detenerse en la primera
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.empresas.models import Empresa
+from .models import TransaccionContable, MovimientoContable, SaldoPeriodo
+
+# acción: (estado de origen, estado destino, error si la transacción no está en el origen)
+ACCIONES = {
+    'validar': ('BORRADOR', 'VALIDADA', 'Solo se pueden validar transacciones en borrador'),
+    'contabilizar': ('VALIDADA', 'CONTABILIZADA', 'Solo se pueden contabilizar transacciones validadas'),
+    'cancelar': ('CONTABILIZADA', 'CANCELADA', 'Solo se pueden cancelar transacciones contabilizadas'),
+}
+
+# Las pólizas que se validan o contabilizan deben estar balanceadas
+ACCIONES_CON_REGLAS = ('validar', 'contabilizar')
+
+# Transacciones por consulta agrupada y UPDATE
+TAMANO_LOTE = 1000
+
+
+def _lotes(ids):
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        yield ids[inicio:inicio + TAMANO_LOTE]
+
+
+def _suma_movimientos(campo):
+    return Coalesce(
+        Subquery(
+            MovimientoContable.objects.filter(transaccion_id=OuterRef('pk'))
+            .values('transaccion_id')
+            .annotate(total=Sum(campo))
+            .values('total')
+        ),
+        Value(Decimal('0.00'))
+    )
+
+
+def _revisar_reglas(lote, folios, fallidas, recalcular_totales):
+    """Ids del lote que cumplen balance y mínimo de movimientos"""
+    totales = {
+        fila['transaccion_id']: fila
+        for fila in MovimientoContable.objects.filter(transaccion_id__in=lote)
+        .values('transaccion_id')
+        .annotate(debe=Sum('debe'), haber=Sum('haber'), cantidad=Count('id'))
+        .order_by()
+    }
+    if recalcular_totales:
+        # validar() recalcula los totales aunque la póliza no pase
+        TransaccionContable.objects.filter(id__in=lote).update(
+            total_debe=_suma_movimientos('debe'),
+            total_haber=_suma_movimientos('haber')
+        )
+
+    correctas = []
+    for transaccion_id in lote:
+        total = totales.get(transaccion_id, {'debe': None, 'haber': None, 'cantidad': 0})
+        debe = total['debe'] or Decimal('0.00')
+        haber = total['haber'] or Decimal('0.00')
+        if debe != haber:
+            error = f'La transacción no está balanceada. Debe: {debe}, Haber: {haber}'
+        elif total['cantidad'] < 2:
+            error = 'Una transacción debe tener al menos 2 movimientos'
+        else:
+            correctas.append(transaccion_id)
+            continue
+        fallidas.append({'id': transaccion_id, 'folio': folios[transaccion_id], 'error': error})
+    return correctas
+
+
+def _acumular_saldos(lote, acumulados):
+    movimientos = MovimientoContable.objects.filter(transaccion_id__in=lote, activo=True).values(
+        'cuenta_id', 'fecha__year', 'fecha__month'
+    ).annotate(
+        cargos=Sum('debe'),
+        abonos=Sum('haber'),
+        cantidad=Count('id')
+    ).order_by()
+    for fila in movimientos:
+        llave = (fila['cuenta_id'], fila['fecha__year'], fila['fecha__month'])
+        cargos, abonos, cantidad = acumulados.get(llave, (Decimal('0.00'), Decimal('0.00'), 0))
+        acumulados[llave] = (cargos + fila['cargos'], abonos + fila['abonos'], cantidad + fila['cantidad'])
+
+
+def transicion_masiva(empresa, accion, ids=None, filtros=None, usuario=None):
+    """
+    Aplica la acción a las transacciones de la empresa indicadas por ids o
+    por filtros (de campos de TransaccionContable). Con ids se reporta cada id
+    que no exista o no esté en el estado de origen; con filtros solo se toman
+    las que están en el estado de origen.
+    Devuelve {'exitosas': [ids], 'fallidas': [{'id', 'folio', 'error'}]}
+    """
+    origen, destino, error_estado = ACCIONES[accion]
+    transacciones = TransaccionContable.objects.filter(empresa=empresa, activo=True)
+    if ids is not None:
+        transacciones = transacciones.filter(id__in=ids)
+    else:
+        transacciones = transacciones.filter(estado=origen)
+    if filtros:
+        transacciones = transacciones.filter(**filtros)
+
+    fallidas = []
+    exitosas = []
+    with transaction.atomic():
+        encontradas = {
+            transaccion_id: (folio, estado, fecha)
+            for transaccion_id, folio, estado, fecha in transacciones.select_for_update().values_list(
+                'id', 'folio', 'estado', 'fecha'
+            ).order_by('id')
+        }
+        folios = {transaccion_id: datos[0] for transaccion_id, datos in encontradas.items()}
+
+        for transaccion_id in dict.fromkeys(ids or []):
+            if transaccion_id not in encontradas:
+                fallidas.append({'id': transaccion_id, 'folio': None, 'error': 'Transacción no encontrada'})
+
+        candidatas = []
+        for transaccion_id, (folio, estado, _fecha) in encontradas.items():
+            if estado == origen:
+                candidatas.append(transaccion_id)
+            else:
+                fallidas.append({'id': transaccion_id, 'folio': folio, 'error': error_estado})
+
+        saldos = {}
+        ahora = timezone.now()
+        for lote in _lotes(candidatas):
+            if accion in ACCIONES_CON_REGLAS:
+                lote = _revisar_reglas(lote, folios, fallidas, recalcular_totales=accion == 'validar')
+            if not lote:
+                continue
+
+            cambios = {'estado': destino, 'fecha_modificacion': ahora}
+            if usuario is not None:
+                cambios['modificado_por'] = usuario
+            if accion == 'contabilizar':
+                cambios['fecha_contabilizacion'] = ahora
+            TransaccionContable.objects.filter(id__in=lote).update(**cambios)
+            MovimientoContable.objects.filter(transaccion_id__in=lote).update(estado=destino)
+
+            if accion != 'validar':
+                _acumular_saldos(lote, saldos)
+            exitosas.extend(lote)
+
+        if exitosas and accion != 'validar':
+            SaldoPeriodo.aplicar_totales(empresa.id, saldos, signo=-1 if accion == 'cancelar' else 1)
+            Empresa.incrementar_version_contable(empresa.id)
+
+            desde = min(encontradas[transaccion_id][2] for transaccion_id in exitosas)
+
+            def invalidar():
+                from .saldos import invalidar_indice_saldos
+                invalidar_indice_saldos(empresa.id, desde)
+
+            transaction.on_commit(invalidar)
+
+    fallidas.sort(key=lambda falla: falla['id'])
+    return {'exitosas': exitosas, 'fallidas': fallidas}
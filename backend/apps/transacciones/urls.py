@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TransaccionContableViewSet, MovimientoContableViewSet, transacciones_root, crear_transaccion_view
+from .views import TransaccionContableViewSet, MovimientoContableViewSet, ImportacionJobViewSet, transacciones_root, crear_transaccion_view
 
 router = DefaultRouter()
 router.register(r'transacciones', TransaccionContableViewSet, basename='transaccion-contable')
 router.register(r'movimientos', MovimientoContableViewSet, basename='movimiento-contable')
+router.register(r'importaciones', ImportacionJobViewSet, basename='importacion-transacciones')
 
 urlpatterns = [
     path('', transacciones_root, name='transacciones-root'),
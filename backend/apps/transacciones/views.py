@@ -5,15 +5,40 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.http import HttpResponse
-from django.db.models import Q, F
+from django.db.models import Q, F, Count
 from django.db import models
-from .models import TransaccionContable, MovimientoContable
+from .models import TransaccionContable, MovimientoContable, ImportacionJob
 from .serializers import (
     TransaccionContableSerializer,
     TransaccionContableCreateSerializer,
     TransaccionContableListSerializer,
-    MovimientoContableSerializer
+    MovimientoContableSerializer,
+    ImportacionJobSerializer,
+    ImportacionJobCreateSerializer,
+    ErrorImportacionSerializer,
+    TransicionMasivaSerializer
 )
+from .importacion import solicitar_importacion
+from .transiciones import transicion_masiva
+from apps.reportes.exportadores import Columna, exportar_csv
+from apps.core.paginacion import PaginacionCursor
+
+COLUMNAS_MOVIMIENTOS = [
+    Columna('Fecha', 12, 'fecha'),
+    Columna('Folio', 12, 'texto'),
+    Columna('Estado', 15, 'texto'),
+    Columna('Código', 12, 'texto'),
+    Columna('Cuenta', 30, 'texto'),
+    Columna('Concepto', 40, 'texto'),
+    Columna('Debe', 15, 'moneda'),
+    Columna('Haber', 15, 'moneda'),
+]
+
+
+class PaginacionTransacciones(PaginacionCursor):
+    """Transacciones de la más reciente a la más antigua"""
+    campos = ('fecha', 'folio', 'id')
+    descendente = True
 
 
 class TransaccionContableViewSet(viewsets.ModelViewSet):
@@ -25,8 +50,19 @@ class TransaccionContableViewSet(viewsets.ModelViewSet):
     ordering_fields = ['fecha', 'folio', 'total_debe']
     ordering = ['-fecha', '-folio']
     
-    def get_queryset(self):
-        """Solo transacciones de la empresa actual"""
+    @property
+    def paginator(self):
+        """
+        Con ?paginacion=cursor el listado usa paginación keyset por
+        (-fecha, -folio, -id), de latencia constante a cualquier profundidad;
+        en ese modo se ignora ?ordering
+        """
+        if not hasattr(self, '_paginator') and self.request.query_params.get('paginacion') == 'cursor':
+            self._paginator = PaginacionTransacciones()
+        return super().paginator
+    
+    def get_empresa(self):
+        """Empresa actual del usuario"""
         # Usar la misma lógica que en catálogo de cuentas
         empresa = None
         if hasattr(self.request, 'empresa') and self.request.empresa:
@@ -48,12 +84,20 @@ class TransaccionContableViewSet(viewsets.ModelViewSet):
                 ).first()
                 if acceso:
                     empresa = acceso.empresa
-        
+        return empresa
+    
+    def get_queryset(self):
+        """Solo transacciones de la empresa actual"""
+        empresa = self.get_empresa()
         if empresa:
-            return TransaccionContable.objects.filter(
+            queryset = TransaccionContable.objects.filter(
                 empresa=empresa,
                 activo=True
-            ).defer('tipo_personalizado').prefetch_related('movimientos__cuenta')
+            ).defer('tipo_personalizado')
+            if self.action == 'list':
+                # El listado solo necesita el número de movimientos de cada póliza
+                return queryset.annotate(num_movimientos=Count('movimientos'))
+            return queryset.prefetch_related('movimientos__cuenta')
         return TransaccionContable.objects.none()
         
     def get_serializer_class(self):
@@ -65,8 +109,8 @@ class TransaccionContableViewSet(viewsets.ModelViewSet):
         return TransaccionContableSerializer
         
     def perform_create(self, serializer):
-        """No hacer nada - el serializer maneja la creación"""
-        pass
+        """El serializer crea la póliza completa con el servicio de pólizas"""
+        serializer.save()
         
     def perform_update(self, serializer):
         """Asignar usuario modificador"""
@@ -124,6 +168,36 @@ class TransaccionContableViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def transicion_masiva(self, request):
+        """
+        Validar, contabilizar o cancelar muchas transacciones a la vez
+        Recibe accion y los ids o filtros (fecha_desde, fecha_hasta, tipo);
+        responde las exitosas y las fallidas con su error
+        """
+        empresa = self.get_empresa()
+        if not empresa:
+            return Response({'error': 'No se pudo determinar la empresa'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = TransicionMasivaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        resultado = transicion_masiva(
+            empresa,
+            datos['accion'],
+            ids=datos.get('ids'),
+            filtros=datos['filtros'],
+            usuario=request.user
+        )
+        return Response({
+            'accion': datos['accion'],
+            'total_exitosas': len(resultado['exitosas']),
+            'total_fallidas': len(resultado['fallidas']),
+            **resultado
+        })
+    
     @action(detail=False, methods=['get'])
     def estados(self, request):
         """Lista los estados disponibles"""
@@ -224,10 +298,92 @@ class MovimientoContableViewSet(viewsets.ModelViewSet):
         
         if empresa:
             return MovimientoContable.objects.filter(
-                transaccion__empresa=empresa,
+                empresa=empresa,
                 activo=True
             ).select_related('transaccion', 'cuenta')
         return MovimientoContable.objects.none()
+    
+    def list(self, request, *args, **kwargs):
+        """Lista de movimientos; con ?formato=csv se descarga en streaming"""
+        if request.query_params.get('formato') != 'csv':
+            return super().list(request, *args, **kwargs)
+        
+        movimientos = self.filter_queryset(self.get_queryset()).order_by(
+            'fecha', 'transaccion__folio', 'id'
+        ).values_list(
+            'fecha', 'transaccion__folio', 'estado',
+            'cuenta__codigo', 'cuenta__nombre', 'concepto', 'debe', 'haber'
+        )
+        return exportar_csv(
+            'movimientos.csv',
+            COLUMNAS_MOVIMIENTOS,
+            movimientos.iterator(chunk_size=500)
+        )
+
+
+class ImportacionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet para importaciones de pólizas desde Excel o CSV
+    POST sube el archivo (con simulacion=true solo valida); GET consulta el
+    progreso y /errores/ los errores por fila
+    """
+    serializer_class = ImportacionJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_empresa(self):
+        """Empresa actual del usuario"""
+        if hasattr(self.request, 'empresa') and self.request.empresa:
+            return self.request.empresa
+        from apps.empresas.models import UsuarioEmpresa
+        acceso = UsuarioEmpresa.objects.filter(
+            usuario=self.request.user,
+            activo=True
+        ).select_related('empresa').first()
+        return acceso.empresa if acceso else None
+    
+    def get_queryset(self):
+        """Importaciones de la empresa actual"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return ImportacionJob.objects.none()
+        return ImportacionJob.objects.filter(empresa=empresa, activo=True).select_related('empresa')
+    
+    def create(self, request):
+        """Sube un archivo y encola su importación"""
+        empresa = self.get_empresa()
+        if not empresa:
+            return Response({'error': 'No se pudo determinar la empresa'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = ImportacionJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        trabajo = solicitar_importacion(
+            empresa,
+            request.user,
+            serializer.validated_data['archivo'],
+            serializer.validated_data['simulacion'],
+            serializer.validated_data['asignar_folios']
+        )
+        
+        data = ImportacionJobSerializer(trabajo, context={'request': request}).data
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def errores(self, request, pk=None):
+        """Errores por fila de la importación; filtrables por ?hoja= y ?folio="""
+        trabajo = self.get_object()
+        errores = trabajo.errores.all()
+        hoja = request.query_params.get('hoja')
+        if hoja:
+            errores = errores.filter(hoja=hoja)
+        folio = request.query_params.get('folio')
+        if folio:
+            errores = errores.filter(folio=folio)
+        
+        page = self.paginate_queryset(errores)
+        serializer = ErrorImportacionSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 @api_view(['GET'])
@@ -340,10 +496,11 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from datetime import date
-from decimal import Decimal
-from django.db.models import Max
+from django.core.exceptions import ValidationError
 from apps.catalogo_cuentas.models import CuentaContable
 from apps.empresas.models import UsuarioEmpresa
+from .polizas import crear_poliza
+from .folios import siguiente_folio
 
 
 @login_required
@@ -454,140 +611,46 @@ def crear_transaccion_view(request):
                 )
                 folio_generado = tipo_personalizado_obj.generar_folio()
             except TipoTransaccion.DoesNotExist:
-                # Es un tipo predeterminado, usar numeración tradicional
-                try:
-                    ultimo_folio_str = TransaccionContable.objects.filter(
-                        empresa=empresa,
-                        tipo=tipo
-                    ).defer('tipo_personalizado').aggregate(max_folio=Max('folio'))['max_folio']
-                    
-                    if ultimo_folio_str is None:
-                        folio_generado = "1"
-                    else:
-                        try:
-                            ultimo_num = int(ultimo_folio_str)
-                            folio_generado = str(ultimo_num + 1)
-                        except ValueError:
-                            import time
-                            folio_generado = str(int(time.time()) % 10000)
-                except Exception:
-                    folio_generado = "1"
+                # Es un tipo predeterminado: secuencia numérica de la empresa
+                folio_generado = siguiente_folio(empresa.id, tipo)
             
-            # Crear transacción
-            transaccion = TransaccionContable.objects.create(
-                empresa=empresa,
+            # Procesar movimientos: cada lado del formulario trae listas paralelas
+            movimientos = []
+            for lado in ('debe', 'haber'):
+                cuentas_lado = request.POST.getlist(f'cuenta_{lado}[]')
+                montos = request.POST.getlist(f'monto_{lado}[]')
+                conceptos = request.POST.getlist(f'concepto_{lado}[]')
+                centros = request.POST.getlist(f'centro_costo_{lado}[]')
+                proyectos_lado = request.POST.getlist(f'proyecto_{lado}[]')
+                
+                for i, cuenta_id in enumerate(cuentas_lado):
+                    if cuenta_id and i < len(montos) and montos[i]:
+                        movimientos.append({
+                            'cuenta_id': cuenta_id,
+                            lado: montos[i],
+                            'concepto': conceptos[i] if i < len(conceptos) else concepto,
+                            'centro_costo_id': centros[i] if i < len(centros) else None,
+                            'proyecto_id': proyectos_lado[i] if i < len(proyectos_lado) else None,
+                        })
+            
+            # Crear transacción con sus movimientos y totales en una sola pasada
+            transaccion = crear_poliza(
+                empresa,
+                request.user,
+                movimientos,
                 folio=folio_generado,
                 concepto=concepto,
                 tipo=tipo,
                 fecha=fecha,
-                tipo_personalizado=tipo_personalizado_obj,
-                creado_por=request.user
+                tipo_personalizado=tipo_personalizado_obj
             )
             
-            # Procesar movimientos
-            cuentas_debe = request.POST.getlist('cuenta_debe[]')
-            montos_debe = request.POST.getlist('monto_debe[]')
-            conceptos_debe = request.POST.getlist('concepto_debe[]')
-            centros_debe = request.POST.getlist('centro_costo_debe[]')
-            proyectos_debe = request.POST.getlist('proyecto_debe[]')
-            
-            cuentas_haber = request.POST.getlist('cuenta_haber[]')
-            montos_haber = request.POST.getlist('monto_haber[]')
-            conceptos_haber = request.POST.getlist('concepto_haber[]')
-            centros_haber = request.POST.getlist('centro_costo_haber[]')
-            proyectos_haber = request.POST.getlist('proyecto_haber[]')
-            
-            # Crear movimientos debe
-            for i, cuenta_id in enumerate(cuentas_debe):
-                if cuenta_id and montos_debe[i]:
-                    cuenta = CuentaContable.objects.get(id=cuenta_id)
-                    
-                    # Obtener centro de costo si está especificado
-                    centro_costo = None
-                    if i < len(centros_debe) and centros_debe[i]:
-                        try:
-                            from apps.centros_costo.models import CentroCosto
-                            centro_costo = CentroCosto.objects.get(
-                                id=centros_debe[i],
-                                empresa=empresa,
-                                activo=True
-                            )
-                        except (CentroCosto.DoesNotExist, ImportError):
-                            pass
-                    
-                    # Obtener proyecto si está especificado
-                    proyecto = None
-                    if i < len(proyectos_debe) and proyectos_debe[i]:
-                        try:
-                            from apps.centros_costo.models import Proyecto
-                            proyecto = Proyecto.objects.get(
-                                id=proyectos_debe[i],
-                                empresa=empresa,
-                                activo=True
-                            )
-                        except (Proyecto.DoesNotExist, ImportError):
-                            pass
-                    
-                    MovimientoContable.objects.create(
-                        transaccion=transaccion,
-                        cuenta=cuenta,
-                        debe=Decimal(montos_debe[i]),
-                        haber=Decimal('0.00'),
-                        concepto=conceptos_debe[i] if i < len(conceptos_debe) else concepto,
-                        centro_costo=centro_costo,
-                        proyecto=proyecto,
-                        creado_por=request.user
-                    )
-            
-            # Crear movimientos haber
-            for i, cuenta_id in enumerate(cuentas_haber):
-                if cuenta_id and montos_haber[i]:
-                    cuenta = CuentaContable.objects.get(id=cuenta_id)
-                    
-                    # Obtener centro de costo si está especificado
-                    centro_costo = None
-                    if i < len(centros_haber) and centros_haber[i]:
-                        try:
-                            from apps.centros_costo.models import CentroCosto
-                            centro_costo = CentroCosto.objects.get(
-                                id=centros_haber[i],
-                                empresa=empresa,
-                                activo=True
-                            )
-                        except (CentroCosto.DoesNotExist, ImportError):
-                            pass
-                    
-                    # Obtener proyecto si está especificado
-                    proyecto = None
-                    if i < len(proyectos_haber) and proyectos_haber[i]:
-                        try:
-                            from apps.centros_costo.models import Proyecto
-                            proyecto = Proyecto.objects.get(
-                                id=proyectos_haber[i],
-                                empresa=empresa,
-                                activo=True
-                            )
-                        except (Proyecto.DoesNotExist, ImportError):
-                            pass
-                    
-                    MovimientoContable.objects.create(
-                        transaccion=transaccion,
-                        cuenta=cuenta,
-                        debe=Decimal('0.00'),
-                        haber=Decimal(montos_haber[i]),
-                        concepto=conceptos_haber[i] if i < len(conceptos_haber) else concepto,
-                        centro_costo=centro_costo,
-                        proyecto=proyecto,
-                        creado_por=request.user
-                    )
-            
-            # Recalcular totales
-            transaccion.calcular_totales()
-            
             # Redirigir a lista de transacciones con mensaje de éxito
             messages.success(request, f'Transacción {transaccion.folio} creada correctamente')
             return redirect('/transacciones/')
             
+        except ValidationError as e:
+            messages.error(request, f'Error al crear transacción: {"; ".join(e.messages)}')
         except Exception as e:
             messages.error(request, f'Error al crear transacción: {str(e)}')
     
@@ -0,0 +1,31 @@
+"""
+Configuración de gunicorn
+Con PROMETHEUS_MULTIPROC_DIR las métricas de cada worker se escriben en ese
+directorio; se vacía al arrancar el servidor y se descartan los valores de
+los workers que terminan
+"""
+import os
+import shutil
+
+bind = '0.0.0.0:8000'
+workers = int(os.environ.get('GUNICORN_WORKERS', '3'))
+
+
+def on_starting(server):
+    directorio = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directorio and os.path.isdir(directorio):
+        for nombre in os.listdir(directorio):
+            ruta = os.path.join(directorio, nombre)
+            if os.path.isdir(ruta):
+                shutil.rmtree(ruta)
+            else:
+                os.remove(ruta)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        try:
+            from prometheus_client import multiprocess
+        except ImportError:
+            return
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -34,6 +35,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricasMiddleware',  # Solo activo con prometheus_client instalado
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -43,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.empresas.middleware.EmpresaMiddleware',  # ✅ Habilitado en Etapa 2 MVP
+    'apps.core.middleware.PerfiladoSQLMiddleware',  # Solo activo con PERFILADO_SQL_MUESTREO > 0
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -158,6 +161,31 @@ AUDIT_SETTINGS = {
     'LOG_IP_ADDRESS': True,
 }
 
+# Perfilado SQL por petición (apps.core.middleware.PerfiladoSQLMiddleware)
+PERFILADO_SQL = {
+    'MUESTREO': float(os.environ.get('PERFILADO_SQL_MUESTREO', '0')),
+    'UMBRAL_LENTO_MS': int(os.environ.get('PERFILADO_SQL_UMBRAL_MS', '1000')),
+    'CONSULTAS_LENTAS': 5,
+}
+
+# Métricas para Prometheus (requiere prometheus_client; ver apps.core.metricas)
+# Con varios procesos, PROMETHEUS_MULTIPROC_DIR debe apuntar a un directorio
+# compartido por gunicorn y Celery que se vacía al arrancar
+METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', 'True').lower() == 'true'
+METRICAS_IPS_PERMITIDAS = os.environ.get('METRICAS_IPS_PERMITIDAS', '127.0.0.1').split(',')
+
+# Celery (config/celery.py)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # Particiones por año de los movimientos, creadas con un año de anticipación
+    'crear-particiones-movimientos': {
+        'task': 'apps.transacciones.tasks.crear_particiones_movimientos',
+        'schedule': crontab(minute=0, hour=3, day_of_month=1),
+    },
+}
+
 # Configuración de logging
 LOGGING = {
     'version': 1,
@@ -171,6 +199,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -184,6 +216,12 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'peticiones_lentas': {
+            'level': 'WARNING',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'peticiones_lentas.log',
+            'formatter': 'json',
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -200,6 +238,12 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        # Una línea JSON por petición lenta (perfilado SQL)
+        'apps.core.perfilado': {
+            'handlers': ['peticiones_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
@@ -71,6 +71,14 @@ LOGGING.update({
             'class': 'django.utils.log.AdminEmailHandler',
             'formatter': 'verbose',
         },
+        'peticiones_lentas': {
+            'level': 'WARNING',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'peticiones_lentas.log',
+            'maxBytes': 1024*1024*10,  # 10 MB
+            'backupCount': 5,
+            'formatter': 'json',
+        },
     },
     'loggers': {
         'django': {
@@ -83,6 +91,11 @@ LOGGING.update({
             'level': 'WARNING',
             'propagate': False,
         },
+        'apps.core.perfilado': {
+            'handlers': ['peticiones_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 })
 
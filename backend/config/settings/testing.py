@@ -1,3 +1,4 @@
+import os
 from .base import *
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -16,6 +17,20 @@ DATABASES = {
     }
 }
 
+# Con TEST_POSTGRES=1 los tests corren contra un PostgreSQL local (variables
+# DB_*), p. ej. los de particionado de movimientos que se omiten en SQLite
+if os.environ.get('TEST_POSTGRES'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'ziva_contabilidad'),
+            'USER': os.environ.get('DB_USER', 'ziva_user'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'ziva_password'),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+        }
+    }
+
 # Password hashers más rápidos para tests
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
@@ -72,4 +87,10 @@ AUDIT_SETTINGS.update({
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
 # Deshabilitar validaciones de password para tests
-AUTH_PASSWORD_VALIDATORS = []
\ No newline at end of file
+AUTH_PASSWORD_VALIDATORS = []
+# SQLite ignora las columnas incluidas (INCLUDE) de los índices cubrientes de Postgres
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+# Celery en memoria: los tests ejecutan las tareas en el proceso, sin Redis
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
@@ -14,7 +14,8 @@ from apps.core.views import (
     dashboard, transacciones_view, catalogo_view, 
     reportes_view, seleccionar_empresa, logout_view, configuracion_view,
     configuracion_empresas_view, configuracion_catalogo_view, configuracion_transacciones_view,
-    configuracion_transacciones_get, configuracion_placeholder_view, configuracion_general_view
+    configuracion_transacciones_get, configuracion_placeholder_view, configuracion_general_view,
+    metricas
 )
 from apps.transacciones.views import crear_transaccion_view
 
@@ -208,6 +209,7 @@ urlpatterns = [
     
     # Admin y API
     path('admin/', admin.site.urls),
+    path('metrics', metricas, name='metricas'),
     path('api/', api_root, name='api-root'),
     path('api/core/', include('apps.core.urls')),
     path('api/empresas/', include('apps.empresas.urls')),